@@ -80,7 +80,6 @@ WSGI_APPLICATION = 'backend.wsgi.application'
 DATABASES = {
     "default": {
         "ENGINE": "django.contrib.gis.db.backends.postgis",
-        "ENGINE": "django.db.backends.postgresql_psycopg2",
         "NAME": "Hedera",
         "USER": "postgres",
         "PASSWORD": "1122",
@@ -165,4 +164,130 @@ SIMPLE_JWT = {
     "SLIDING_TOKEN_REFRESH_LIFETIME": timedelta(days=1),
 }
 
-SENTINEL_API_KEY=""
\ No newline at end of file
+SENTINEL_API_KEY=""
+
+# Hedera balances are served from the database and refreshed in the background
+# once older than this many seconds.
+HEDERA_BALANCE_STALE_SECONDS = 300
+HEDERA_BALANCE_REFRESH_BATCH_SIZE = 50
+HEDERA_BALANCE_REFRESH_WORKERS = 8
+
+# Land tokenization runs in `manage.py run_tokenization_worker`. Point this at
+# farmer.tokenization.FakeLandTokenizationService to run without a network.
+LAND_TOKENIZATION_SERVICE = 'farmer.tokenization.LandTokenizationService'
+
+# Hedera accepts at most this many metadata entries per TokenMintTransaction.
+HEDERA_MAX_MINT_METADATA = 10
+
+# New farmer wallets are created on Hedera in the background
+# (`manage.py provision_wallets` picks up retries).
+HEDERA_PROVISION_WORKERS = 8
+HEDERA_PROVISION_BATCH_SIZE = 50
+HEDERA_PROVISION_MAX_ATTEMPTS = 5
+HEDERA_PROVISION_RETRY_SECONDS = 30
+
+# Pre-generated wallet keys claimed at registration. With
+# WALLET_KEY_POOL_PRECREATE_ACCOUNTS the pool also holds funded Hedera
+# accounts, so new wallets are active immediately.
+WALLET_KEY_POOL_LOW_WATER = 50
+WALLET_KEY_POOL_TARGET = 200
+WALLET_KEY_POOL_PRECREATE_ACCOUNTS = False
+
+# Bulk sensor ingestion (sensor-data/bulk/) writes in chunks of this size,
+# using COPY on PostgreSQL.
+SENSOR_INGEST_CHUNK_SIZE = 5000
+SENSOR_INGEST_USE_COPY = True
+
+# Sensor-data and issuance lists page by key (?cursor=) instead of OFFSET;
+# clients may ask for up to this many rows per page.
+KEYSET_MAX_PAGE_SIZE = 1000
+
+# Rows fetched per server-side cursor round trip (and per encoded batch) in
+# the streaming sensor-data/issuance exports.
+EXPORT_CHUNK_SIZE = 5000
+
+# Upper bound for land/nearby/?radius= (meters).
+PARCEL_SEARCH_MAX_RADIUS_M = 50_000
+
+# Parcel overlaps covering at least this share of either parcel are flagged
+# as possible double claims and block verification.
+PARCEL_OVERLAP_THRESHOLD = 0.02
+
+# Sentinel Hub API host (point at `manage.py sentinel_stub` for local runs).
+# The OAuth token is reused until this many seconds before it expires; HTTP
+# calls share a pool of connections and retry 429/5xx with backoff, up to
+# SENTINEL_HTTP_RETRIES times and only within the call's timeout.
+SENTINEL_BASE_URL = "https://services.sentinel-hub.com"
+SENTINEL_TOKEN_REFRESH_MARGIN = 60
+SENTINEL_HTTP_POOL_SIZE = 10
+SENTINEL_HTTP_RETRIES = 3
+
+# Satellite analyses are cached per normalized polygon, resolution and
+# imagery window for SATELLITE_CACHE_TTL seconds; `manage.py
+# evict_satellite_cache` drops expired entries and the least recently used
+# beyond SATELLITE_CACHE_MAX_ENTRIES.
+SATELLITE_RESOLUTION = 10
+SATELLITE_CACHE_TTL = 7 * 24 * 3600
+SATELLITE_CACHE_MAX_ENTRIES = 100_000
+
+# Batch satellite verification (land/verification/bulk-satellite/ and
+# `manage.py verify_parcels`): concurrent Sentinel Hub requests, and the
+# provider's request rate limit (requests per second). Both go through the
+# satellite provider's breaker and take up to its concurrency in slots. An
+# API request takes at most SATELLITE_BULK_MAX_PARCELS parcels, which at the
+# rate limit finish well inside a request timeout; larger runs use the command.
+SATELLITE_BATCH_CONCURRENCY = 20
+SATELLITE_RATE_LIMIT = 10
+SATELLITE_BULK_MAX_PARCELS = 100
+
+# Per-method overrides of the verification provider defaults (timeout in
+# seconds, concurrency, failure_threshold consecutive failures that open the
+# circuit breaker, reset_timeout seconds before a trial call).
+VERIFICATION_PROVIDERS = {
+    'satellite': {'timeout': 15, 'concurrency': 10, 'failure_threshold': 5, 'reset_timeout': 60},
+    'gps': {'timeout': 2, 'concurrency': 50},
+    'survey': {'timeout': 5, 'concurrency': 20},
+}
+
+# File storage. Verification evidence goes to the "evidence" backend, which
+# also keeps the parts of chunked uploads; for S3 or an S3-compatible service
+# (e.g. `manage.py s3_stub`) use
+#   {"BACKEND": "farmer.evidence_storage.S3EvidenceStorage",
+#    "OPTIONS": {"bucket": "evidence", "endpoint_url": "http://127.0.0.1:9000"}}
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+    "evidence": {"BACKEND": "farmer.evidence_storage.FileSystemEvidenceStorage"},
+}
+
+# Chunked evidence uploads (evidence-uploads/): largest chunk accepted per
+# request, largest file, and hours after which unfinished uploads are purged.
+EVIDENCE_UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+EVIDENCE_UPLOAD_MAX_SIZE = 10 * 1024 * 1024 * 1024
+EVIDENCE_UPLOAD_EXPIRY_HOURS = 24
+
+# Photo evidence thumbnails (longest edge in pixels, WebP and JPEG each),
+# rendered by `manage.py run_image_worker` in this many processes (None: one
+# per CPU). Larger photos are not processed.
+EVIDENCE_THUMBNAIL_SIZES = (160, 480, 1280)
+EVIDENCE_IMAGE_WORKERS = None
+EVIDENCE_IMAGE_MAX_BYTES = 50 * 1024 * 1024
+
+# Master keys that wrap the per-record data keys of encrypted wallet keys, by
+# version (None: FERNET_SECRET_KEY from the environment as version 1). New
+# keys are sealed with ENCRYPTION_KEY_VERSION; to rotate, add a key, raise
+# the version, run `manage.py rotate_encryption_keys`, then drop the old key.
+# Decrypted signing keys are cached per process (LRU entries, TTL seconds).
+ENCRYPTION_MASTER_KEYS = None
+ENCRYPTION_KEY_VERSION = 1
+SIGNING_KEY_CACHE_SIZE = 1024
+SIGNING_KEY_CACHE_TTL = 300
+
+# JWT authentication keeps each user's user/profile/wallet rows in a
+# per-process LRU cache for AUTH_CACHE_TTL seconds (0 disables it). Saves
+# drop entries in the saving process and bump a version token in the Django
+# cache AUTH_CACHE_ALIAS; point that at a shared backend (Redis, Memcached)
+# so other processes see them at once instead of after the TTL.
+AUTH_CACHE_TTL = 30
+AUTH_CACHE_MAX_ENTRIES = 10_000
+AUTH_CACHE_ALIAS = 'default'
@@ -1,9 +1,60 @@
 from django.contrib import admin
-from .models import FarmerProfile, HederaAccount, LandParcel, VerificationRequest, LandToken, CarbonCreditProject
+from .auth_cache import auth_cache
+from .models import FarmerProfile, HederaAccount, LandParcel, VerificationRequest, LandToken, CarbonCreditProject, \
+    TokenizationJob, LandTokenCollection, WalletKey, ParcelOverlap, SatelliteResult, \
+    EvidenceUpload
 
-admin.site.register(FarmerProfile)
-admin.site.register(HederaAccount)
+
+class FarmerProfileAdmin(admin.ModelAdmin):
+    list_display = ('username', 'email', 'country', 'is_verified', 'wallet_account_id', 'wallet_status')
+    list_select_related = ('hedera_account',)
+    actions = ['deactivate']
+
+    @admin.action(description='Deactivate selected farmers')
+    def deactivate(self, request, queryset):
+        user_ids = list(queryset.values_list('pk', flat=True))
+        queryset.update(is_active=False)
+        # update() sends no signals; without this a cached login would keep working until the TTL
+        for user_id in user_ids:
+            auth_cache.invalidate(user_id)
+        self.message_user(request, f"{len(user_ids)} farmer(s) deactivated.")
+
+    @admin.display(description='Hedera account')
+    def wallet_account_id(self, farmer):
+        return farmer.hederaaccount.account_id if farmer.hederaaccount else None
+
+    @admin.display(description='Wallet status')
+    def wallet_status(self, farmer):
+        return farmer.hederaaccount.status if farmer.hederaaccount else None
+
+
+class HederaAccountAdmin(admin.ModelAdmin):
+    list_display = ('id', 'farmer', 'account_id', 'status', 'key_version', 'created_at')
+    list_select_related = ('farmer',)
+    list_filter = ('status',)
+    raw_id_fields = ('farmer',)
+
+
+class WalletKeyAdmin(admin.ModelAdmin):
+    # Pool entries are generated by refill_key_pool; the encrypted keys are never shown
+    list_display = ('id', 'status', 'account_id', 'key_version', 'created_at', 'claimed_at')
+    list_filter = ('status',)
+    exclude = ('public_key', 'private_key', 'data_key')
+    readonly_fields = ('status', 'account_id', 'key_version', 'claimed_at')
+
+    def has_add_permission(self, request):
+        return False
+
+
+admin.site.register(FarmerProfile, FarmerProfileAdmin)
+admin.site.register(HederaAccount, HederaAccountAdmin)
+admin.site.register(WalletKey, WalletKeyAdmin)
 admin.site.register(LandParcel)
 admin.site.register(VerificationRequest)
 admin.site.register(LandToken)
-admin.site.register(CarbonCreditProject)
\ No newline at end of file
+admin.site.register(CarbonCreditProject)
+admin.site.register(TokenizationJob)
+admin.site.register(LandTokenCollection)
+admin.site.register(ParcelOverlap)
+admin.site.register(SatelliteResult)
+admin.site.register(EvidenceUpload)
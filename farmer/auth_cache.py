@@ -0,0 +1,172 @@
+"""
+Per-process cache of what JWT authentication loads for a user.
+
+An entry holds the user row, the FarmerProfile row and the HederaAccount
+row (without the encrypted keys) as plain values, and every hit builds new
+model instances from them with Model.from_db, so a request never shares
+objects with another one. The profile and the wallet are attached to the
+user the way Django caches related objects, so `request.user.farmerprofile`
+and `.hederaaccount` need no query either.
+
+Entries are dropped by the post_save/post_delete signals of the three
+models (farmer.signals). An invalidation also replaces the user's version
+token in the Django cache AUTH_CACHE_ALIAS, and a hit is only served while
+the token it was loaded under is still current. With a shared cache backend
+(Redis, Memcached) that reaches every process at once; with a per-process
+one, the TTL (AUTH_CACHE_TTL) bounds how long other processes can serve
+stale rows. Writes that bypass signals (queryset.update, bulk_update) must
+call `invalidate` themselves. A deactivated user is never served, whatever
+the cache holds.
+"""
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+
+from farmer.models import FarmerProfile, HederaAccount
+
+User = get_user_model()
+
+# Not cached; loaded on access if a view needs them
+DEFERRED_WALLET_FIELDS = ('public_key', 'private_key', 'data_key')
+
+
+def cache_ttl():
+    return getattr(settings, 'AUTH_CACHE_TTL', 30)
+
+
+def max_entries():
+    return getattr(settings, 'AUTH_CACHE_MAX_ENTRIES', 10_000)
+
+
+def shared_cache():
+    return caches[getattr(settings, 'AUTH_CACHE_ALIAS', 'default')]
+
+
+def _version_key(user_id):
+    return f"auth_cache:version:{user_id}"
+
+
+def _fields(model, exclude=()):
+    return [field for field in model._meta.concrete_fields if field.attname not in exclude]
+
+
+class AuthCache:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        # Bumped by every invalidation, so a row loaded before one is not stored after it
+        self._generation = 0
+
+    @staticmethod
+    def _values(instance, fields):
+        if instance is None:
+            return None
+        return tuple(getattr(instance, field.attname) for field in fields)
+
+    @staticmethod
+    def _build(model, fields, values):
+        if values is None:
+            return None
+        return model.from_db(DEFAULT_DB_ALIAS, [field.attname for field in fields], values)
+
+    def _snapshot(self, user):
+        profile = FarmerProfile.objects.select_related('hedera_account').filter(pk=user.pk).first()
+        user._state.fields_cache['farmerprofile'] = profile
+        account = profile.hederaaccount if profile is not None else None
+        return (
+            self._values(user, _fields(User)),
+            self._values(profile, _fields(FarmerProfile)),
+            self._values(account, _fields(HederaAccount, DEFERRED_WALLET_FIELDS)),
+        )
+
+    def _restore(self, snapshot):
+        user_values, profile_values, account_values = snapshot
+        user = self._build(User, _fields(User), user_values)
+        profile = self._build(FarmerProfile, _fields(FarmerProfile), profile_values)
+        if profile is None:
+            # Cached "no profile", as the reverse one-to-one descriptor would after a miss
+            user._state.fields_cache['farmerprofile'] = None
+        else:
+            profile.prime_hederaaccount(
+                self._build(HederaAccount, _fields(HederaAccount, DEFERRED_WALLET_FIELDS), account_values)
+            )
+            user._state.fields_cache['farmerprofile'] = profile
+        return user
+
+    def get(self, user_id, load):
+        """
+        The user with primary key `user_id`, from the cache or from `load`
+        (called with the id; returns the user or raises).
+        """
+        ttl, limit = cache_ttl(), max_entries()
+        if ttl <= 0 or limit <= 0:
+            return load(user_id)
+
+        # Read before loading, so an invalidation during the load makes the new entry stale at once
+        version = shared_cache().get(_version_key(user_id))
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[0] > now and entry[1] == version:
+                self._entries.move_to_end(user_id)
+                snapshot = entry[2]
+            else:
+                snapshot = None
+            generation = self._generation
+        if snapshot is not None:
+            user = self._restore(snapshot)
+            if user.is_active:
+                with self._lock:
+                    self.hits += 1
+                return user
+        with self._lock:
+            self.misses += 1
+            self._entries.pop(user_id, None)
+
+        user = load(user_id)
+        if user.is_active:
+            snapshot = self._snapshot(user)
+            with self._lock:
+                if generation != self._generation:
+                    return user
+                self._entries[user_id] = (time.monotonic() + ttl, version, snapshot)
+                self._entries.move_to_end(user_id)
+                while len(self._entries) > limit:
+                    self._entries.popitem(last=False)
+        return user
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._generation += 1
+            if self._entries.pop(user_id, None) is not None:
+                self.invalidations += 1
+        # Entries live at most one TTL, so the token does not need to outlive that
+        shared_cache().set(_version_key(user_id), uuid.uuid4().hex, max(cache_ttl(), 1))
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def as_dict(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'invalidations': self.invalidations,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else None,
+            }
+
+
+auth_cache = AuthCache()
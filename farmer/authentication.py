@@ -2,6 +2,8 @@ from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework import exceptions
 from django.contrib.auth import get_user_model
 
+from farmer.auth_cache import auth_cache
+
 User = get_user_model()
 
 
@@ -17,7 +19,7 @@ class CustomJWTAuthentication(JWTAuthentication):
 
         try:
             user_id = validated_token['user_id']
-            user = User.objects.get(pk=user_id, is_active=True)
+            user = auth_cache.get(user_id, lambda pk: User.objects.get(pk=pk, is_active=True))
             return user, validated_token
         except User.DoesNotExist:
             raise exceptions.AuthenticationFailed('User not found')
\ No newline at end of file
@@ -0,0 +1,161 @@
+import logging
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Q
+from django.utils import timezone
+
+from farmer.hedera import get_account_balance
+from farmer.models import HederaAccount
+
+logger = logging.getLogger(__name__)
+
+
+def stale_after():
+    return timedelta(seconds=getattr(settings, 'HEDERA_BALANCE_STALE_SECONDS', 300))
+
+
+def balance_age(hedera_account, now=None):
+    """Seconds since the cached balance was last fetched, or None if never."""
+    if hedera_account.last_balance_check is None:
+        return None
+    now = now or timezone.now()
+    return max(0, int((now - hedera_account.last_balance_check).total_seconds()))
+
+
+def is_stale(hedera_account, now=None):
+    age = balance_age(hedera_account, now)
+    return age is None or age >= stale_after().total_seconds()
+
+
+def refresh_balance(hedera_account):
+    """Fetch the balance from the network and store it on the account."""
+    hedera_account.account_balance = get_account_balance(hedera_account.account_id)
+    hedera_account.last_balance_check = timezone.now()
+    hedera_account.save(update_fields=['account_balance', 'last_balance_check'])
+    return hedera_account.account_balance
+
+
+def refresh_balances(accounts, max_workers=None):
+    """
+    Refresh a batch of accounts concurrently and write them back in a single
+    bulk update. Accounts whose query fails keep their previous balance.
+    Returns the number of accounts updated.
+    """
+    accounts = list(accounts)
+    if not accounts:
+        return 0
+
+    max_workers = max_workers or getattr(settings, 'HEDERA_BALANCE_REFRESH_WORKERS', 8)
+
+    def fetch(account):
+        try:
+            return account, get_account_balance(account.account_id)
+        except Exception:
+            logger.warning("Balance refresh failed for %s", account.account_id, exc_info=True)
+            return account, None
+
+    checked_at = timezone.now()
+    updated = []
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(accounts))) as executor:
+        for account, balance in executor.map(fetch, accounts):
+            if balance is None:
+                continue
+            account.account_balance = balance
+            account.last_balance_check = checked_at
+            updated.append(account)
+
+    HederaAccount.objects.bulk_update(updated, ['account_balance', 'last_balance_check'])
+    return len(updated)
+
+
+def stale_accounts(limit=None):
+    cutoff = timezone.now() - stale_after()
+    queryset = (
+        HederaAccount.objects
+        .filter(is_active=True, status='active')
+        .filter(Q(last_balance_check__isnull=True) | Q(last_balance_check__lt=cutoff))
+        .order_by('last_balance_check', 'id')
+    )
+    limit = limit or getattr(settings, 'HEDERA_BALANCE_REFRESH_BATCH_SIZE', 50)
+    return queryset[:limit]
+
+
+def refresh_stale_balances(limit=None):
+    return refresh_balances(stale_accounts(limit))
+
+
+class BalanceRefresher:
+    """
+    Background thread that refreshes balances requested from the request path.
+
+    Requests are de-duplicated and drained in batches so a login burst turns
+    into a handful of concurrent balance queries instead of one per login.
+    """
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def request(self, hedera_account_id):
+        with self._lock:
+            if hedera_account_id in self._pending:
+                return
+            self._pending.add(hedera_account_id)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='balance-refresher', daemon=True)
+                self._thread.start()
+        self._queue.put(hedera_account_id)
+
+    def _drain(self, first):
+        batch_size = getattr(settings, 'HEDERA_BALANCE_REFRESH_BATCH_SIZE', 50)
+        ids = [first]
+        while len(ids) < batch_size:
+            try:
+                ids.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return ids
+
+    def _run(self):
+        while True:
+            ids = self._drain(self._queue.get())
+            try:
+                close_old_connections()
+                accounts = [
+                    account for account in HederaAccount.objects.filter(id__in=ids, is_active=True, status='active')
+                    if is_stale(account)
+                ]
+                refresh_balances(accounts)
+            except Exception:
+                logger.exception("Background balance refresh failed")
+            finally:
+                with self._lock:
+                    self._pending.difference_update(ids)
+                close_old_connections()
+
+
+balance_refresher = BalanceRefresher()
+
+
+def cached_balance(hedera_account, fresh=False):
+    """
+    Return the stored balance without touching the network. Stale balances are
+    queued for the background refresher; `fresh=True` refreshes inline instead.
+    """
+    if hedera_account.status != 'active':
+        return hedera_account.account_balance
+    if fresh:
+        try:
+            refresh_balance(hedera_account)
+        except Exception:
+            logger.warning("Inline balance refresh failed for %s", hedera_account.account_id, exc_info=True)
+    elif is_stale(hedera_account):
+        balance_refresher.request(hedera_account.id)
+    return hedera_account.account_balance
@@ -0,0 +1,213 @@
+"""
+Satellite verification of many parcels at once.
+
+Sentinel Hub analyses run on an asyncio event loop in a helper thread:
+up to SATELLITE_BATCH_CONCURRENCY requests are in flight (no more than
+the satellite provider has free slots), and a token bucket keeps them
+under SATELLITE_RATE_LIMIT requests per second. Each
+result is handed back to the calling thread as soon as it arrives. The
+calling thread does all database work (result cache, LandParcel,
+VerificationRequest), so the ORM is never used from the event loop.
+"""
+import asyncio
+import json
+import logging
+import queue
+import threading
+import time
+
+import aiohttp
+from django.conf import settings
+
+from farmer import satellite_cache, verification_providers
+from farmer.land_verification import ANALYSIS_PATH, analysis_payload, analysis_result, record_verification, \
+    satellite_resolution
+from farmer.sentinel import RETRY_STATUSES, base_url, max_retries, retry_delay, sentinel
+
+logger = logging.getLogger(__name__)
+
+
+def batch_concurrency():
+    return getattr(settings, 'SATELLITE_BATCH_CONCURRENCY', 20)
+
+
+def rate_limit():
+    return getattr(settings, 'SATELLITE_RATE_LIMIT', 10)
+
+
+class RateLimiter:
+    """Token bucket: `rate` acquisitions per second, bursts of up to `burst`."""
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.capacity = burst or max(1, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+async def _analyse(session, limiter, payload, clock, budget):
+    """
+    Returns (result, cacheable), like the fetch in verify_with_satellite.
+    clock['started'] is set when the first request is sent, so time spent
+    waiting for the rate limiter does not count as provider latency.
+    `budget` bounds the analysis from then on, retries included, as it
+    does for SentinelClient.post.
+    """
+    url = f"{base_url()}{ANALYSIS_PATH}"
+    attempt = 0
+    reauthenticated = False
+    while True:
+        await limiter.acquire()
+        deadline = clock.setdefault('started', time.perf_counter()) + budget
+        remaining = deadline - time.perf_counter()
+        if remaining <= 0:
+            return {"error": f"Satellite verification ran over its {budget}s budget"}, False
+        token = await asyncio.to_thread(sentinel.tokens.get, remaining)
+        try:
+            async with session.post(
+                url, json=payload, headers={"Authorization": f"Bearer {token}"},
+                timeout=aiohttp.ClientTimeout(total=max(deadline - time.perf_counter(), 0.001))
+            ) as response:
+                if response.status == 200:
+                    return analysis_result(await response.json()), True
+                if response.status == 401 and not reauthenticated:
+                    sentinel.tokens.invalidate(token)
+                    reauthenticated = True
+                    continue
+                delay = retry_delay(attempt, response.headers)
+                if response.status not in RETRY_STATUSES or not _may_retry(attempt, delay, deadline):
+                    text = await response.text()
+                    logger.warning(f"Satellite verification failed: {response.status} - {text}")
+                    return {"valid": False, "error": f"Satellite verification failed: {response.status}"}, False
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            delay = retry_delay(attempt)
+            if not _may_retry(attempt, delay, deadline):
+                logger.warning("Satellite verification request failed: %r", e)
+                return {"error": str(e) or type(e).__name__}, False
+        attempt += 1
+        await asyncio.sleep(delay)
+
+
+def _may_retry(attempt, delay, deadline):
+    return attempt < max_retries() and time.perf_counter() + delay < deadline
+
+
+async def _analyse_all(jobs, emit, concurrency, rate, provider=None):
+    limiter = RateLimiter(rate)
+    semaphore = asyncio.Semaphore(concurrency)
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    budget = provider.timeout if provider is not None else 15
+
+    async with aiohttp.ClientSession(connector=connector) as session:
+        async def run(key, payload):
+            async with semaphore:
+                if provider is not None and provider.breaker.state == 'open':
+                    # The breaker opened during the batch: send nothing more
+                    emit((key, {"error": f"{provider.label} verification is temporarily unavailable"}, False))
+                    return
+                clock = {}
+                try:
+                    result, cacheable = await _analyse(session, limiter, payload, clock, budget)
+                except Exception as e:
+                    logger.exception("Unexpected error during satellite verification.")
+                    result, cacheable = {"error": str(e)}, False
+                if provider is not None and 'started' in clock:
+                    provider.observe(time.perf_counter() - clock['started'], provider.is_failure(result))
+            emit((key, result, cacheable))
+
+        await asyncio.gather(*(run(key, payload) for key, payload in jobs))
+
+
+def analyse_many(jobs, concurrency=None, rate=None, provider=None):
+    """
+    Run Sentinel analyses for `jobs` ((key, payload) pairs) concurrently and
+    yield (key, result, cacheable) in completion order. Each analysis is
+    reported to `provider` (latency and breaker), and once its breaker opens
+    the remaining jobs fail without a request.
+    """
+    jobs = list(jobs)
+    if not jobs:
+        return
+    done = object()
+    results = queue.Queue()
+
+    def loop():
+        try:
+            asyncio.run(_analyse_all(
+                jobs, results.put, concurrency or batch_concurrency(), rate or rate_limit(), provider
+            ))
+        except BaseException as e:
+            results.put(e)
+        finally:
+            results.put(done)
+
+    thread = threading.Thread(target=loop, name='satellite-batch', daemon=True)
+    thread.start()
+    while (item := results.get()) is not done:
+        if isinstance(item, BaseException):
+            raise item
+        yield item
+    thread.join()
+
+
+def verify_parcels(parcels, user, date_from=None, date_to=None, force_refresh=False, concurrency=None):
+    """
+    Satellite-verify every parcel in `parcels` on behalf of `user`, through
+    the satellite provider like a single verification: its prechecks run
+    first, and the batch holds up to `concurrency` of its slots and feeds its
+    breaker. Cached analyses are applied first, then the rest as they finish.
+    Yields (parcel, verification request, result); raises ProviderUnavailable
+    before recording anything when the provider is unavailable.
+    """
+    provider = verification_providers.get_provider('satellite')
+    with provider.reserve(concurrency or batch_concurrency()) as slots:
+        yield from _verify_parcels(provider, slots, parcels, user, date_from, date_to, force_refresh)
+
+
+def _verify_parcels(provider, concurrency, parcels, user, date_from, date_to, force_refresh):
+    resolution = satellite_resolution()
+    pending = {}
+    jobs = []
+    for parcel in parcels:
+        failed = provider.precheck(parcel)
+        if failed is not None:
+            yield parcel, *record_verification(parcel, user, 'satellite', failed)
+            continue
+        try:
+            coords = json.loads(parcel.gps_coordinates)
+            key = satellite_cache.geometry_key(coords, resolution, date_from, date_to)
+        except (ValueError, TypeError) as e:
+            yield parcel, *record_verification(parcel, user, 'satellite', {"error": str(e)})
+            continue
+
+        if force_refresh:
+            satellite_cache.counters.incr('refreshes')
+        else:
+            cached = satellite_cache.lookup(key)
+            if cached is not None:
+                satellite_cache.counters.incr('hits')
+                yield parcel, *record_verification(parcel, user, 'satellite', {**cached, "cached": True})
+                continue
+            satellite_cache.counters.incr('misses')
+
+        pending.setdefault(key, []).append(parcel)
+        if len(pending[key]) == 1:
+            jobs.append((key, analysis_payload(coords, resolution, date_from, date_to)))
+
+    for key, result, cacheable in analyse_many(jobs, concurrency, provider=provider):
+        if cacheable:
+            satellite_cache.store(key, result, resolution, date_from, date_to)
+        for parcel in pending.pop(key):
+            yield parcel, *record_verification(parcel, user, 'satellite', {**result, "cached": False})
@@ -0,0 +1,147 @@
+"""
+Background thumbnail and EXIF pipeline for photo evidence.
+
+Photo evidence is saved with image_status 'pending'. `run_image_worker`
+takes pending rows with SKIP LOCKED, so several workers can share the
+queue, and rows held by a worker that dies become available again when its
+transaction ends. The photos are rendered in a ProcessPoolExecutor
+(farmer.images.render), so resizing never runs in a request worker. The
+worker stores WebP and JPEG thumbnails in the evidence storage, sets
+captured_at, and sets latitude/longitude from EXIF unless they were
+entered by hand.
+"""
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.utils import timezone
+
+from farmer.images import render
+from farmer.models import VerificationEvidence
+
+logger = logging.getLogger(__name__)
+
+
+def thumbnail_sizes():
+    return tuple(getattr(settings, 'EVIDENCE_THUMBNAIL_SIZES', (160, 480, 1280)))
+
+
+def image_workers():
+    return getattr(settings, 'EVIDENCE_IMAGE_WORKERS', None) or os.cpu_count() or 1
+
+
+def max_image_bytes():
+    return getattr(settings, 'EVIDENCE_IMAGE_MAX_BYTES', 50 * 1024 * 1024)
+
+
+def make_executor(workers=None):
+    # Spawned, not forked: the children never inherit this process's database connections
+    return ProcessPoolExecutor(max_workers=workers or image_workers(), mp_context=multiprocessing.get_context('spawn'))
+
+
+def thumbnail_name(evidence, size, extension):
+    key = evidence.content_hash or f"evidence-{evidence.pk}"
+    return f"verification_evidence/thumbnails/{key[:2]}/{key}/{size}.{extension}"
+
+
+def _read(evidence):
+    if evidence.file.size > max_image_bytes():
+        raise ValueError(f"Photo is larger than {max_image_bytes()} bytes")
+    with evidence.file.open('rb') as photo:
+        return photo.read()
+
+
+def _captured_at(metadata):
+    if not metadata['captured_at']:
+        return None
+    try:
+        captured = datetime.fromisoformat(metadata['captured_at'] + (metadata['utc_offset'] or ''))
+    except ValueError:
+        return None
+    return captured if timezone.is_aware(captured) else timezone.make_aware(captured)
+
+
+def _apply(evidence, metadata, thumbnails):
+    storage = evidence.file.storage
+    names = {}
+    for size, encoded in thumbnails.items():
+        names[str(size)] = {}
+        for extension, data in encoded.items():
+            name = thumbnail_name(evidence, size, extension)
+            # Names follow the content hash, so duplicate photos share their thumbnails
+            if not storage.exists(name):
+                name = storage.save(name, ContentFile(data))
+            names[str(size)][extension] = name
+
+    evidence.thumbnails = names
+    evidence.captured_at = _captured_at(metadata)
+    if evidence.latitude is None and evidence.longitude is None and metadata['latitude'] is not None:
+        evidence.latitude, evidence.longitude = metadata['latitude'], metadata['longitude']
+    evidence.image_status = 'ready'
+    evidence.save(update_fields=['thumbnails', 'captured_at', 'latitude', 'longitude', 'image_status'])
+
+
+def _fail(evidence, error):
+    logger.warning("Image processing of evidence %s failed: %s", evidence.pk, error)
+    evidence.image_status = 'failed'
+    evidence.save(update_fields=['image_status'])
+
+
+def work(executor, batch_size):
+    """Process up to `batch_size` pending photos. Returns how many were taken."""
+    sizes = thumbnail_sizes()
+    with transaction.atomic():
+        batch = list(
+            VerificationEvidence.objects
+            .select_for_update(skip_locked=True)
+            .filter(image_status='pending')
+            .order_by('id')[:batch_size]
+        )
+        futures = {}
+        for evidence in batch:
+            try:
+                futures[executor.submit(render, _read(evidence), sizes)] = evidence
+            except (OSError, ValueError) as e:
+                _fail(evidence, e)
+
+        broken = []
+        for future in as_completed(futures):
+            evidence = futures[future]
+            try:
+                metadata, thumbnails = future.result()
+            except BrokenProcessPool:
+                broken.append(evidence)
+                continue
+            except Exception as e:
+                _fail(evidence, e)
+                continue
+            _apply(evidence, metadata, thumbnails)
+
+        # A worker died (decoder crash, out of memory) and took the rest of
+        # the batch with it; render those photos one at a time so only the
+        # culprit is marked failed instead of the batch coming back forever
+        for evidence in broken:
+            _render_alone(evidence, sizes)
+
+    if broken:
+        # Committed above; the caller still has to replace the pool
+        raise BrokenProcessPool(f"A worker process died; {len(broken)} photo(s) were retried one at a time")
+    return len(batch)
+
+
+def _render_alone(evidence, sizes):
+    with make_executor(1) as executor:
+        try:
+            metadata, thumbnails = executor.submit(render, _read(evidence), sizes).result()
+        except BrokenProcessPool:
+            _fail(evidence, "The worker process died while rendering this photo")
+        except Exception as e:
+            _fail(evidence, e)
+        else:
+            _apply(evidence, metadata, thumbnails)
@@ -0,0 +1,169 @@
+"""
+Storage for verification evidence files.
+
+The backend is the "evidence" entry of STORAGES. On top of the Django
+Storage API, an evidence backend stores an upload in parts, one per byte
+offset a chunk starts at, and later combines them into the final file,
+without holding more than one read buffer in memory:
+
+    write_part(upload_id, offset, stream)
+    read_part(upload_id, offset)         -> iterator of bytes
+    compose(upload_id, offsets, name)    -> combine the parts at `offsets`, in order, into `name`
+    delete_parts(upload_id, offsets)
+
+Final files are content-addressed (`content_name`), so identical evidence
+is stored once. FileSystemEvidenceStorage keeps everything under MEDIA_ROOT.
+S3EvidenceStorage talks to S3 or any S3-compatible service (MinIO, the
+`manage.py s3_stub` stand-in) and needs boto3.
+"""
+import os
+import shutil
+import tempfile
+
+from django.core.files.base import File
+from django.core.files.storage import FileSystemStorage, Storage, storages
+
+try:
+    import boto3
+    from botocore.config import Config
+    from botocore.exceptions import ClientError
+except ImportError:  # optional, only needed for S3 storage
+    boto3 = None
+
+READ_SIZE = 64 * 1024
+
+
+def evidence_storage():
+    """The "evidence" entry of STORAGES; VerificationEvidence.file and chunked uploads both use it."""
+    return storages['evidence']
+
+
+def content_name(content_hash, filename):
+    extension = os.path.splitext(filename or '')[1].lower()[:10]
+    return f"verification_evidence/sha256/{content_hash[:2]}/{content_hash}{extension}"
+
+
+def part_name(upload_id, offset):
+    return f"evidence_uploads/{upload_id}/{offset:015d}"
+
+
+class FileSystemEvidenceStorage(FileSystemStorage):
+    min_part_size = 0
+
+    def write_part(self, upload_id, offset, stream):
+        path = self.path(part_name(upload_id, offset))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Written aside and renamed, so an interrupted transfer never leaves a short part
+        with tempfile.NamedTemporaryFile(dir=os.path.dirname(path), delete=False) as temporary:
+            try:
+                shutil.copyfileobj(stream, temporary, READ_SIZE)
+            except BaseException:
+                os.unlink(temporary.name)
+                raise
+        os.replace(temporary.name, path)
+
+    def read_part(self, upload_id, offset):
+        with open(self.path(part_name(upload_id, offset)), 'rb') as part:
+            while chunk := part.read(READ_SIZE):
+                yield chunk
+
+    def compose(self, upload_id, offsets, name):
+        path = self.path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=os.path.dirname(path), delete=False) as temporary:
+            for offset in offsets:
+                with open(self.path(part_name(upload_id, offset)), 'rb') as part:
+                    shutil.copyfileobj(part, temporary, READ_SIZE)
+        os.replace(temporary.name, path)
+        return name
+
+    def delete_parts(self, upload_id, offsets):
+        shutil.rmtree(self.path(f"evidence_uploads/{upload_id}"), ignore_errors=True)
+
+
+class S3EvidenceStorage(Storage):
+    # S3 rejects multipart parts below 5 MiB, except the last one
+    min_part_size = 5 * 1024 * 1024
+
+    def __init__(self, bucket, endpoint_url=None, region_name=None, access_key=None, secret_key=None,
+                 url_expiry=3600):
+        if boto3 is None:
+            raise RuntimeError("S3 evidence storage needs boto3 installed")
+        self.bucket = bucket
+        self.url_expiry = url_expiry
+        self.client = boto3.client(
+            's3',
+            endpoint_url=endpoint_url,
+            region_name=region_name,
+            aws_access_key_id=access_key,
+            aws_secret_access_key=secret_key,
+            config=Config(
+                s3={'addressing_style': 'path'},
+                request_checksum_calculation='when_required',
+                response_checksum_validation='when_required',
+            ),
+        )
+
+    def _open(self, name, mode='rb'):
+        return File(self.client.get_object(Bucket=self.bucket, Key=name)['Body'], name)
+
+    def _save(self, name, content):
+        content.seek(0)
+        self.client.upload_fileobj(content, self.bucket, name)
+        return name
+
+    def exists(self, name):
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=name)
+        except ClientError as e:
+            if e.response['Error']['Code'] in ('404', 'NoSuchKey', 'NotFound'):
+                return False
+            raise
+        return True
+
+    def delete(self, name):
+        self.client.delete_object(Bucket=self.bucket, Key=name)
+
+    def size(self, name):
+        return self.client.head_object(Bucket=self.bucket, Key=name)['ContentLength']
+
+    def url(self, name):
+        return self.client.generate_presigned_url(
+            'get_object', Params={'Bucket': self.bucket, 'Key': name}, ExpiresIn=self.url_expiry
+        )
+
+    def write_part(self, upload_id, offset, stream):
+        self.client.upload_fileobj(stream, self.bucket, part_name(upload_id, offset))
+
+    def read_part(self, upload_id, offset):
+        body = self.client.get_object(Bucket=self.bucket, Key=part_name(upload_id, offset))['Body']
+        yield from body.iter_chunks(READ_SIZE)
+
+    def compose(self, upload_id, offsets, name):
+        """Server-side copy of the parts into one object; no data passes through this process."""
+        if len(offsets) == 1:
+            source = {'Bucket': self.bucket, 'Key': part_name(upload_id, offsets[0])}
+            self.client.copy_object(Bucket=self.bucket, Key=name, CopySource=source)
+            return name
+
+        multipart = self.client.create_multipart_upload(Bucket=self.bucket, Key=name)
+        try:
+            parts = []
+            for number, offset in enumerate(offsets, start=1):
+                copied = self.client.upload_part_copy(
+                    Bucket=self.bucket, Key=name, UploadId=multipart['UploadId'], PartNumber=number,
+                    CopySource={'Bucket': self.bucket, 'Key': part_name(upload_id, offset)}
+                )
+                parts.append({'PartNumber': number, 'ETag': copied['CopyPartResult']['ETag']})
+            self.client.complete_multipart_upload(
+                Bucket=self.bucket, Key=name, UploadId=multipart['UploadId'], MultipartUpload={'Parts': parts}
+            )
+        except Exception:
+            self.client.abort_multipart_upload(Bucket=self.bucket, Key=name, UploadId=multipart['UploadId'])
+            raise
+        return name
+
+    def delete_parts(self, upload_id, offsets):
+        keys = [{'Key': part_name(upload_id, offset)} for offset in offsets]
+        for start in range(0, len(keys), 1000):
+            self.client.delete_objects(Bucket=self.bucket, Delete={'Objects': keys[start:start + 1000]})
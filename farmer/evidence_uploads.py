@@ -0,0 +1,234 @@
+"""
+Chunked, resumable evidence uploads.
+
+A client creates an EvidenceUpload, then sends the file in order as raw
+request bodies, each tagged with the byte offset it starts at. Every chunk
+is streamed into the evidence storage as one part, keyed by that offset, and
+hashed (sha256) on the way through, so memory use does not depend on the
+file size. The part is written before the upload row is locked; the lock is
+held only to check the offset is still the next one and to record the part.
+After an interrupted chunk the client asks for `received` and continues from
+there.
+
+The running hash of an upload is kept in the process that received its
+last chunk. A chunk arriving at another process (or after a restart)
+re-reads the stored parts once to rebuild it. On completion, content that
+is already stored is not stored again: the new VerificationEvidence points
+at the existing file.
+"""
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from farmer.evidence_storage import content_name, evidence_storage
+from farmer.models import EvidenceUpload, VerificationEvidence
+
+logger = logging.getLogger(__name__)
+
+
+class UploadError(Exception):
+    pass
+
+
+class OffsetMismatch(UploadError):
+    def __init__(self, received):
+        super().__init__(f"Upload continues at offset {received}")
+        self.received = received
+
+
+def chunk_size():
+    return getattr(settings, 'EVIDENCE_UPLOAD_CHUNK_SIZE', 8 * 1024 * 1024)
+
+
+def max_size():
+    return getattr(settings, 'EVIDENCE_UPLOAD_MAX_SIZE', 10 * 1024 * 1024 * 1024)
+
+
+class HashStates:
+    """Running sha256 per upload, valid at a given offset. Bounded, least recently used dropped first."""
+
+    def __init__(self, limit=256):
+        self.limit = limit
+        self._lock = threading.Lock()
+        self._states = OrderedDict()
+
+    def get(self, upload_id, offset):
+        with self._lock:
+            state = self._states.get(upload_id)
+            if state is None or state[0] != offset:
+                return None
+            self._states.move_to_end(upload_id)
+            return state[1].copy()
+
+    def put(self, upload_id, offset, hasher):
+        with self._lock:
+            self._states[upload_id] = (offset, hasher)
+            self._states.move_to_end(upload_id)
+            while len(self._states) > self.limit:
+                self._states.popitem(last=False)
+
+    def discard(self, upload_id):
+        with self._lock:
+            self._states.pop(upload_id, None)
+
+
+hash_states = HashStates()
+
+
+class HashingReader:
+    """File-like view of the first `length` bytes of `stream` that feeds everything read into `hasher`."""
+
+    def __init__(self, stream, length, hasher):
+        self.stream = stream
+        self.remaining = length
+        self.hasher = hasher
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        size = self.remaining if size is None or size < 0 else min(size, self.remaining)
+        data = self.stream.read(size)
+        if not data:
+            raise UploadError("Upload interrupted before the announced chunk length")
+        self.remaining -= len(data)
+        self.hasher.update(data)
+        return data
+
+
+def _hasher(upload):
+    hasher = hash_states.get(upload.pk, upload.received)
+    if hasher is not None:
+        return hasher
+    hasher = hashlib.sha256()
+    storage = evidence_storage()
+    for offset in upload.part_offsets:
+        for data in storage.read_part(upload.pk, offset):
+            hasher.update(data)
+    logger.info("Rebuilt hash state of upload %s from %d stored parts", upload.pk, upload.parts)
+    return hasher
+
+
+def write_chunk(upload, offset, length, stream):
+    """
+    Store `length` bytes of `stream` as the part of `upload` starting at
+    `offset`, then record it. Must not run inside a transaction: the transfer
+    happens unlocked and only the bookkeeping locks the row. Returns the
+    updated upload; raises OffsetMismatch or UploadError.
+    """
+    if upload.status != 'uploading':
+        raise UploadError("Upload is already complete")
+    if offset != upload.received:
+        raise OffsetMismatch(upload.received)
+    if length <= 0 or length > chunk_size():
+        raise UploadError(f"Chunks must be between 1 and {chunk_size()} bytes")
+    total = upload.received + length
+    if total > upload.size:
+        raise UploadError(f"Upload would exceed its declared size of {upload.size} bytes")
+    storage = evidence_storage()
+    if total < upload.size and length < storage.min_part_size:
+        raise UploadError(f"All chunks but the last must be at least {storage.min_part_size} bytes")
+
+    hasher = _hasher(upload)
+    storage.write_part(upload.pk, offset, HashingReader(stream, length, hasher))
+
+    with transaction.atomic():
+        upload = EvidenceUpload.objects.select_for_update().get(pk=upload.pk)
+        if upload.status != 'uploading':
+            raise UploadError("Upload is already complete")
+        # A concurrent request stored this offset first. Its part has the same key, so it is left in place.
+        if upload.received != offset:
+            raise OffsetMismatch(upload.received)
+        upload.part_offsets.append(offset)
+        upload.parts += 1
+        upload.received = total
+        upload.save(update_fields=['part_offsets', 'parts', 'received', 'updated_at'])
+    hash_states.put(upload.pk, upload.received, hasher)
+    return upload
+
+
+def complete(upload, expected_hash=None):
+    """Turn a fully received `upload` (locked by the caller) into a VerificationEvidence."""
+    if upload.status != 'uploading':
+        raise UploadError("Upload is already complete")
+    if not upload.received:
+        raise UploadError("Nothing has been uploaded")
+    if upload.received != upload.size:
+        raise UploadError(f"{upload.received} of {upload.size} bytes received")
+
+    content_hash = _hasher(upload).hexdigest()
+    if expected_hash and expected_hash.lower() != content_hash:
+        raise UploadError(f"Content hash is {content_hash}, not {expected_hash}")
+
+    storage = evidence_storage()
+    existing = VerificationEvidence.objects.filter(content_hash=content_hash).values_list('file', flat=True).first()
+    name = existing or content_name(content_hash, upload.filename)
+    if existing or storage.exists(name):
+        logger.info("Upload %s duplicates stored evidence %s", upload.pk, name)
+    else:
+        storage.compose(upload.pk, upload.part_offsets, name)
+
+    evidence = VerificationEvidence.objects.create(
+        verification=upload.verification,
+        file=name,
+        file_type=upload.file_type,
+        description=upload.description,
+        latitude=upload.latitude,
+        longitude=upload.longitude,
+        content_hash=content_hash,
+    )
+    upload.status = 'complete'
+    upload.content_hash = content_hash
+    upload.evidence = evidence
+    upload.save(update_fields=['status', 'content_hash', 'evidence', 'updated_at'])
+
+    offsets = list(upload.part_offsets)
+    transaction.on_commit(lambda: discard_parts(upload.pk, offsets))
+    return evidence
+
+
+def discard_parts(upload_id, offsets):
+    hash_states.discard(upload_id)
+    evidence_storage().delete_parts(upload_id, offsets)
+
+
+def abort(upload):
+    discard_parts(upload.pk, upload.part_offsets)
+    upload.delete()
+
+
+def purge_expired(hours=None):
+    """Abort unfinished uploads untouched for `hours`. Returns how many were removed."""
+    hours = getattr(settings, 'EVIDENCE_UPLOAD_EXPIRY_HOURS', 24) if hours is None else hours
+    expired = EvidenceUpload.objects.filter(
+        status='uploading', updated_at__lt=timezone.now() - timedelta(hours=hours)
+    )
+    count = 0
+    for upload in expired.iterator():
+        abort(upload)
+        count += 1
+    return count
+
+
+def store_file(uploaded_file):
+    """
+    Store a file received in one request (multipart form) content-addressed
+    like completed uploads. Returns (name, content hash).
+    """
+    hasher = hashlib.sha256()
+    for data in uploaded_file.chunks():
+        hasher.update(data)
+    content_hash = hasher.hexdigest()
+
+    storage = evidence_storage()
+    existing = VerificationEvidence.objects.filter(content_hash=content_hash).values_list('file', flat=True).first()
+    name = existing or content_name(content_hash, uploaded_file.name)
+    if not existing and not storage.exists(name):
+        uploaded_file.seek(0)
+        name = storage.save(name, uploaded_file)
+    return name, content_hash
@@ -0,0 +1,213 @@
+"""
+Streaming exports of sensor readings and credit issuances.
+
+Rows are read through a server-side cursor (`QuerySet.iterator`) and
+encoded batch by batch, so memory use does not grow with the export. CSV
+and NDJSON always work; Parquet and Arrow need pyarrow.
+"""
+import csv
+import datetime
+import io
+import json
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import models
+
+from farmer.models import CarbonCreditIssuance, SensorData
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:  # optional, only needed for columnar exports
+    pyarrow = None
+
+FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+    'parquet': 'application/vnd.apache.parquet',
+    'arrow': 'application/vnd.apache.arrow.stream',
+}
+COLUMNAR_FORMATS = {'parquet', 'arrow'}
+
+
+class ExportUnavailable(Exception):
+    pass
+
+
+class Dataset:
+    def __init__(self, model, columns, date_field, filters):
+        self.model = model
+        self.columns = columns
+        self.date_field = date_field
+        # query parameter -> ORM lookup
+        self.filters = filters
+
+    def rows(self, queryset, chunk_size=None, **params):
+        """Yield value tuples for `queryset` narrowed by `params`, in date order."""
+        by_date = not isinstance(self.model._meta.get_field(self.date_field), models.DateTimeField)
+        lookups = {
+            self.filters[name]: value.date() if by_date and isinstance(value, datetime.datetime) else value
+            for name, value in params.items() if value is not None
+        }
+        chunk_size = chunk_size or export_chunk_size()
+        return (
+            queryset.filter(**lookups)
+            .order_by(self.date_field, 'id')
+            .values_list(*self.columns)
+            .iterator(chunk_size=chunk_size)
+        )
+
+    def arrow_schema(self):
+        return pyarrow.schema([
+            (column, _arrow_type(self.model._meta.get_field(column))) for column in self.columns
+        ])
+
+
+DATASETS = {
+    'sensor-data': Dataset(
+        SensorData,
+        ['id', 'project_id', 'sensor_type', 'value', 'unit', 'reading_date', 'source', 'device_id',
+         'is_verified', 'created_at'],
+        'reading_date',
+        {
+            'project': 'project_id',
+            'sensor_type': 'sensor_type',
+            'source': 'source',
+            'start': 'reading_date__gte',
+            'end': 'reading_date__lt',
+        }
+    ),
+    'issuances': Dataset(
+        CarbonCreditIssuance,
+        ['id', 'project_id', 'batch_number', 'issuance_date', 'amount', 'status', 'token_id', 'transaction_id',
+         'verification_body', 'verification_date', 'is_retired', 'retired_date', 'created_at'],
+        'issuance_date',
+        {
+            'project': 'project_id',
+            'status': 'status',
+            'start': 'issuance_date__gte',
+            'end': 'issuance_date__lt',
+        }
+    ),
+}
+
+
+def export_chunk_size():
+    return getattr(settings, 'EXPORT_CHUNK_SIZE', 5000)
+
+
+def _arrow_type(field):
+    if isinstance(field, (models.ForeignKey, models.IntegerField)):
+        return pyarrow.int64()
+    if isinstance(field, models.DecimalField):
+        return pyarrow.decimal128(field.max_digits, field.decimal_places)
+    if isinstance(field, models.DateTimeField):
+        return pyarrow.timestamp('us', tz='UTC')
+    if isinstance(field, models.DateField):
+        return pyarrow.date32()
+    if isinstance(field, models.BooleanField):
+        return pyarrow.bool_()
+    return pyarrow.string()
+
+
+def _batches(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _json_default(value):
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def stream_csv(dataset, rows, batch_size):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(dataset.columns)
+    for batch in _batches(rows, batch_size):
+        writer.writerows(batch)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def stream_ndjson(dataset, rows, batch_size):
+    for batch in _batches(rows, batch_size):
+        yield ''.join(
+            json.dumps(dict(zip(dataset.columns, row)), default=_json_default) + '\n' for row in batch
+        ).encode()
+
+
+class _Drain(io.RawIOBase):
+    """Write-only sink whose contents are handed out and dropped as they accumulate."""
+
+    def __init__(self):
+        self.parts = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def take(self):
+        data, self.parts = b''.join(self.parts), []
+        return data
+
+
+def stream_columnar(dataset, rows, batch_size, output):
+    schema = dataset.arrow_schema()
+    sink = _Drain()
+    if output == 'parquet':
+        writer = pyarrow.parquet.ParquetWriter(sink, schema, compression='zstd')
+        write = writer.write_table
+        make = pyarrow.Table.from_arrays
+    else:
+        writer = pyarrow.ipc.new_stream(sink, schema)
+        write = writer.write_batch
+        make = pyarrow.RecordBatch.from_arrays
+
+    for batch in _batches(rows, batch_size):
+        columns = list(zip(*batch))
+        write(make([pyarrow.array(column, type=schema.field(i).type) for i, column in enumerate(columns)],
+                   schema=schema))
+        data = sink.take()
+        if data:
+            yield data
+    writer.close()
+    yield sink.take()
+
+
+def stream_export(dataset, queryset, output, batch_size=None, **params):
+    """Return an iterator of encoded byte chunks for `dataset` in `output` format."""
+    if output not in FORMATS:
+        raise ExportUnavailable(f"Unknown export format \"{output}\"")
+    if output in COLUMNAR_FORMATS and pyarrow is None:
+        raise ExportUnavailable(f"{output} export needs pyarrow installed")
+
+    batch_size = batch_size or export_chunk_size()
+    rows = dataset.rows(queryset, chunk_size=batch_size, **params)
+    if output == 'csv':
+        return stream_csv(dataset, rows, batch_size)
+    if output == 'ndjson':
+        return stream_ndjson(dataset, rows, batch_size)
+    return stream_columnar(dataset, rows, batch_size, output)
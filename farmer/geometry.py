@@ -0,0 +1,97 @@
+"""
+Parcel polygons as PostGIS geometry.
+
+`LandParcel.gps_coordinates` holds the polygon as JSON text of
+[longitude, latitude] pairs, as clients have always sent it.
+`LandParcel.boundary` holds the same ring as a PolygonField (SRID 4326)
+with a GiST index, and spatial queries go through that.
+"""
+import json
+import math
+
+from django.contrib.gis.geos import GEOSException, Point, Polygon
+from django.contrib.gis.measure import D
+
+SRID = 4326
+# A degree of latitude at the equator: the shortest a degree gets in either direction
+MIN_METERS_PER_DEGREE = 110_574
+
+
+def parse_coordinates(text):
+    """Return the [[lon, lat], ...] list stored in `gps_coordinates`. Raises ValueError."""
+    coords = json.loads(text)
+    if not isinstance(coords, list) or len(coords) < 3:
+        raise ValueError("At least 3 coordinates required")
+    return [(float(point[0]), float(point[1])) for point in coords]
+
+
+def polygon_from_coordinates(coords):
+    """Build a closed SRID 4326 polygon from [lon, lat] pairs. Raises ValueError for invalid rings."""
+    ring = list(coords)
+    if ring[0] != ring[-1]:
+        ring.append(ring[0])
+    try:
+        polygon = Polygon(ring, srid=SRID)
+    except (GEOSException, TypeError) as e:
+        raise ValueError(f"Invalid polygon: {e}")
+    if not polygon.valid:
+        raise ValueError(f"Invalid polygon: {polygon.valid_reason}")
+    return polygon
+
+
+def polygon_from_text(text):
+    """Polygon for a `gps_coordinates` value, or None if it does not describe a valid one."""
+    try:
+        return polygon_from_coordinates(parse_coordinates(text))
+    except (ValueError, TypeError, IndexError):
+        return None
+
+
+def coordinates_from_polygon(polygon):
+    """Inverse of polygon_from_coordinates: the exterior ring without its closing point."""
+    return [list(point) for point in polygon.exterior_ring.coords[:-1]]
+
+
+def bbox_polygon(min_lon, min_lat, max_lon, max_lat):
+    if min_lon >= max_lon or min_lat >= max_lat:
+        raise ValueError("bbox must be min_lon,min_lat,max_lon,max_lat")
+    polygon = Polygon.from_bbox((min_lon, min_lat, max_lon, max_lat))
+    polygon.srid = SRID
+    return polygon
+
+
+def tile_bbox(zoom, x, y):
+    """Bounds of slippy-map (web mercator XYZ) tile z/x/y as (min_lon, min_lat, max_lon, max_lat)."""
+    tiles = 2 ** zoom
+    if not (0 <= x < tiles and 0 <= y < tiles):
+        raise ValueError("Tile is out of range for its zoom level")
+
+    def lat(row):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * row / tiles))))
+
+    return x / tiles * 360 - 180, lat(y + 1), (x + 1) / tiles * 360 - 180, lat(y)
+
+
+def radius_in_degrees(latitude, meters):
+    """
+    An upper bound of `meters` in degrees around `latitude`, for the
+    index-backed DWithin prefilter. Degrees of longitude shrink towards the
+    poles, so the bound uses their length at the circle's poleward edge.
+    """
+    reach = min(abs(latitude) + meters / MIN_METERS_PER_DEGREE, 90)
+    scale = math.cos(math.radians(reach))
+    return meters / (MIN_METERS_PER_DEGREE * scale) if scale > 0.01 else 360.0
+
+
+def within_bbox(queryset, polygon):
+    """Parcels whose boundary intersects `polygon` (answered from the GiST index, then refined)."""
+    return queryset.filter(boundary__intersects=polygon)
+
+
+def within_radius(queryset, longitude, latitude, meters):
+    """Parcels with any point within `meters` of (longitude, latitude)."""
+    point = Point(longitude, latitude, srid=SRID)
+    return queryset.filter(
+        boundary__dwithin=(point, radius_in_degrees(latitude, meters)),
+        boundary__distance_lte=(point, D(m=meters), 'spheroid')
+    )
@@ -0,0 +1,176 @@
+import logging
+import os
+import threading
+import time
+from decimal import Decimal
+
+import grpc
+from hiero_sdk_python import Client, Network, AccountId, PrivateKey, CryptoGetAccountBalanceQuery, \
+    AccountCreateTransaction, ResponseCode
+
+logger = logging.getLogger(__name__)
+
+
+class HederaClientUnavailable(Exception):
+    pass
+
+
+class PooledClient:
+    """A warm Hiero client plus the parsed operator credentials it was built with."""
+
+    def __init__(self, network, operator_id, operator_key):
+        self.network = network
+        self.operator_id = operator_id
+        self.operator_key = operator_key
+        self.client = Client(network=Network(network))
+        self.client.set_operator(operator_id, operator_key)
+        self.created_at = time.monotonic()
+        self.last_checked = self.created_at
+        self.healthy = True
+
+    def close(self):
+        try:
+            self.client.close()
+        except Exception:
+            logger.debug("Error closing Hedera client for %s", self.network, exc_info=True)
+
+
+class HederaClientPool:
+    """
+    Process-wide registry of Hiero clients keyed by network name.
+
+    Clients keep their gRPC channel open between requests, so callers should
+    borrow them through `run()` (or `get()`) instead of constructing their own.
+    A failing call marks the client unhealthy; the next borrower gets a freshly
+    connected one.
+    """
+
+    def __init__(self, health_check_interval=60):
+        self.health_check_interval = health_check_interval
+        self._clients = {}
+        self._keys = {}
+        self._lock = threading.RLock()
+
+    def operator_credentials(self):
+        operator_id = os.getenv('HEDERA_OPERATOR_ID')
+        operator_key = os.getenv('HEDERA_OPERATOR_PK')
+        if not operator_id or not operator_key:
+            raise HederaClientUnavailable("HEDERA_OPERATOR_ID and HEDERA_OPERATOR_PK must be set.")
+        return AccountId.from_string(operator_id), self.parse_key(operator_key)
+
+    def parse_key(self, key_string):
+        key = self._keys.get(key_string)
+        if key is None:
+            with self._lock:
+                key = self._keys.get(key_string)
+                if key is None:
+                    key = PrivateKey.from_string(key_string)
+                    self._keys[key_string] = key
+        return key
+
+    def get(self, network=None):
+        network = network or os.getenv('HEDERA_NETWORK', 'testnet')
+        pooled = self._clients.get(network)
+        if pooled is not None and pooled.healthy:
+            return pooled
+
+        with self._lock:
+            pooled = self._clients.get(network)
+            if pooled is None or not pooled.healthy:
+                if pooled is not None:
+                    pooled.close()
+                operator_id, operator_key = self.operator_credentials()
+                pooled = PooledClient(network, operator_id, operator_key)
+                self._clients[network] = pooled
+                logger.info("Connected Hedera client for %s", network)
+        return pooled
+
+    def run(self, operation, network=None, retries=1):
+        """
+        Call `operation(pooled_client)`, reconnecting and retrying when the
+        call fails with a transport-level error. Pass `retries=0` for
+        transactions that must not be submitted twice.
+        """
+        attempt = 0
+        while True:
+            pooled = self.get(network)
+            try:
+                return operation(pooled)
+            except Exception as e:
+                if not self._is_transport_error(e):
+                    raise
+                logger.warning("Hedera call failed on %s, reconnecting: %s", pooled.network, e)
+                self.invalidate(pooled)
+                if attempt >= retries:
+                    raise
+                attempt += 1
+
+    def invalidate(self, pooled):
+        with self._lock:
+            pooled.healthy = False
+            if self._clients.get(pooled.network) is pooled:
+                del self._clients[pooled.network]
+        pooled.close()
+
+    def check(self, network=None, force=False):
+        """Ping the network with a free balance query on the operator account."""
+        pooled = self.get(network)
+        if not force and time.monotonic() - pooled.last_checked < self.health_check_interval:
+            return pooled.healthy
+        try:
+            CryptoGetAccountBalanceQuery().set_account_id(pooled.operator_id).execute(pooled.client)
+        except Exception:
+            logger.exception("Hedera health check failed for %s", pooled.network)
+            self.invalidate(pooled)
+            return False
+        pooled.last_checked = time.monotonic()
+        return True
+
+    def status(self):
+        now = time.monotonic()
+        return {
+            network: {
+                'healthy': pooled.healthy,
+                'age_seconds': round(now - pooled.created_at, 1),
+                'last_checked_seconds_ago': round(now - pooled.last_checked, 1),
+            }
+            for network, pooled in list(self._clients.items())
+        }
+
+    def close_all(self):
+        with self._lock:
+            clients, self._clients = self._clients, {}
+        for pooled in clients.values():
+            pooled.close()
+
+    @staticmethod
+    def _is_transport_error(error):
+        return isinstance(error, (grpc.RpcError, ConnectionError, TimeoutError))
+
+
+hedera_clients = HederaClientPool()
+
+
+def get_account_balance(account_id, network=None):
+    """Return the hbar balance of `account_id` as a Decimal."""
+    query = CryptoGetAccountBalanceQuery().set_account_id(AccountId.from_string(account_id))
+    balance = hedera_clients.run(lambda pooled: query.execute(pooled.client), network=network)
+    return Decimal(str(balance.hbars).replace(" ℏ", ""))
+
+
+def create_hedera_account(private_key=None):
+    """
+    Create an account funded with 1 HBAR, keyed to `private_key` (a fresh
+    ed25519 key by default). Returns (account_id, private_key).
+    """
+    private_key = private_key or PrivateKey.generate("ed25519")
+
+    # Create the Hedera account with 1 HBAR (100_000_000 tinybars)
+    tx = AccountCreateTransaction().set_key(private_key.public_key()).set_initial_balance(100_000_000)
+
+    receipt = hedera_clients.run(lambda pooled: tx.execute(client=pooled.client), retries=0)
+    if receipt.status != ResponseCode.SUCCESS:
+        status_message = ResponseCode.get_name(receipt.status)
+        raise Exception(f"Transaction failed with status: {status_message}")
+
+    return str(receipt.accountId), private_key
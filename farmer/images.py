@@ -0,0 +1,78 @@
+"""
+Photo processing for verification evidence: thumbnails and EXIF metadata.
+
+Nothing here touches Django, so `render` can run in a worker process of a
+ProcessPoolExecutor (see farmer.evidence_images). It takes the original
+file's bytes and returns plain data: capture time and GPS position from
+EXIF, plus encoded WebP and JPEG thumbnails.
+"""
+import io
+
+from PIL import ExifTags, Image, ImageOps
+
+FORMATS = {
+    'webp': {'format': 'WEBP', 'quality': 80, 'method': 4},
+    'jpeg': {'format': 'JPEG', 'quality': 82, 'optimize': True, 'progressive': True},
+}
+
+DATETIME_ORIGINAL = 0x9003
+OFFSET_TIME_ORIGINAL = 0x9011
+DATETIME = 0x0132
+
+
+def _degrees(value, ref):
+    degrees, minutes, seconds = (float(part) for part in value)
+    result = degrees + minutes / 60 + seconds / 3600
+    return -result if ref in ('S', 'W') else result
+
+
+def exif_metadata(image):
+    """{'latitude', 'longitude', 'captured_at', 'utc_offset'} from EXIF, each None when missing or unreadable."""
+    metadata = {'latitude': None, 'longitude': None, 'captured_at': None, 'utc_offset': None}
+    exif = image.getexif()
+    if not exif:
+        return metadata
+
+    gps = exif.get_ifd(ExifTags.IFD.GPSInfo)
+    try:
+        latitude = _degrees(gps[ExifTags.GPS.GPSLatitude], gps.get(ExifTags.GPS.GPSLatitudeRef, 'N'))
+        longitude = _degrees(gps[ExifTags.GPS.GPSLongitude], gps.get(ExifTags.GPS.GPSLongitudeRef, 'E'))
+        if -90 <= latitude <= 90 and -180 <= longitude <= 180:
+            metadata['latitude'], metadata['longitude'] = round(latitude, 6), round(longitude, 6)
+    except (KeyError, TypeError, ValueError, ZeroDivisionError):
+        pass
+
+    details = exif.get_ifd(ExifTags.IFD.Exif)
+    captured = details.get(DATETIME_ORIGINAL) or exif.get(DATETIME)
+    if isinstance(captured, str) and captured.strip():
+        # EXIF writes "YYYY:MM:DD HH:MM:SS"
+        metadata['captured_at'] = captured.strip().replace(':', '-', 2).replace(' ', 'T', 1)
+        metadata['utc_offset'] = details.get(OFFSET_TIME_ORIGINAL)
+    return metadata
+
+
+def render(data, sizes):
+    """
+    Returns (metadata, thumbnails) for the image in `data`, where
+    thumbnails is {size: {format: bytes}} with the longest edge at most
+    `size` pixels (never upscaled).
+    """
+    with Image.open(io.BytesIO(data)) as image:
+        metadata = exif_metadata(image)
+        # Let the JPEG decoder scale down while decoding; much cheaper than resizing a full frame
+        image.draft('RGB', (max(sizes), max(sizes)))
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'transparency' in image.info or image.mode in ('LA', 'PA') else 'RGB')
+
+        thumbnails = {}
+        for size in sorted(sizes, reverse=True):
+            # Each size is scaled from the previous (larger) one
+            image.thumbnail((size, size), Image.Resampling.LANCZOS)
+            thumbnails[size] = {}
+            for name, options in FORMATS.items():
+                frame = image.convert('RGB') if name == 'jpeg' and image.mode != 'RGB' else image
+                buffer = io.BytesIO()
+                frame.save(buffer, **options)
+                thumbnails[size][name] = buffer.getvalue()
+    return metadata, thumbnails
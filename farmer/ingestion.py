@@ -0,0 +1,273 @@
+import csv
+import datetime
+import io
+import json
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from farmer.models import CarbonCreditProject, Device, SensorData
+from farmer.partitions import detached_months, is_partitioned, month_start, write_partitioned
+from farmer.rollups import RollupTracker
+
+SENSOR_TYPES = {choice for choice, _ in SensorData._meta.get_field('sensor_type').choices}
+SOURCES = {choice for choice, _ in SensorData._meta.get_field('source').choices}
+MAX_VALUE = Decimal('99999999.99')  # value is DecimalField(max_digits=10, decimal_places=2)
+COPY_COLUMNS = [
+    'project_id', 'sensor_type', 'value', 'unit', 'reading_date', 'source', 'device_id', 'is_verified', 'created_at'
+]
+
+
+def _text(value):
+    """A JSON string or number as stripped text; None for anything else (lists, objects, booleans, null)."""
+    if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+        return None
+    return str(value).strip()
+
+
+def decode_lines(byte_lines):
+    """
+    Yield (line_number, text, parse_error), decoding each line on its own so
+    that invalid UTF-8 rejects only the line it is on.
+    """
+    for line_number, line in enumerate(byte_lines, start=1):
+        try:
+            yield line_number, line.decode('utf-8'), None
+        except UnicodeDecodeError as e:
+            yield line_number, None, {'non_field_errors': [f"Invalid UTF-8: {e.reason} at byte {e.start}"]}
+
+
+def iter_ndjson(lines):
+    for line_number, line, decode_error in lines:
+        if decode_error:
+            yield line_number, None, decode_error
+            continue
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_number, None, {'non_field_errors': [f"Invalid JSON: {e.msg}"]}
+            continue
+        if not isinstance(row, dict):
+            yield line_number, None, {'non_field_errors': ["Each line must be a JSON object"]}
+            continue
+        yield line_number, row, None
+
+
+def iter_csv(lines):
+    # One reading per line; the header is line 1, so the first reading is line 2
+    header = None
+    for line_number, line, decode_error in lines:
+        if decode_error:
+            yield line_number, None, decode_error
+            if header is None:
+                return
+            continue
+        fields = next(csv.reader([line]), [])
+        if header is None:
+            header = fields
+        elif fields:
+            yield line_number, dict(zip(header, fields)), None
+
+
+def iter_rows(byte_lines, content_type):
+    """
+    Yield (line_number, row_dict, parse_error) for every reading in a stream
+    of byte lines, without reading the whole body into memory.
+    """
+    lines = decode_lines(byte_lines)
+    if content_type.startswith('text/csv'):
+        return iter_csv(lines)
+    return iter_ndjson(lines)
+
+
+class SensorBatchIngestor:
+    """
+    Validates readings in a single streaming pass and writes them in chunks,
+    with PostgreSQL COPY where available and bulk_create elsewhere.
+
+    Rows are keyed by `device_id`; the device must be registered to the
+    owner of the target project. The project comes from the row's `project`
+    key or from `default_project`.
+    """
+
+    def __init__(self, user, default_project=None, chunk_size=None, use_copy=None, max_errors=1000):
+        self.user = user
+        self.default_project = default_project
+        self.chunk_size = chunk_size or getattr(settings, 'SENSOR_INGEST_CHUNK_SIZE', 5000)
+        if use_copy is None:
+            use_copy = getattr(settings, 'SENSOR_INGEST_USE_COPY', True)
+        self.use_copy = use_copy and connection.vendor == 'postgresql'
+        self.max_errors = max_errors
+        self.accepted = 0
+        self.rejected = 0
+        self.errors = []
+        self._devices = {}
+        self._projects = {}
+        self._detached = None
+        self._rollups = RollupTracker()
+
+    def _device_farmer(self, device_id):
+        if device_id not in self._devices:
+            device = Device.objects.filter(device_id=device_id, is_active=True).values('farmer_id').first()
+            self._devices[device_id] = device['farmer_id'] if device else None
+        return self._devices[device_id]
+
+    def _detached_months(self):
+        if self._detached is None:
+            self._detached = detached_months() if is_partitioned() else set()
+        return self._detached
+
+    def _project_farmer(self, project_id):
+        if project_id not in self._projects:
+            self._projects[project_id] = (
+                CarbonCreditProject.objects.filter(pk=project_id).values_list('farmer_id', flat=True).first()
+            )
+        return self._projects[project_id]
+
+    def validate(self, row):
+        """Return (cleaned_values, errors) for one raw row."""
+        errors = {}
+        device_id = _text(row.get('device_id'))
+        if not device_id or len(device_id) > 100:
+            errors['device_id'] = ["A device id of at most 100 characters is required."]
+
+        sensor_type = _text(row.get('sensor_type'))
+        if sensor_type not in SENSOR_TYPES:
+            errors['sensor_type'] = [f'"{row.get("sensor_type")}" is not a valid choice.']
+
+        source = _text(row.get('source')) if row.get('source') not in (None, '') else 'iot_device'
+        if source not in SOURCES:
+            errors['source'] = [f'"{row.get("source")}" is not a valid choice.']
+
+        unit = _text(row.get('unit'))
+        if not unit or len(unit) > 20:
+            errors['unit'] = ["A unit of at most 20 characters is required."]
+
+        try:
+            value = Decimal(str(row.get('value'))).quantize(Decimal('0.01'))
+            if abs(value) > MAX_VALUE:
+                raise InvalidOperation
+        except (InvalidOperation, ValueError):
+            errors['value'] = ["A number with at most 8 integer digits is required."]
+            value = None
+
+        try:
+            reading_date = parse_datetime(_text(row.get('reading_date')) or '')
+        except ValueError:  # well formed but out of range, e.g. month 13
+            reading_date = None
+        if reading_date is None:
+            errors['reading_date'] = ["A valid ISO 8601 datetime is required."]
+        else:
+            if timezone.is_naive(reading_date):
+                reading_date = timezone.make_aware(reading_date, datetime.timezone.utc)
+            if month_start(reading_date.astimezone(datetime.timezone.utc)) in self._detached_months():
+                errors['reading_date'] = ["Readings for this month are archived and can no longer be written."]
+
+        project_id = row.get('project') or self.default_project
+        try:
+            if isinstance(project_id, bool):
+                raise TypeError
+            project_id = int(project_id)
+            if not 0 < project_id < 2 ** 63:
+                raise ValueError
+        except (TypeError, ValueError, OverflowError):
+            errors['project'] = ["A project id is required."]
+            project_id = None
+
+        if errors:
+            return None, errors
+
+        device_farmer = self._device_farmer(device_id)
+        project_farmer = self._project_farmer(project_id)
+        if device_farmer is None:
+            errors['device_id'] = [f'Unknown or inactive device "{device_id}".']
+        elif project_farmer != device_farmer:
+            errors['project'] = ["Project does not belong to the device owner."]
+        elif not self.user.is_staff and device_farmer != self.user.id:
+            errors['device_id'] = ["You do not own this device."]
+        if errors:
+            return None, errors
+
+        return (project_id, sensor_type, value, unit, reading_date, source, device_id), None
+
+    def _reject(self, line_number, errors):
+        self.rejected += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({'line': line_number, 'errors': errors})
+
+    def _write(self, chunk):
+        for project_id, sensor_type, _, _, reading_date, _, _ in chunk:
+            self._rollups.add(project_id, sensor_type, reading_date)
+        write_partitioned((values[4] for values in chunk), lambda: self._insert(chunk))
+        self.accepted += len(chunk)
+
+    def _insert(self, chunk):
+        if self.use_copy:
+            self._copy(chunk)
+        else:
+            SensorData.objects.bulk_create(
+                [
+                    SensorData(
+                        project_id=project_id, sensor_type=sensor_type, value=value, unit=unit,
+                        reading_date=reading_date, source=source, device_id=device_id
+                    )
+                    for project_id, sensor_type, value, unit, reading_date, source, device_id in chunk
+                ],
+                batch_size=self.chunk_size
+            )
+
+    def _copy(self, chunk):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        created_at = timezone.now().isoformat()
+        for project_id, sensor_type, value, unit, reading_date, source, device_id in chunk:
+            writer.writerow([
+                project_id, sensor_type, value, unit, reading_date.isoformat(), source, device_id, 'f', created_at
+            ])
+        buffer.seek(0)
+        with connection.cursor() as cursor:
+            cursor.copy_expert(
+                f'COPY {connection.ops.quote_name(SensorData._meta.db_table)} '
+                f'({", ".join(COPY_COLUMNS)}) FROM STDIN WITH (FORMAT csv)',
+                buffer
+            )
+
+    def ingest(self, rows):
+        """
+        Consume (line_number, row, parse_error) tuples as produced by iter_rows.
+
+        Each chunk is written in its own transaction, after any partitions it
+        needs have been created in theirs, so a long upload never holds the
+        partition locks or keeps one transaction open for the whole stream.
+        """
+        chunk = []
+        for line_number, row, parse_error in rows:
+            if parse_error:
+                self._reject(line_number, parse_error)
+                continue
+            values, errors = self.validate(row)
+            if errors:
+                self._reject(line_number, errors)
+                continue
+            chunk.append(values)
+            if len(chunk) >= self.chunk_size:
+                self._write(chunk)
+                chunk = []
+        if chunk:
+            self._write(chunk)
+        self._rollups.flush()
+        return self.report()
+
+    def report(self):
+        return {
+            'accepted': self.accepted,
+            'rejected': self.rejected,
+            'errors': self.errors,
+            'errors_truncated': self.rejected > len(self.errors),
+        }
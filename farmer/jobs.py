@@ -0,0 +1,216 @@
+import json
+import logging
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from farmer.models import LandParcel, LandToken, LandTokenCollection, TokenizationJob
+from farmer.tokenization import get_tokenization_service
+
+logger = logging.getLogger(__name__)
+
+IN_PROGRESS = ('creating_token', 'minting')
+
+
+def enqueue_tokenization(land_parcel, requested_by=None):
+    return TokenizationJob.objects.create(land_parcel=land_parcel, requested_by=requested_by)
+
+
+def collection_for(land_parcel):
+    """The default collection for a parcel: one token per country and region."""
+    collection, _ = LandTokenCollection.objects.get_or_create(
+        name=f"LAND-{land_parcel.country}-{land_parcel.region}"[:100],
+        defaults={'country': land_parcel.country, 'region': land_parcel.region}
+    )
+    return collection
+
+
+def enqueue_batch_tokenization(land_parcels, collection=None, requested_by=None):
+    """
+    Queue one job minting `land_parcels` into `collection`, by default their
+    region's collection. Raises ValueError for parcels from several regions
+    without an explicit collection.
+    """
+    land_parcels = list(land_parcels)
+    if collection is None and len({(parcel.country, parcel.region) for parcel in land_parcels}) > 1:
+        raise ValueError("Land parcels from different regions need an explicit collection")
+    with transaction.atomic():
+        job = TokenizationJob.objects.create(
+            collection=collection or collection_for(land_parcels[0]),
+            requested_by=requested_by
+        )
+        job.parcels.set(land_parcels)
+    return job
+
+
+def claim_next_job():
+    """
+    Atomically take the oldest queued job. SKIP LOCKED lets any number of
+    workers poll the same table without handing out a job twice.
+    """
+    with transaction.atomic():
+        job = (
+            TokenizationJob.objects
+            .select_for_update(skip_locked=True)
+            .filter(status='queued')
+            .order_by('created_at')
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = 'creating_token'
+        job.started_at = timezone.now()
+        job.attempts += 1
+        job.save(update_fields=['status', 'started_at', 'attempts', 'updated_at'])
+    return job
+
+
+def _set_status(job, status):
+    job.status = status
+    job.save(update_fields=['status', 'updated_at'])
+
+
+def _fail(job, error):
+    job.status = 'failed'
+    job.error = str(error)
+    job.completed_at = timezone.now()
+    job.save(update_fields=['status', 'error', 'completed_at', 'updated_at'])
+    return job
+
+
+def ensure_collection_token(collection, service):
+    """Create the collection's token on first use, serialising concurrent workers on the row lock."""
+    if collection.token_id:
+        return collection.token_id
+    with transaction.atomic():
+        collection = LandTokenCollection.objects.select_for_update().get(pk=collection.pk)
+        if not collection.token_id:
+            collection.token_id = str(service.create_token(collection.name, non_fungible=True))
+            collection.save(update_fields=['token_id'])
+    return collection.token_id
+
+
+def recover_minted(parcel_ids):
+    """
+    Write the tokens of parcels that an earlier batch attempt minted but did
+    not record (e.g. the bulk insert failed), from the serials journaled on
+    its job, so they are not minted again. Returns the recovered tokens.
+    """
+    parcel_ids = set(LandParcel.objects.filter(pk__in=parcel_ids, landtoken__isnull=True).values_list('id', flat=True))
+    if not parcel_ids:
+        return []
+    tokens = {}
+    jobs = TokenizationJob.objects.filter(parcels__in=parcel_ids).exclude(minted=[]).distinct().order_by('id')
+    for job in jobs:
+        for entry in job.minted:
+            if entry['land_parcel'] in parcel_ids and entry['land_parcel'] not in tokens:
+                tokens[entry['land_parcel']] = LandToken(
+                    land_parcel_id=entry['land_parcel'],
+                    collection_id=job.collection_id,
+                    token_id=entry['token_id'],
+                    serial_number=entry['serial_number'],
+                    token_metadata=json.dumps(entry['metadata']),
+                    mint_transaction_id=entry['transaction_id']
+                )
+    if not tokens:
+        return []
+    logger.warning("Recording %s token(s) minted by an earlier tokenization attempt", len(tokens))
+    return LandToken.objects.bulk_create(tokens.values())
+
+
+def run_batch_job(job, service):
+    try:
+        recover_minted(job.parcels.values_list('id', flat=True))
+        # Parcels tokenized by an earlier (partially failed) attempt are skipped
+        parcels = job.parcels.filter(landtoken__isnull=True).order_by('id')
+        token_id = ensure_collection_token(job.collection, service)
+        _set_status(job, 'minting')
+        for results in service.tokenize_batch(parcels, token_id):
+            # Journal the chunk's serials before writing its tokens: if that
+            # fails, the next attempt records them instead of minting again
+            job.minted = job.minted + [
+                {
+                    'land_parcel': result['land_parcel'].id,
+                    'token_id': result['token_id'],
+                    'serial_number': result['serial_number'],
+                    'transaction_id': result['transaction_id'],
+                    'metadata': result['metadata'],
+                }
+                for result in results
+            ]
+            job.save(update_fields=['minted', 'updated_at'])
+            LandToken.objects.bulk_create([
+                LandToken(
+                    land_parcel=result['land_parcel'],
+                    collection=job.collection,
+                    token_id=result['token_id'],
+                    serial_number=result['serial_number'],
+                    token_metadata=json.dumps(result['metadata']),
+                    mint_transaction_id=result['transaction_id']
+                )
+                for result in results
+            ])
+    except Exception as e:
+        logger.exception("Batch tokenization job %s failed", job.id)
+        return _fail(job, e)
+
+    job.status = 'done'
+    job.error = None
+    job.completed_at = timezone.now()
+    job.save(update_fields=['status', 'error', 'completed_at', 'updated_at'])
+    return job
+
+
+def run_job(job, service=None):
+    service = service or get_tokenization_service()
+    if job.land_parcel_id is None:
+        return run_batch_job(job, service)
+
+    parcel = job.land_parcel
+    try:
+        result = service.tokenize_land(parcel, on_progress=lambda stage: _set_status(job, stage))
+    except Exception as e:
+        logger.exception("Tokenization job %s failed", job.id)
+        return _fail(job, e)
+
+    with transaction.atomic():
+        job.land_token = LandToken.objects.create(
+            land_parcel=parcel,
+            token_id=result['token_id'],
+            serial_number=result['serial_number'],
+            token_metadata=json.dumps(result['metadata']),
+            mint_transaction_id=result['transaction_id']
+        )
+        job.status = 'done'
+        job.error = None
+        job.completed_at = timezone.now()
+        job.save(update_fields=['land_token', 'status', 'error', 'completed_at', 'updated_at'])
+    return job
+
+
+def fail_abandoned_jobs(timeout=timedelta(minutes=10)):
+    """
+    Mark jobs whose worker died mid-flight as failed. They are not re-queued
+    because the token may already exist on the network.
+    """
+    cutoff = timezone.now() - timeout
+    return TokenizationJob.objects.filter(status__in=IN_PROGRESS, updated_at__lt=cutoff).update(
+        status='failed',
+        error='Worker stopped before the job completed.',
+        completed_at=timezone.now(),
+        updated_at=timezone.now(),
+    )
+
+
+def work(limit=None, service=None):
+    """Process queued jobs until the queue is empty or `limit` jobs ran."""
+    service = service or get_tokenization_service()
+    processed = 0
+    while limit is None or processed < limit:
+        job = claim_next_job()
+        if job is None:
+            break
+        run_job(job, service)
+        processed += 1
+    return processed
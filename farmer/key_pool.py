@@ -0,0 +1,173 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Count, F, Q
+from django.utils import timezone
+from hiero_sdk_python import PrivateKey
+
+from farmer.hedera import create_hedera_account
+from farmer.models import WalletKey
+from farmer.utils import get_crypto
+
+logger = logging.getLogger(__name__)
+
+
+def low_water_mark():
+    return getattr(settings, 'WALLET_KEY_POOL_LOW_WATER', 50)
+
+
+def target_depth():
+    return max(getattr(settings, 'WALLET_KEY_POOL_TARGET', 200), low_water_mark())
+
+
+def precreate_accounts():
+    return getattr(settings, 'WALLET_KEY_POOL_PRECREATE_ACCOUNTS', False)
+
+
+class PoolCounters:
+    """Per-process claim counters, reported next to the pool depth."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.claims = 0
+        self.claims_with_account = 0
+        self.misses = 0
+        self.generated = 0
+
+    def incr(self, name, amount=1):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + amount)
+
+    def as_dict(self):
+        return {
+            'claims': self.claims,
+            'claims_with_account': self.claims_with_account,
+            'misses': self.misses,
+            'generated': self.generated,
+        }
+
+
+counters = PoolCounters()
+
+
+def generate_key(create_account=False):
+    """Build one unsaved pool entry, creating its Hedera account when asked to."""
+    private_key = PrivateKey.generate("ed25519")
+    account_id = None
+    if create_account:
+        account_id, private_key = create_hedera_account(private_key)
+
+    return get_crypto().seal(
+        WalletKey(account_id=account_id), private_key.to_string(), private_key.public_key().to_string()
+    )
+
+
+def refill(target=None, create_accounts=None, max_workers=None):
+    """
+    Top the pool up to `target` available entries. Account creation is
+    network-bound, so entries are generated on a thread pool, and each is
+    saved as soon as it is built so a crash keeps the funded accounts made
+    so far. Returns the number of entries added.
+    """
+    target = target or target_depth()
+    create_accounts = precreate_accounts() if create_accounts is None else create_accounts
+    missing = target - WalletKey.objects.filter(status='available').count()
+    if missing <= 0:
+        return 0
+
+    def build(_):
+        try:
+            entry = generate_key(create_accounts)
+            entry.save()
+        except Exception:
+            logger.warning("Generating a pooled wallet key failed", exc_info=True)
+            return False
+        finally:
+            close_old_connections()
+        counters.incr('generated')
+        return True
+
+    max_workers = max_workers or getattr(settings, 'HEDERA_PROVISION_WORKERS', 8)
+    with ThreadPoolExecutor(max_workers=min(max_workers, missing)) as executor:
+        return sum(executor.map(build, range(missing)))
+
+
+def claim():
+    """
+    Take one available entry, preferring those with a pre-created account.
+    SKIP LOCKED lets concurrent registrations claim different rows without
+    waiting on each other. Returns None when the pool is empty.
+
+    The returned entry carries the encrypted keys; the stored row keeps
+    only the claim, so the key material lives in the wallet alone.
+    """
+    with transaction.atomic():
+        entry = (
+            WalletKey.objects
+            .select_for_update(skip_locked=True)
+            .filter(status='available')
+            .order_by(F('account_id').asc(nulls_last=True), 'created_at')
+            .first()
+        )
+        if entry is not None:
+            entry.status = 'claimed'
+            entry.claimed_at = timezone.now()
+            WalletKey.objects.filter(pk=entry.pk).update(
+                status='claimed', claimed_at=entry.claimed_at, public_key='', private_key='', data_key=''
+            )
+
+    if entry is None:
+        counters.incr('misses')
+    else:
+        counters.incr('claims')
+        if entry.account_id:
+            counters.incr('claims_with_account')
+    transaction.on_commit(pool_refiller.request)
+    return entry
+
+
+def depth():
+    stats = WalletKey.objects.filter(status='available').aggregate(
+        available=Count('id'),
+        with_account=Count('id', filter=Q(account_id__isnull=False)),
+    )
+    return {
+        **stats,
+        'low_water_mark': low_water_mark(),
+        'target': target_depth(),
+        'below_low_water': stats['available'] < low_water_mark(),
+        **counters.as_dict(),
+    }
+
+
+class PoolRefiller:
+    """Refills the pool on a background thread once it drops below the low-water mark."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._running = False
+
+    def request(self):
+        with self._lock:
+            if self._running:
+                return
+            self._running = True
+        threading.Thread(target=self._run, name='wallet-key-pool', daemon=True).start()
+
+    def _run(self):
+        try:
+            close_old_connections()
+            if WalletKey.objects.filter(status='available').count() < low_water_mark():
+                refill()
+        except Exception:
+            logger.exception("Wallet key pool refill failed")
+        finally:
+            with self._lock:
+                self._running = False
+            close_old_connections()
+
+
+pool_refiller = PoolRefiller()
@@ -1,15 +1,19 @@
 import json
 import logging
-import os
 
-import requests
 from datetime import datetime
 from django.conf import settings
 from shapely.geometry import Polygon as ShapelyPolygon
-from pyproj import Geod
 from requests.exceptions import RequestException
 from json.decoder import JSONDecodeError
 
+from farmer import satellite_cache
+from farmer.areas import GEOD, parcel_areas
+from farmer.models import VerificationRequest
+from farmer.overlaps import check_parcel, overlaps_of
+from farmer.sentinel import sentinel
+from farmer.serializers import ParcelOverlapSerializer
+
 logger = logging.getLogger(__name__)
 
 def geodesic_area(coords):
@@ -17,60 +21,107 @@ def geodesic_area(coords):
     Calculates the geodesic area of a polygon defined by latitude/longitude coordinates.
     Returns area in hectares.
     """
-    geod = Geod(ellps="WGS84")
     polygon = ShapelyPolygon(coords)
-    area, _ = geod.geometry_area_perimeter(polygon)
+    area, _ = GEOD.geometry_area_perimeter(polygon)
     return abs(area) / 10_000  # Convert square meters to hectares
 
 
 def get_api_key():
-    response = requests.post(
-        "https://services.sentinel-hub.com/oauth/token",
-        data={
-            "grant_type": "client_credentials",
-            "client_id": f"{os.getenv('SENTINEL_CLIENT')}",
-            "client_secret": f"{os.getenv('SENTINEL_SECRET')}"
+    """Current Sentinel Hub access token, fetched only when the cached one is about to expire."""
+    return sentinel.tokens.get()
+
+
+ANALYSIS_PATH = "/api/v1/analysis/land"
+
+
+def satellite_resolution():
+    return getattr(settings, 'SATELLITE_RESOLUTION', 10)  # meters per pixel
+
+
+def analysis_payload(coords, resolution, date_from=None, date_to=None):
+    payload = {
+        "geometry": {
+            "type": "Polygon",
+            "coordinates": [coords]
+        },
+        "resolution": resolution
+    }
+    if date_from or date_to:
+        payload["timeRange"] = {
+            "from": date_from.isoformat() if date_from else None,
+            "to": date_to.isoformat() if date_to else None
         }
-    )
+    return payload
+
+
+def analysis_result(data):
+    return {
+        "valid": True,
+        "calculated_area": data.get('area'),
+        "match_percentage": data.get('match')
+    }
+
+
+def record_verification(parcel, user, method, verification_result):
+    """
+    Apply a verification result: a parcel that substantially overlaps another
+    one is not verified, a valid parcel is marked verified, and the attempt is
+    logged as a VerificationRequest. Returns (verification request, result).
+    """
+    if verification_result.get('valid'):
+        check_parcel(parcel)
+        # The stored rows carry reviewer decisions; dismissed overlaps do not block
+        flagged = list(overlaps_of(parcel).filter(flagged=True).exclude(status='dismissed'))
+        if flagged:
+            verification_result = {
+                **verification_result,
+                'valid': False,
+                'error': 'Parcel overlaps other registered parcels',
+                'overlaps': ParcelOverlapSerializer(flagged, many=True).data
+            }
 
-    access_token = response.json()["access_token"]
-    return access_token
+    if verification_result.get('valid'):
+        parcel.verification_status = 'verified'
+        parcel.verification_method = method
+        parcel.verified_by = user
+        parcel.save()
+
+    verification_request = VerificationRequest.objects.create(
+        land_parcel=parcel,
+        requested_by=user,
+        verification_method=method,
+        status='completed' if verification_result.get('valid') else 'failed',
+        notes=json.dumps(verification_result)
+    )
+    return verification_request, verification_result
 
 
 class LandVerificationService:
     @staticmethod
-    def verify_with_satellite(land_parcel):
-        """Verify land using satellite imagery (Sentinel Hub)"""
+    def verify_with_satellite(land_parcel, date_from=None, date_to=None, force_refresh=False, timeout=15):
+        """
+        Verify land using satellite imagery (Sentinel Hub). Analyses of the
+        same polygon, resolution and imagery window are served from the
+        result cache unless `force_refresh` is set.
+        """
         try:
             coords = json.loads(land_parcel.gps_coordinates)
+            resolution = satellite_resolution()
 
-            geometry = {
-                "type": "Polygon",
-                "coordinates": [coords]
-            }
+            def fetch():
+                response = sentinel.post(
+                    ANALYSIS_PATH, json=analysis_payload(coords, resolution, date_from, date_to), timeout=timeout
+                )
+                if response.status_code == 200:
+                    return analysis_result(response.json()), True
 
-            token = get_api_key()
+                logger.warning(f"Satellite verification failed: {response.status_code} - {response.text}")
+                return {"valid": False, "error": f"Satellite verification failed: {response.status_code}"}, False
 
-            response = requests.post(
-                "https://services.sentinel-hub.com/api/v1/analysis/land",
-                headers={"Authorization": f"Bearer {token}"},
-                json={
-                    "geometry": geometry,
-                    "resolution": 10  # meters per pixel
-                },
-                timeout=15
+            result, cached = satellite_cache.cached_result(
+                coords, resolution, fetch, date_from, date_to, force_refresh=force_refresh
             )
-
-            if response.status_code == 200:
-                data = response.json()
-                return {
-                    "valid": True,
-                    "calculated_area": data.get('area'),
-                    "match_percentage": data.get('match')
-                }
-
-            logger.warning(f"Satellite verification failed: {response.status_code} - {response.text}")
-            return {"valid": False, "error": f"Satellite verification failed: {response.status_code}"}
+            return {**result, "cached": cached}
 
         except (RequestException, JSONDecodeError) as e:
             logger.exception("Satellite verification request failed.")
@@ -110,6 +161,28 @@ class LandVerificationService:
             logger.exception("Unexpected error during GPS verification.")
             return {"error": str(e)}
 
+    @staticmethod
+    def verify_batch_with_gps(land_parcels):
+        """
+        GPS verification of many parcels at once (re-verification campaigns).
+        Areas come from the batch engine; returns {parcel_id: result} in the
+        shape of verify_with_gps, plus whether the declared area is within 10%.
+        """
+        declared = dict(land_parcels.values_list('id', 'total_area'))
+        ids, areas, perimeters = parcel_areas(land_parcels)
+        results = {
+            parcel_id: {"error": "Parcel has no valid boundary"} for parcel_id in declared
+        }
+        for parcel_id, area, perimeter in zip(ids.tolist(), areas.tolist(), perimeters.tolist()):
+            total_area = float(declared[parcel_id])
+            results[parcel_id] = {
+                "valid": True,
+                "calculated_area": area,
+                "perimeter": perimeter,
+                "within_tolerance": abs(area - total_area) <= total_area * 0.1
+            }
+        return results
+
     @staticmethod
     def verify_with_survey(land_parcel, survey_report):
         """
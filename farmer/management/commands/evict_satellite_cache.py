@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from farmer import satellite_cache
+
+
+class Command(BaseCommand):
+    help = "Drop expired satellite results and the least recently used beyond SATELLITE_CACHE_MAX_ENTRIES."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--max-entries', type=int, default=None,
+                            help="Entries to keep (default SATELLITE_CACHE_MAX_ENTRIES).")
+
+    def handle(self, *args, **options):
+        expired, trimmed = satellite_cache.evict(options['max_entries'])
+        self.stdout.write(f"Evicted {expired} expired and {trimmed} least recently used results.")
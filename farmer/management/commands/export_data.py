@@ -0,0 +1,49 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_datetime
+
+from farmer.exports import DATASETS, FORMATS, ExportUnavailable, stream_export
+
+
+class Command(BaseCommand):
+    help = "Stream sensor readings or credit issuances to a CSV, NDJSON, Parquet or Arrow file."
+
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', choices=sorted(DATASETS))
+        parser.add_argument('--output', choices=sorted(FORMATS), default='csv')
+        parser.add_argument('--file', default='-', help="Destination path, '-' for stdout.")
+        parser.add_argument('--project', type=int, default=None)
+        parser.add_argument('--start', default=None, help="ISO 8601 date or datetime, inclusive.")
+        parser.add_argument('--end', default=None, help="ISO 8601 date or datetime, exclusive.")
+        parser.add_argument('--sensor-type', default=None)
+        parser.add_argument('--status', default=None)
+        parser.add_argument('--batch-size', type=int, default=None)
+
+    def handle(self, *args, **options):
+        dataset = DATASETS[options['dataset']]
+        params = {}
+        for name in ('project', 'start', 'end', 'sensor_type', 'status'):
+            if options[name] is not None and name in dataset.filters:
+                params[name] = options[name]
+        for name in ('start', 'end'):
+            if name in params:
+                value = parse_datetime(params[name]) or parse_datetime(f"{params[name]}T00:00:00+00:00")
+                if value is None:
+                    raise CommandError(f"--{name} is not an ISO 8601 date or datetime")
+                params[name] = value
+
+        try:
+            chunks = stream_export(
+                dataset, dataset.model.objects.all(), options['output'], options['batch_size'], **params
+            )
+        except ExportUnavailable as e:
+            raise CommandError(str(e))
+
+        destination = sys.stdout.buffer if options['file'] == '-' else open(options['file'], 'wb')
+        try:
+            for chunk in chunks:
+                destination.write(chunk)
+        finally:
+            if destination is not sys.stdout.buffer:
+                destination.close()
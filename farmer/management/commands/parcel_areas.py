@@ -0,0 +1,51 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+
+from farmer.areas import geometry_areas_perimeters, parcel_geometries
+from farmer.land_verification import geodesic_area
+from farmer.models import LandParcel
+
+
+class Command(BaseCommand):
+    help = "Compute geodesic areas of many parcels in one batch, optionally benchmarked against the per-parcel path."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--country', default=None)
+        parser.add_argument('--region', default=None)
+        parser.add_argument('--benchmark', action='store_true')
+        parser.add_argument('--verbose-rows', action='store_true', help="Print one line per parcel.")
+
+    def handle(self, *args, **options):
+        parcels = LandParcel.objects.all()
+        if options['country']:
+            parcels = parcels.filter(country=options['country'])
+        if options['region']:
+            parcels = parcels.filter(region=options['region'])
+
+        started = time.perf_counter()
+        ids, geometries = parcel_geometries(parcels)
+        loaded = time.perf_counter()
+        areas, perimeters = geometry_areas_perimeters(geometries)
+        computed = time.perf_counter()
+
+        if options['verbose_rows']:
+            for parcel_id, area, perimeter in zip(ids.tolist(), areas.tolist(), perimeters.tolist()):
+                self.stdout.write(f"{parcel_id}\t{area / 10_000:.4f} ha\t{perimeter:.1f} m")
+        self.stdout.write(
+            f"{len(ids)} parcels, {areas.sum() / 10_000:.2f} ha total: "
+            f"load {loaded - started:.3f}s, compute {computed - loaded:.3f}s"
+        )
+
+        if options['benchmark']:
+            texts = parcels.filter(pk__in=ids.tolist()).values_list('gps_coordinates', flat=True)
+            coordinates = [json.loads(text) for text in texts]
+            started = time.perf_counter()
+            for coords in coordinates:
+                geodesic_area(coords)
+            single = time.perf_counter() - started
+            self.stdout.write(
+                f"Per-parcel path: {single:.3f}s for {len(coordinates)} parcels "
+                f"({single / max(computed - loaded, 1e-9):.1f}x the batch compute time)"
+            )
@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from farmer.provisioning import provision_pending, release_abandoned
+
+
+class Command(BaseCommand):
+    help = "Create Hedera accounts for wallets still pending after registration."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None)
+        parser.add_argument('--workers', type=int, default=None, help="Concurrent account-create transactions.")
+        parser.add_argument('--loop', action='store_true')
+        parser.add_argument('--sleep', type=float, default=5)
+
+    def handle(self, *args, **options):
+        while True:
+            close_old_connections()
+            release_abandoned()
+            activated = provision_pending(options['batch_size'], options['workers'])
+            if activated:
+                self.stdout.write(f"Provisioned {activated} wallet(s).")
+            if not options['loop']:
+                break
+            if not activated:
+                time.sleep(options['sleep'])
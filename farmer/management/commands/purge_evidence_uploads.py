@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from farmer.evidence_uploads import purge_expired
+
+
+class Command(BaseCommand):
+    help = "Remove unfinished chunked evidence uploads (and their stored parts) untouched for a while."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=float, default=None,
+                            help="Age in hours (default EVIDENCE_UPLOAD_EXPIRY_HOURS).")
+
+    def handle(self, *args, **options):
+        removed = purge_expired(options['hours'])
+        self.stdout.write(f"Removed {removed} unfinished upload(s).")
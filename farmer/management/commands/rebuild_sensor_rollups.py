@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from farmer.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = "Recompute hourly, daily and weekly SensorData rollups from raw readings."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--project', type=int, default=None)
+
+    def handle(self, *args, **options):
+        spans = rebuild_rollups(options['project'])
+        self.stdout.write(f"Rebuilt rollups for {spans} project/sensor series.")
@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from farmer import key_pool
+
+
+class Command(BaseCommand):
+    help = "Top up the pool of pre-generated wallet keys (and optionally pre-created Hedera accounts)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--target', type=int, default=None)
+        parser.add_argument('--create-accounts', action='store_true', default=None,
+                            help="Also create a funded Hedera account for every new entry.")
+        parser.add_argument('--loop', action='store_true')
+        parser.add_argument('--sleep', type=float, default=30)
+
+    def handle(self, *args, **options):
+        while True:
+            close_old_connections()
+            added = key_pool.refill(options['target'], options['create_accounts'])
+            stats = key_pool.depth()
+            self.stdout.write(
+                f"Added {added} key(s); {stats['available']} available, {stats['with_account']} with accounts."
+            )
+            if not options['loop']:
+                break
+            time.sleep(options['sleep'])
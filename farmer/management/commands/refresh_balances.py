@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from farmer.balances import refresh_stale_balances
+
+
+class Command(BaseCommand):
+    help = "Refresh cached Hedera account balances that are older than HEDERA_BALANCE_STALE_SECONDS."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None)
+        parser.add_argument('--loop', action='store_true', help="Keep running, refreshing a batch every --interval seconds.")
+        parser.add_argument('--interval', type=float, default=30)
+
+    def handle(self, *args, **options):
+        while True:
+            updated = refresh_stale_balances(options['batch_size'])
+            self.stdout.write(f"Refreshed {updated} balance(s).")
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from farmer.models import HederaAccount, WalletKey
+from farmer.utils import get_crypto
+
+ENCRYPTED_FIELDS = ['data_key', 'key_version', 'private_key', 'public_key']
+
+
+class Command(BaseCommand):
+    help = (
+        "Move encrypted wallet keys to the master key ENCRYPTION_KEY_VERSION: re-wrap their data keys "
+        "(and give pre-envelope records one). Runs in small batches and skips rows locked by other "
+        "writers, so it can run while the service is up; run again until nothing is left."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def rotate(self, model, batch_size):
+        crypto = get_crypto()
+        pending = model.objects.exclude(key_version=crypto.version).exclude(private_key='')
+        rotated = last_id = 0
+        while True:
+            with transaction.atomic():
+                batch = list(
+                    pending.select_for_update(skip_locked=True).filter(pk__gt=last_id).order_by('pk')[:batch_size]
+                )
+                if not batch:
+                    break
+                changed = [record for record in batch if crypto.rewrap(record)]
+                model.objects.bulk_update(changed, ENCRYPTED_FIELDS)
+            rotated += len(changed)
+            last_id = batch[-1].pk
+        return rotated, pending.count()
+
+    def handle(self, *args, **options):
+        for model in (HederaAccount, WalletKey):
+            rotated, remaining = self.rotate(model, options['batch_size'])
+            self.stdout.write(
+                f"{model.__name__}: {rotated} record(s) moved to key version {get_crypto().version}, "
+                f"{remaining} left."
+            )
@@ -0,0 +1,39 @@
+import time
+from concurrent.futures.process import BrokenProcessPool
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from farmer.evidence_images import image_workers, make_executor, work
+
+
+class Command(BaseCommand):
+    help = "Generate thumbnails and read EXIF metadata for pending photo evidence, in a process pool."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Drain the queue once and exit.")
+        parser.add_argument('--sleep', type=float, default=2, help="Seconds to wait when the queue is empty.")
+        parser.add_argument('--workers', type=int, default=None,
+                            help="Worker processes (default EVIDENCE_IMAGE_WORKERS or the CPU count).")
+
+    def handle(self, *args, **options):
+        workers = options['workers'] or image_workers()
+        executor = make_executor(workers)
+        try:
+            while True:
+                close_old_connections()
+                try:
+                    processed = work(executor, batch_size=workers * 2)
+                except BrokenProcessPool:
+                    self.stderr.write("Image worker pool broke; restarting it.")
+                    executor.shutdown(cancel_futures=True)
+                    executor = make_executor(workers)
+                    continue
+                if processed:
+                    self.stdout.write(f"Processed {processed} photo(s).")
+                if not processed:
+                    if options['once']:
+                        break
+                    time.sleep(options['sleep'])
+        finally:
+            executor.shutdown()
@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from farmer.jobs import fail_abandoned_jobs, work
+
+
+class Command(BaseCommand):
+    help = "Process queued land tokenization jobs. Run as many workers as needed."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Drain the queue once and exit.")
+        parser.add_argument('--sleep', type=float, default=2, help="Seconds to wait when the queue is empty.")
+
+    def handle(self, *args, **options):
+        while True:
+            close_old_connections()
+            fail_abandoned_jobs()
+            processed = work()
+            if processed:
+                self.stdout.write(f"Processed {processed} tokenization job(s).")
+            if options['once']:
+                break
+            if not processed:
+                time.sleep(options['sleep'])
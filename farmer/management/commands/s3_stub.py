@@ -0,0 +1,205 @@
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+import threading
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+from xml.sax.saxutils import escape
+
+from django.core.management.base import BaseCommand
+
+READ_SIZE = 64 * 1024
+
+
+class ObjectStore:
+    """Objects as files under `root`/<bucket>/<key>; multipart parts under `root`/.multipart/<upload id>/."""
+
+    def __init__(self, root):
+        self.root = root
+        self.lock = threading.Lock()
+
+    def path(self, bucket, key):
+        path = os.path.normpath(os.path.join(self.root, bucket, key))
+        if not path.startswith(os.path.join(self.root, bucket) + os.sep):
+            raise ValueError("Invalid key")
+        return path
+
+    def parts_dir(self, upload_id):
+        if not re.fullmatch(r'[0-9a-f]{32}', upload_id):
+            raise ValueError("Invalid upload id")
+        return os.path.join(self.root, '.multipart', upload_id)
+
+    def write(self, path, chunks):
+        """Write chunks to `path` atomically; returns the quoted md5 ETag."""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        digest = hashlib.md5()
+        with tempfile.NamedTemporaryFile(dir=os.path.dirname(path), delete=False) as temporary:
+            for chunk in chunks:
+                digest.update(chunk)
+                temporary.write(chunk)
+        os.replace(temporary.name, path)
+        return f'"{digest.hexdigest()}"'
+
+    @staticmethod
+    def read(path):
+        with open(path, 'rb') as source:
+            while chunk := source.read(READ_SIZE):
+                yield chunk
+
+
+def make_handler(store, stdout):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def _send(self, status, body=b'', headers=None):
+            self.send_response(status)
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            if self.command != 'HEAD':
+                self.wfile.write(body)
+
+        def _xml(self, status, body):
+            self._send(status, f'<?xml version="1.0" encoding="UTF-8"?>{body}'.encode(),
+                       {'Content-Type': 'application/xml'})
+
+        def _error(self, status, code):
+            self._xml(status, f'<Error><Code>{code}</Code></Error>')
+
+        def _body(self):
+            remaining = int(self.headers.get('Content-Length') or 0)
+            while remaining > 0:
+                chunk = self.rfile.read(min(READ_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+
+        def _target(self):
+            url = urlsplit(self.path)
+            bucket, _, key = url.path.lstrip('/').partition('/')
+            return unquote(bucket), unquote(key), {name: values[0] for name, values in
+                                                    parse_qs(url.query, keep_blank_values=True).items()}
+
+        def _copy_source(self):
+            bucket, _, key = unquote(self.headers['x-amz-copy-source'].split('?')[0]).lstrip('/').partition('/')
+            return store.path(bucket, key)
+
+        def do_HEAD(self):
+            self.do_GET()
+
+        def do_GET(self):
+            bucket, key, query = self._target()
+            path = store.path(bucket, key)
+            if not os.path.isfile(path):
+                return self._error(404, 'NoSuchKey')
+            self.send_response(200)
+            self.send_header('Content-Length', str(os.path.getsize(path)))
+            self.send_header('Content-Type', 'application/octet-stream')
+            self.send_header('ETag', '"stub"')
+            self.end_headers()
+            if self.command == 'GET':
+                for chunk in store.read(path):
+                    self.wfile.write(chunk)
+
+        def do_PUT(self):
+            bucket, key, query = self._target()
+            if not key:
+                os.makedirs(os.path.join(store.root, bucket), exist_ok=True)
+                return self._send(200)
+
+            if 'uploadId' in query:
+                path = os.path.join(store.parts_dir(query['uploadId']), f"{int(query['partNumber']):05d}")
+                if 'x-amz-copy-source' in self.headers:
+                    etag = store.write(path, store.read(self._copy_source()))
+                    return self._xml(200, f'<CopyPartResult><ETag>{escape(etag)}</ETag></CopyPartResult>')
+                etag = store.write(path, self._body())
+                return self._send(200, headers={'ETag': etag})
+
+            if 'x-amz-copy-source' in self.headers:
+                etag = store.write(store.path(bucket, key), store.read(self._copy_source()))
+                return self._xml(200, f'<CopyObjectResult><ETag>{escape(etag)}</ETag></CopyObjectResult>')
+            etag = store.write(store.path(bucket, key), self._body())
+            self._send(200, headers={'ETag': etag})
+
+        def do_POST(self):
+            bucket, key, query = self._target()
+            if 'delete' in query:
+                body = b''.join(self._body()).decode()
+                for name in re.findall(r'<Key>(.*?)</Key>', body):
+                    path = store.path(bucket, name.replace('&amp;', '&').replace('&lt;', '<').replace('&gt;', '>'))
+                    if os.path.isfile(path):
+                        os.unlink(path)
+                return self._xml(200, '<DeleteResult></DeleteResult>')
+
+            if 'uploads' in query:
+                upload_id = uuid.uuid4().hex
+                os.makedirs(store.parts_dir(upload_id))
+                return self._xml(200, (
+                    f'<InitiateMultipartUploadResult><Bucket>{escape(bucket)}</Bucket><Key>{escape(key)}</Key>'
+                    f'<UploadId>{upload_id}</UploadId></InitiateMultipartUploadResult>'
+                ))
+
+            if 'uploadId' in query:
+                parts_dir = store.parts_dir(query['uploadId'])
+                numbers = [int(number) for number in re.findall(
+                    r'<PartNumber>(\d+)</PartNumber>', b''.join(self._body()).decode()
+                )]
+
+                def chunks():
+                    for number in numbers:
+                        yield from store.read(os.path.join(parts_dir, f"{number:05d}"))
+
+                etag = store.write(store.path(bucket, key), chunks())
+                shutil.rmtree(parts_dir, ignore_errors=True)
+                return self._xml(200, (
+                    f'<CompleteMultipartUploadResult><Bucket>{escape(bucket)}</Bucket><Key>{escape(key)}</Key>'
+                    f'<ETag>{escape(etag)}</ETag></CompleteMultipartUploadResult>'
+                ))
+            self._error(400, 'InvalidRequest')
+
+        def do_DELETE(self):
+            bucket, key, query = self._target()
+            if 'uploadId' in query:
+                shutil.rmtree(store.parts_dir(query['uploadId']), ignore_errors=True)
+            else:
+                path = store.path(bucket, key)
+                if os.path.isfile(path):
+                    os.unlink(path)
+            self._send(204)
+
+        def log_message(self, format, *args):
+            stdout.write(f"{self.address_string()} {format % args}")
+
+    return Handler
+
+
+class Command(BaseCommand):
+    help = (
+        "Run a local stand-in for the subset of the S3 API used by S3EvidenceStorage "
+        "(objects, copies, multipart uploads), keeping objects under --root."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=9000)
+        parser.add_argument('--root', default=None, help="Directory for objects (default: a temporary one).")
+        parser.add_argument('--bucket', action='append', default=[], help="Bucket to create at start.")
+
+    def handle(self, *args, **options):
+        root = os.path.abspath(options['root'] or tempfile.mkdtemp(prefix='s3stub-'))
+        for bucket in options['bucket']:
+            os.makedirs(os.path.join(root, bucket), exist_ok=True)
+        store = ObjectStore(root)
+        server = ThreadingHTTPServer((options['host'], options['port']), make_handler(store, self.stdout))
+        self.stdout.write(f"S3 stub listening on http://{options['host']}:{server.server_port}, objects in {root}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
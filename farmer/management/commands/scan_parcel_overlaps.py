@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from farmer.models import LandParcel
+from farmer.overlaps import scan
+
+
+class Command(BaseCommand):
+    help = "Re-check all parcels (optionally of one country/region) for overlapping claims."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--country', default=None)
+        parser.add_argument('--region', default=None)
+        parser.add_argument('--threshold', type=float, default=None,
+                            help="Share of either parcel to flag at (default PARCEL_OVERLAP_THRESHOLD).")
+
+    def handle(self, *args, **options):
+        parcels = LandParcel.objects.all()
+        if options['country']:
+            parcels = parcels.filter(country=options['country'])
+        if options['region']:
+            parcels = parcels.filter(region=options['region'])
+
+        scanned, found, flagged = scan(parcels, options['threshold'])
+        self.stdout.write(f"Scanned {scanned} parcels: {found} overlaps, {flagged} flagged.")
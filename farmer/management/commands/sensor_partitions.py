@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from farmer import partitions
+
+
+class Command(BaseCommand):
+    help = "Create upcoming monthly SensorData partitions and detach old ones (PostgreSQL only)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ahead', type=int, default=3, help="Months to create beyond the current one.")
+        parser.add_argument('--retain-months', type=int, default=None,
+                            help="Detach partitions that ended more than this many months ago.")
+        parser.add_argument('--tablespace', default=None,
+                            help="Move detached partitions to this (cold storage) tablespace.")
+        parser.add_argument('--list', action='store_true')
+
+    def handle(self, *args, **options):
+        if not partitions.is_partitioned():
+            raise CommandError("SensorData is not partitioned on this database.")
+
+        for name in partitions.ensure_partitions(options['ahead']):
+            self.stdout.write(f"Created {name}")
+
+        if options['retain_months'] is not None:
+            for name in partitions.retire_partitions(options['retain_months'], options['tablespace']):
+                self.stdout.write(f"Detached {name}")
+
+        if options['list']:
+            for name, lower, upper in partitions.list_partitions():
+                self.stdout.write(f"{name}: {lower} .. {upper}")
@@ -0,0 +1,99 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.management.base import BaseCommand
+
+from farmer.land_verification import geodesic_area
+
+
+class StubState:
+    def __init__(self, expires_in, fail_every, latency):
+        self.expires_in = expires_in
+        self.fail_every = fail_every
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.tokens = 0
+        self.requests = 0
+        self.current = None
+
+
+def make_handler(state, stdout):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def _send(self, status, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _body(self):
+            return self.rfile.read(int(self.headers.get('Content-Length') or 0))
+
+        def do_GET(self):
+            if self.path == '/stats':
+                return self._send(200, {'tokens_issued': state.tokens, 'analysis_requests': state.requests})
+            self._send(404, {'error': 'not found'})
+
+        def do_POST(self):
+            body = self._body()
+            if self.path == '/oauth/token':
+                with state.lock:
+                    state.tokens += 1
+                    state.current = f"stub-token-{state.tokens}"
+                return self._send(200, {
+                    'access_token': state.current, 'token_type': 'Bearer', 'expires_in': state.expires_in
+                })
+
+            if self.path == '/api/v1/analysis/land':
+                if self.headers.get('Authorization') != f"Bearer {state.current}":
+                    return self._send(401, {'error': 'invalid token'})
+                with state.lock:
+                    state.requests += 1
+                    count = state.requests
+                time.sleep(state.latency)
+                if state.fail_every and count % state.fail_every == 0:
+                    return self._send(503, {'error': 'try again'})
+                try:
+                    coords = json.loads(body)['geometry']['coordinates'][0]
+                    area = geodesic_area(coords)
+                except (ValueError, KeyError, IndexError, TypeError):
+                    return self._send(400, {'error': 'invalid geometry'})
+                return self._send(200, {'area': round(area, 4), 'match': 100.0})
+
+            self._send(404, {'error': 'not found'})
+
+        def log_message(self, format, *args):
+            stdout.write(f"{self.address_string()} {format % args}")
+
+    return Handler
+
+
+class Command(BaseCommand):
+    help = (
+        "Run a local stand-in for the Sentinel Hub token and land analysis endpoints. "
+        "Set SENTINEL_BASE_URL to its address to use it."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--expires-in', type=int, default=3600, help="Lifetime of issued tokens (seconds).")
+        parser.add_argument('--fail-every', type=int, default=0,
+                            help="Answer every Nth analysis request with 503 to exercise retries.")
+        parser.add_argument('--latency', type=float, default=0, help="Seconds each analysis request takes.")
+
+    def handle(self, *args, **options):
+        state = StubState(options['expires_in'], options['fail_every'], options['latency'])
+        server = ThreadingHTTPServer((options['host'], options['port']), make_handler(state, self.stdout))
+        self.stdout.write(f"Sentinel stub listening on http://{options['host']}:{server.server_port}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -0,0 +1,65 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from farmer.batch_verification import verify_parcels
+from farmer.models import LandParcel
+from farmer.verification_providers import ProviderUnavailable
+
+
+class Command(BaseCommand):
+    help = "Satellite-verify parcels (optionally of one country/region) with concurrent Sentinel Hub requests."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', required=True, help="Username recorded as requesting the verifications.")
+        parser.add_argument('--country', default=None)
+        parser.add_argument('--region', default=None)
+        parser.add_argument('--status', default='unverified',
+                            help="Only parcels with this verification_status, or 'all'.")
+        parser.add_argument('--limit', type=int, default=None)
+        parser.add_argument('--date-from', default=None, help="Start of the imagery window (YYYY-MM-DD).")
+        parser.add_argument('--date-to', default=None, help="End of the imagery window (YYYY-MM-DD).")
+        parser.add_argument('--force-refresh', action='store_true', help="Ignore cached satellite results.")
+        parser.add_argument('--concurrency', type=int, default=None,
+                            help="Requests in flight (default SATELLITE_BATCH_CONCURRENCY).")
+
+    def handle(self, *args, **options):
+        try:
+            user = get_user_model().objects.get(username=options['user'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"No user \"{options['user']}\"")
+        window = {}
+        for name in ('date_from', 'date_to'):
+            if options[name]:
+                window[name] = parse_date(options[name])
+                if window[name] is None:
+                    raise CommandError(f"--{name.replace('_', '-')} is not a YYYY-MM-DD date")
+
+        parcels = LandParcel.objects.order_by('id')
+        if options['status'] != 'all':
+            parcels = parcels.filter(verification_status=options['status'])
+        if options['country']:
+            parcels = parcels.filter(country=options['country'])
+        if options['region']:
+            parcels = parcels.filter(region=options['region'])
+        if options['limit']:
+            parcels = parcels[:options['limit']]
+
+        started = time.perf_counter()
+        completed = failed = 0
+        try:
+            for parcel, verification_request, result in verify_parcels(
+                parcels, user, force_refresh=options['force_refresh'], concurrency=options['concurrency'], **window
+            ):
+                if verification_request.status == 'completed':
+                    completed += 1
+                else:
+                    failed += 1
+                    self.stdout.write(f"Parcel {parcel.pk}: {result.get('error')}")
+        except ProviderUnavailable as e:
+            raise CommandError(str(e))
+        self.stdout.write(
+            f"Verified {completed} parcels, {failed} failed, in {time.perf_counter() - started:.1f}s."
+        )
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.2 on 2026-10-17 19:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('farmer', '0004_tokenizationjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LandTokenCollection',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('country', models.CharField(blank=True, max_length=100)),
+                ('region', models.CharField(blank=True, max_length=100)),
+                ('token_id', models.CharField(blank=True, max_length=50)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='tokenizationjob',
+            name='parcels',
+            field=models.ManyToManyField(blank=True, related_name='batch_tokenization_jobs', to='farmer.landparcel'),
+        ),
+        migrations.AlterField(
+            model_name='tokenizationjob',
+            name='land_parcel',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='tokenization_jobs', to='farmer.landparcel'),
+        ),
+        migrations.AddField(
+            model_name='landtoken',
+            name='collection',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='tokens', to='farmer.landtokencollection'),
+        ),
+        migrations.AddField(
+            model_name='tokenizationjob',
+            name='collection',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='farmer.landtokencollection'),
+        ),
+    ]
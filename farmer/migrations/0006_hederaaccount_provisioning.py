@@ -0,0 +1,64 @@
+# Generated by Django 5.2.2 on 2026-10-17 19:37
+
+from django.db import migrations, models
+
+
+def mark_existing_accounts_active(apps, schema_editor):
+    # Accounts created before provisioning moved to the background already exist on the network
+    HederaAccount = apps.get_model('farmer', 'HederaAccount')
+    HederaAccount.objects.exclude(account_id='').update(status='active')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('farmer', '0005_landtokencollection'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='hederaaccount',
+            name='last_error',
+            field=models.TextField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='hederaaccount',
+            name='next_attempt_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='hederaaccount',
+            name='provision_attempts',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='hederaaccount',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('provisioning', 'Provisioning'), ('active', 'Active'), ('failed', 'Failed')], default='pending', max_length=20),
+        ),
+        migrations.RunPython(mark_existing_accounts_active, migrations.RunPython.noop),
+        migrations.AddField(
+            model_name='hederaaccount',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AlterField(
+            model_name='hederaaccount',
+            name='account_id',
+            field=models.CharField(blank=True, max_length=50, null=True),
+        ),
+        migrations.AlterField(
+            model_name='hederaaccount',
+            name='private_key',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AlterField(
+            model_name='hederaaccount',
+            name='public_key',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddIndex(
+            model_name='hederaaccount',
+            index=models.Index(fields=['status', 'next_attempt_at'], name='farmer_hede_status_be0380_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.2 on 2026-10-17 19:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('farmer', '0006_hederaaccount_provisioning'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WalletKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('public_key', models.TextField()),
+                ('private_key', models.TextField()),
+                ('account_id', models.CharField(blank=True, max_length=50, null=True)),
+                ('status', models.CharField(choices=[('available', 'Available'), ('claimed', 'Claimed')], default='available', max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('claimed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'created_at'], name='farmer_wall_status_1f62ab_idx')],
+            },
+        ),
+    ]
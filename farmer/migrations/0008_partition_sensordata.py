@@ -0,0 +1,84 @@
+# Generated by Django 5.2.2 on 2026-10-17 19:40
+
+import datetime
+
+from django.db import migrations, models
+
+TABLE = 'farmer_sensordata'
+MONTHS_AHEAD = 3
+
+
+def add_months(value, months):
+    month = value.month - 1 + months
+    return datetime.date(value.year + month // 12, month % 12 + 1, 1)
+
+
+def partition_sensor_data(apps, schema_editor):
+    """
+    Rebuild farmer_sensordata as a table range-partitioned by month on
+    reading_date. Existing rows are copied into monthly partitions covering
+    their range. There is no default partition because it would rule out
+    DETACH PARTITION ... CONCURRENTLY when retiring old months.
+    """
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return
+
+    execute = schema_editor.execute
+    legacy = f'{TABLE}_legacy'
+
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT min(reading_date), max(reading_date) FROM {TABLE}')
+        first, last = cursor.fetchone()
+
+    this_month = datetime.date.today().replace(day=1)
+    start = first.date().replace(day=1) if first else this_month
+    end = add_months(this_month, MONTHS_AHEAD)
+    if last and last.date() >= end:
+        end = last.date().replace(day=1)
+
+    execute(f'ALTER TABLE {TABLE} RENAME TO {legacy}')
+    # No INCLUDING IDENTITY: identity columns on partitioned tables need
+    # PostgreSQL 17, so ids come from a sequence default (added below)
+    execute(f'CREATE TABLE {TABLE} (LIKE {legacy} INCLUDING DEFAULTS) PARTITION BY RANGE (reading_date)')
+    month = start
+    while month <= end:
+        execute(
+            f'CREATE TABLE {TABLE}_y{month.year}m{month.month:02d} PARTITION OF {TABLE} '
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+        )
+        month = add_months(month, 1)
+
+    execute(f'INSERT INTO {TABLE} SELECT * FROM {legacy}')
+    execute(f'DROP TABLE {legacy}')
+    execute(f'CREATE SEQUENCE {TABLE}_id_seq OWNED BY {TABLE}.id')
+    execute(f"ALTER TABLE {TABLE} ALTER COLUMN id SET DEFAULT nextval('{TABLE}_id_seq')")
+    execute(
+        f"SELECT setval(pg_get_serial_sequence('{TABLE}', 'id'), "
+        f"coalesce((SELECT max(id) FROM {TABLE}), 0) + 1, false)"
+    )
+
+    # The partition key has to be part of every unique constraint
+    execute(f'ALTER TABLE {TABLE} ADD CONSTRAINT {TABLE}_pkey PRIMARY KEY (id, reading_date)')
+    execute(
+        f'ALTER TABLE {TABLE} ADD CONSTRAINT {TABLE}_project_id_fk FOREIGN KEY (project_id) '
+        f'REFERENCES farmer_carboncreditproject (id) DEFERRABLE INITIALLY DEFERRED'
+    )
+    execute(f'CREATE INDEX {TABLE}_project_id_idx ON {TABLE} (project_id)')
+    execute(f'CREATE INDEX {TABLE}_reading_date_brin ON {TABLE} USING brin (reading_date)')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('farmer', '0007_walletkey'),
+    ]
+
+    operations = [
+        # Not reversible in place; restore from a dump to undo partitioning
+        migrations.RunPython(partition_sensor_data, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='sensordata',
+            index=models.Index(fields=['project', 'sensor_type', 'reading_date'], name='sensordata_project_type_date'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.2 on 2026-10-17 19:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('farmer', '0008_partition_sensordata'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SensorRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sensor_type', models.CharField(max_length=50)),
+                ('bucket', models.CharField(choices=[('hour', 'Hour'), ('day', 'Day'), ('week', 'Week')], max_length=10)),
+                ('bucket_start', models.DateTimeField()),
+                ('count', models.PositiveIntegerField()),
+                ('total', models.DecimalField(decimal_places=2, max_digits=20)),
+                ('minimum', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('maximum', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sensor_rollups', to='farmer.carboncreditproject')),
+            ],
+            options={
+                'ordering': ['bucket_start'],
+                'constraints': [models.UniqueConstraint(fields=('project', 'sensor_type', 'bucket', 'bucket_start'), name='unique_sensor_rollup_bucket')],
+            },
+        ),
+    ]
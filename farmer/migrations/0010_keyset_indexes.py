@@ -0,0 +1,21 @@
+# Generated by Django 5.2.2 on 2026-10-17 19:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('farmer', '0009_sensorrollup'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='carboncreditissuance',
+            index=models.Index(fields=['-issuance_date', '-id'], name='issuance_date_id'),
+        ),
+        migrations.AddIndex(
+            model_name='sensordata',
+            index=models.Index(fields=['-reading_date', '-id'], name='sensordata_date_id'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.2 on 2026-10-17 19:52
+
+import django.contrib.gis.db.models.fields
+from django.db import migrations
+
+from farmer.geometry import polygon_from_text
+
+
+def populate_boundaries(apps, schema_editor):
+    """Parse every parcel's gps_coordinates JSON into the new geometry column."""
+    LandParcel = apps.get_model('farmer', 'LandParcel')
+    batch = []
+    for parcel in LandParcel.objects.only('id', 'gps_coordinates').iterator(chunk_size=500):
+        parcel.boundary = polygon_from_text(parcel.gps_coordinates)
+        if parcel.boundary is not None:
+            batch.append(parcel)
+        if len(batch) >= 500:
+            LandParcel.objects.bulk_update(batch, ['boundary'])
+            batch = []
+    if batch:
+        LandParcel.objects.bulk_update(batch, ['boundary'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('farmer', '0010_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='landparcel',
+            name='boundary',
+            field=django.contrib.gis.db.models.fields.PolygonField(blank=True, null=True, srid=4326),
+        ),
+        migrations.RunPython(populate_boundaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.2 on 2026-10-17 19:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('farmer', '0011_landparcel_boundary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ParcelOverlap',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('intersection_area', models.FloatField()),
+                ('ratio_a', models.FloatField()),
+                ('ratio_b', models.FloatField()),
+                ('flagged', models.BooleanField(default=False)),
+                ('status', models.CharField(choices=[('open', 'Open'), ('dismissed', 'Dismissed'), ('confirmed', 'Confirmed Double Claim')], default='open', max_length=20)),
+                ('detected_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('parcel_a', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='overlaps_as_a', to='farmer.landparcel')),
+                ('parcel_b', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='overlaps_as_b', to='farmer.landparcel')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['flagged', 'status'], name='parceloverlap_flagged_status')],
+                'constraints': [models.UniqueConstraint(fields=('parcel_a', 'parcel_b'), name='unique_parcel_overlap')],
+            },
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.2 on 2026-10-17 20:09
+
+from django.db import migrations, models
+
+
+def queue_existing_photos(apps, schema_editor):
+    VerificationEvidence = apps.get_model('farmer', 'VerificationEvidence')
+    VerificationEvidence.objects.filter(file_type='photo').update(image_status='pending')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('farmer', '0014_evidenceupload'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='verificationevidence',
+            name='captured_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='verificationevidence',
+            name='image_status',
+            field=models.CharField(blank=True, choices=[('pending', 'Pending'), ('ready', 'Ready'), ('failed', 'Failed')], default='', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='verificationevidence',
+            name='thumbnails',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddIndex(
+            model_name='verificationevidence',
+            index=models.Index(condition=models.Q(('image_status', 'pending')), fields=['id'], name='evidence_image_pending'),
+        ),
+        migrations.RunPython(queue_existing_photos, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.2 on 2026-10-17 20:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('farmer', '0015_evidence_images'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='hederaaccount',
+            name='data_key',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='hederaaccount',
+            name='key_version',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='walletkey',
+            name='data_key',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='walletkey',
+            name='key_version',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+    ]
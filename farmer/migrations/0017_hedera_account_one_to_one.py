@@ -0,0 +1,50 @@
+# Generated by Django 5.2.2 on 2026-10-17 20:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def drop_duplicate_wallets(apps, schema_editor):
+    """
+    Keep one wallet per farmer: an active one if any, else the oldest. Keys
+    of the dropped wallets are kept as claimed WalletKey rows (never handed
+    out again) so no key material is lost.
+    """
+    HederaAccount = apps.get_model('farmer', 'HederaAccount')
+    WalletKey = apps.get_model('farmer', 'WalletKey')
+    farmers = (
+        HederaAccount.objects.values('farmer_id').annotate(wallets=Count('id')).filter(wallets__gt=1)
+        .values_list('farmer_id', flat=True)
+    )
+    for farmer_id in farmers.iterator():
+        wallets = sorted(
+            HederaAccount.objects.filter(farmer_id=farmer_id),
+            key=lambda wallet: (wallet.status != 'active', not wallet.private_key, wallet.id)
+        )
+        dropped = wallets[1:]
+        WalletKey.objects.bulk_create([
+            WalletKey(
+                public_key=wallet.public_key, private_key=wallet.private_key, data_key=wallet.data_key,
+                key_version=wallet.key_version, account_id=wallet.account_id, status='claimed',
+                claimed_at=wallet.created_at,
+            )
+            for wallet in dropped if wallet.private_key
+        ])
+        HederaAccount.objects.filter(id__in=[wallet.id for wallet in dropped]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('farmer', '0016_envelope_encryption'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_duplicate_wallets, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='hederaaccount',
+            name='farmer',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='hedera_account', to='farmer.farmerprofile'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.2 on 2026-10-17 21:05
+
+from django.db import migrations
+from django.db.models import Exists, OuterRef
+
+
+def clear_claimed_keys(apps, schema_editor):
+    """
+    Blank the keys of claimed pool entries whose keys were copied into a
+    wallet. Claimed entries holding keys found nowhere else (archived by
+    0017) are left alone.
+    """
+    HederaAccount = apps.get_model('farmer', 'HederaAccount')
+    WalletKey = apps.get_model('farmer', 'WalletKey')
+    WalletKey.objects.filter(
+        Exists(HederaAccount.objects.filter(private_key=OuterRef('private_key'))),
+        status='claimed',
+    ).exclude(private_key='').update(public_key='', private_key='', data_key='')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('farmer', '0017_hedera_account_one_to_one'),
+    ]
+
+    operations = [
+        migrations.RunPython(clear_claimed_keys, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.2 on 2026-10-17 20:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('farmer', '0018_clear_claimed_wallet_keys'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tokenizationjob',
+            name='minted',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
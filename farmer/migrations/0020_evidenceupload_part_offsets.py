@@ -0,0 +1,18 @@
+# Generated by Django 5.2.2 on 2026-10-17 21:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('farmer', '0019_tokenizationjob_minted'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='evidenceupload',
+            name='part_offsets',
+            field=models.JSONField(default=list),
+        ),
+    ]
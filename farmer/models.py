@@ -1,7 +1,13 @@
+import json
+import uuid
+
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator
-from django.db import models
+from django.contrib.gis.db import models
+
+from farmer.evidence_storage import evidence_storage
+from farmer.geometry import coordinates_from_polygon, polygon_from_text
 
 
 class FarmerProfile(get_user_model()):
@@ -21,20 +27,70 @@ class FarmerProfile(get_user_model()):
 
     @property
     def hederaaccount(self):
-        return HederaAccount.objects.filter(farmer_id=self.id).first()
+        """
+        The farmer's wallet, or None. Loaded at most once per instance, and
+        not at all when joined with select_related('hedera_account').
+        """
+        try:
+            return self.hedera_account
+        except HederaAccount.DoesNotExist:
+            return None
+
+    def prime_hederaaccount(self, hedera_account):
+        """Set the wallet (or None) as if it had been loaded with this instance."""
+        FarmerProfile.hedera_account.related.set_cached_value(self, hedera_account)
+        if hedera_account is not None:
+            HederaAccount.farmer.field.set_cached_value(hedera_account, self)
 
 
 class HederaAccount(models.Model):
-    farmer = models.ForeignKey(FarmerProfile, on_delete=models.CASCADE)
-    account_id = models.CharField(max_length=50)
-    public_key = models.TextField()  # Encrypted
-    private_key = models.TextField()  # Encrypted
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('provisioning', 'Provisioning'),
+        ('active', 'Active'),
+        ('failed', 'Failed'),
+    ]
+
+    farmer = models.OneToOneField(FarmerProfile, related_name='hedera_account', on_delete=models.CASCADE)
+    account_id = models.CharField(max_length=50, null=True, blank=True)  # Set once provisioned
+    public_key = models.TextField(blank=True)  # Encrypted with the data key
+    private_key = models.TextField(blank=True)  # Encrypted with the data key
+    data_key = models.TextField(blank=True)  # Wrapped by master key `key_version` (see farmer.utils)
+    key_version = models.PositiveSmallIntegerField(default=0)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    provision_attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(null=True, blank=True)
     did = models.CharField(max_length=200, blank=True, null=True)
     did_document = models.JSONField(blank=True, null=True)
     account_balance = models.DecimalField(max_digits=20, decimal_places=2, default=0)
     last_balance_check = models.DateTimeField(null=True, blank=True)
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['status', 'next_attempt_at'])]
+
+
+class WalletKey(models.Model):
+    """A pre-generated, pre-encrypted wallet key pair, optionally with its Hedera account already created."""
+    STATUS_CHOICES = [
+        ('available', 'Available'),
+        ('claimed', 'Claimed'),
+    ]
+
+    public_key = models.TextField()  # Encrypted with the data key
+    private_key = models.TextField()  # Encrypted with the data key
+    data_key = models.TextField(blank=True)  # Wrapped by master key `key_version` (see farmer.utils)
+    key_version = models.PositiveSmallIntegerField(default=0)
+    account_id = models.CharField(max_length=50, null=True, blank=True)  # Pre-created Hedera account
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='available')
+    created_at = models.DateTimeField(auto_now_add=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['status', 'created_at'])]
 
 
 class LandParcel(models.Model):
@@ -43,6 +99,8 @@ class LandParcel(models.Model):
     title_deed_document = models.FileField(upload_to='title_deeds/', null=True, blank=True)
     total_area = models.DecimalField(max_digits=10, decimal_places=2)  # in hectares
     gps_coordinates = models.TextField()  # JSON of polygon coordinates
+    # Same polygon as PostGIS geometry (GiST-indexed); kept in sync with gps_coordinates on save
+    boundary = models.PolygonField(srid=4326, null=True, blank=True)
     address = models.TextField()
     country = models.CharField(max_length=100)
     region = models.CharField(max_length=100)
@@ -73,9 +131,67 @@ class LandParcel(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    def sync_boundary(self):
+        """Derive `boundary` from `gps_coordinates`, or the text from the geometry when only that is set."""
+        if self.gps_coordinates:
+            self.boundary = polygon_from_text(self.gps_coordinates)
+        elif self.boundary is not None:
+            self.gps_coordinates = json.dumps(coordinates_from_polygon(self.boundary))
+
+    def save(self, *args, **kwargs):
+        self.sync_boundary()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'gps_coordinates', 'boundary'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'gps_coordinates', 'boundary'}
+        super().save(*args, **kwargs)
+
+
+class ParcelOverlap(models.Model):
+    """Two parcels whose polygons intersect; parcel_a always has the lower id."""
+    STATUS_CHOICES = [
+        ('open', 'Open'),
+        ('dismissed', 'Dismissed'),
+        ('confirmed', 'Confirmed Double Claim'),
+    ]
+
+    parcel_a = models.ForeignKey(LandParcel, on_delete=models.CASCADE, related_name='overlaps_as_a')
+    parcel_b = models.ForeignKey(LandParcel, on_delete=models.CASCADE, related_name='overlaps_as_b')
+    intersection_area = models.FloatField()  # hectares, geodesic
+    ratio_a = models.FloatField()  # share of parcel_a covered by parcel_b
+    ratio_b = models.FloatField()
+    flagged = models.BooleanField(default=False)  # either ratio at or above PARCEL_OVERLAP_THRESHOLD
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='open')
+    detected_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['parcel_a', 'parcel_b'], name='unique_parcel_overlap'),
+        ]
+        indexes = [
+            models.Index(fields=['flagged', 'status'], name='parceloverlap_flagged_status'),
+        ]
+
+    def __str__(self):
+        return f"Parcels {self.parcel_a_id} / {self.parcel_b_id}: {self.intersection_area:.4f} ha"
+
+
+class LandTokenCollection(models.Model):
+    """A NON_FUNGIBLE_UNIQUE token shared by many parcels, one serial each."""
+    name = models.CharField(max_length=100, unique=True)
+    country = models.CharField(max_length=100, blank=True)
+    region = models.CharField(max_length=100, blank=True)
+    token_id = models.CharField(max_length=50, blank=True)  # Hedera token ID, set once created
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.name} ({self.token_id or 'not created'})"
+
 
 class LandToken(models.Model):
     land_parcel = models.OneToOneField(LandParcel, on_delete=models.CASCADE)
+    collection = models.ForeignKey(LandTokenCollection, null=True, blank=True, on_delete=models.SET_NULL,
+                                   related_name='tokens')
     token_id = models.CharField(max_length=50)  # Hedera token ID
     serial_number = models.IntegerField()  # For NFT serials
     token_metadata = models.TextField()  # JSON metadata
@@ -84,6 +200,40 @@ class LandToken(models.Model):
     is_active = models.BooleanField(default=True)
 
 
+class TokenizationJob(models.Model):
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('creating_token', 'Creating Token'),
+        ('minting', 'Minting'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    land_parcel = models.ForeignKey(LandParcel, null=True, blank=True, on_delete=models.CASCADE,
+                                    related_name='tokenization_jobs')
+    # Batch jobs mint every parcel into one collection token instead
+    parcels = models.ManyToManyField(LandParcel, blank=True, related_name='batch_tokenization_jobs')
+    collection = models.ForeignKey(LandTokenCollection, null=True, blank=True, on_delete=models.SET_NULL)
+    requested_by = models.ForeignKey(User, null=True, blank=True, on_delete=models.SET_NULL)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    land_token = models.ForeignKey(LandToken, null=True, blank=True, on_delete=models.SET_NULL)
+    # Serials of batch chunks, saved as soon as they are minted, for tokens whose rows were not written
+    minted = models.JSONField(default=list, blank=True)
+    error = models.TextField(null=True, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [models.Index(fields=['status', 'created_at'])]
+
+    def __str__(self):
+        return f"Tokenization job #{self.id} - {self.get_status_display()}"
+
+
 class CarbonCreditProject(models.Model):
     STATUS_CHOICES = [
         ('draft', 'Draft'),
@@ -174,6 +324,9 @@ class CarbonCreditIssuance(models.Model):
         verbose_name = "Carbon Credit Issuance"
         verbose_name_plural = "Carbon Credit Issuances"
         ordering = ['-issuance_date']
+        indexes = [
+            models.Index(fields=['-issuance_date', '-id'], name='issuance_date_id'),
+        ]
 
     def __str__(self):
         return f"Issuance #{self.batch_number} - {self.amount} tCO2e"
@@ -213,11 +366,49 @@ class SensorData(models.Model):
         verbose_name = "Sensor Data"
         verbose_name_plural = "Sensor Data"
         ordering = ['-reading_date']
+        # On PostgreSQL the table is range-partitioned by month on reading_date
+        # and also carries a BRIN index on it (see migration 0008 and
+        # farmer/partitions.py).
+        indexes = [
+            models.Index(fields=['project', 'sensor_type', 'reading_date'], name='sensordata_project_type_date'),
+            models.Index(fields=['-reading_date', '-id'], name='sensordata_date_id'),
+        ]
 
     def __str__(self):
         return f"{self.get_sensor_type_display()} - {self.value}{self.unit}"
 
 
+class SensorRollup(models.Model):
+    """Per-bucket aggregates of SensorData, kept current by farmer.rollups."""
+    BUCKET_CHOICES = [
+        ('hour', 'Hour'),
+        ('day', 'Day'),
+        ('week', 'Week'),
+    ]
+
+    project = models.ForeignKey(CarbonCreditProject, on_delete=models.CASCADE, related_name='sensor_rollups')
+    sensor_type = models.CharField(max_length=50)
+    bucket = models.CharField(max_length=10, choices=BUCKET_CHOICES)
+    bucket_start = models.DateTimeField()
+    count = models.PositiveIntegerField()
+    total = models.DecimalField(max_digits=20, decimal_places=2)
+    minimum = models.DecimalField(max_digits=10, decimal_places=2)
+    maximum = models.DecimalField(max_digits=10, decimal_places=2)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['bucket_start']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['project', 'sensor_type', 'bucket', 'bucket_start'], name='unique_sensor_rollup_bucket'
+            ),
+        ]
+
+    @property
+    def average(self):
+        return self.total / self.count if self.count else None
+
+
 class PracticeVerification(models.Model):
     VERIFICATION_METHODS = [
         ('remote', 'Remote Sensing'),
@@ -262,18 +453,28 @@ class PracticeVerification(models.Model):
 
 
 class VerificationEvidence(models.Model):
+    FILE_TYPES = [
+        ('photo', 'Photo'),
+        ('video', 'Video'),
+        ('document', 'Document'),
+        ('audio', 'Audio Recording'),
+        ('geojson', 'GeoJSON'),
+    ]
+    IMAGE_STATUS = [
+        ('pending', 'Pending'),
+        ('ready', 'Ready'),
+        ('failed', 'Failed'),
+    ]
+
     verification = models.ForeignKey(PracticeVerification, on_delete=models.CASCADE, related_name='evidence')
-    file = models.FileField(upload_to='verification_evidence/%Y/%m/%d/')
-    file_type = models.CharField(
-        max_length=20,
-        choices=[
-            ('photo', 'Photo'),
-            ('video', 'Video'),
-            ('document', 'Document'),
-            ('audio', 'Audio Recording'),
-            ('geojson', 'GeoJSON'),
-        ]
-    )
+    file = models.FileField(upload_to='verification_evidence/%Y/%m/%d/', storage=evidence_storage)
+    file_type = models.CharField(max_length=20, choices=FILE_TYPES)
+    # sha256 of the file; evidence with the same content shares one stored file
+    content_hash = models.CharField(max_length=64, blank=True, db_index=True)
+    # Photos get thumbnails and EXIF metadata from the image worker (run_image_worker)
+    image_status = models.CharField(max_length=20, choices=IMAGE_STATUS, blank=True, default='')
+    thumbnails = models.JSONField(default=dict, blank=True)  # {"480": {"webp": name, "jpeg": name}, ...}
+    captured_at = models.DateTimeField(null=True, blank=True)  # from EXIF
     description = models.CharField(max_length=255, blank=True)
     latitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
     longitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
@@ -282,11 +483,50 @@ class VerificationEvidence(models.Model):
     class Meta:
         verbose_name = "Verification Evidence"
         verbose_name_plural = "Verification Evidence"
+        indexes = [
+            models.Index(
+                fields=['id'], condition=models.Q(image_status='pending'), name='evidence_image_pending'
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        if self._state.adding and self.file_type == 'photo' and not self.image_status:
+            self.image_status = 'pending'
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.get_file_type_display()} evidence for {self.verification}"
 
 
+class EvidenceUpload(models.Model):
+    """A chunked, resumable evidence upload; becomes a VerificationEvidence when completed."""
+    STATUS_CHOICES = [
+        ('uploading', 'Uploading'),
+        ('complete', 'Complete'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    verification = models.ForeignKey(PracticeVerification, on_delete=models.CASCADE, related_name='uploads')
+    created_by = models.ForeignKey(User, on_delete=models.CASCADE)
+    filename = models.CharField(max_length=255)
+    file_type = models.CharField(max_length=20, choices=VerificationEvidence.FILE_TYPES)
+    description = models.CharField(max_length=255, blank=True)
+    latitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+    longitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+    size = models.BigIntegerField()  # declared total size in bytes
+    received = models.BigIntegerField(default=0)  # bytes stored so far
+    parts = models.PositiveIntegerField(default=0)
+    part_offsets = models.JSONField(default=list)  # offset each stored part starts at, in order
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='uploading')
+    content_hash = models.CharField(max_length=64, blank=True)
+    evidence = models.ForeignKey(VerificationEvidence, null=True, blank=True, on_delete=models.SET_NULL)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.filename} ({self.received} bytes, {self.status})"
+
+
 class AuditLog(models.Model):
     ACTION_CHOICES = [
         ('create', 'Create'),
@@ -350,6 +590,31 @@ class VerificationRequest(models.Model):
     notes = models.TextField(null=True, blank=True)
 
 
+class SatelliteResult(models.Model):
+    """
+    Cached Sentinel Hub land analysis, keyed by a hash of the normalized
+    polygon, the resolution and the imagery date window.
+    """
+    key = models.CharField(max_length=64, unique=True)  # sha256 hex
+    resolution = models.PositiveIntegerField()  # meters per pixel
+    date_from = models.DateField(null=True, blank=True)  # imagery window; both empty for latest imagery
+    date_to = models.DateField(null=True, blank=True)
+    result = models.JSONField()
+    hits = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+    last_used_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['expires_at'], name='satelliteresult_expires'),
+            models.Index(fields=['last_used_at'], name='satelliteresult_last_used'),
+        ]
+
+    def __str__(self):
+        return f"{self.key[:12]} @ {self.resolution}m"
+
+
 class Device(models.Model):
     farmer = models.ForeignKey(FarmerProfile, on_delete=models.CASCADE)
     device_id = models.CharField(max_length=100, unique=True)
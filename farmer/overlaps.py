@@ -0,0 +1,138 @@
+"""
+Detection of overlapping (double-claimed) land parcels.
+
+A single parcel is checked against its neighbours found through the GiST
+index on `LandParcel.boundary`. A region is re-scanned in one pass by
+loading its polygons into a Shapely STRtree and querying every polygon
+against it at once. Either way the intersection area is measured on the
+WGS84 ellipsoid, and overlaps covering at least PARCEL_OVERLAP_THRESHOLD of
+either parcel are flagged.
+"""
+import logging
+
+import numpy as np
+import shapely
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+
+from farmer.areas import GEOD
+from farmer.models import LandParcel, ParcelOverlap
+
+logger = logging.getLogger(__name__)
+
+
+def overlap_threshold():
+    return getattr(settings, 'PARCEL_OVERLAP_THRESHOLD', 0.02)
+
+
+def to_shapely(polygon):
+    return shapely.from_wkb(bytes(polygon.wkb))
+
+
+def geodesic_area_m2(geometry):
+    if geometry.is_empty:
+        return 0.0
+    area, _ = GEOD.geometry_area_perimeter(geometry)
+    return abs(area)
+
+
+def measure(pairs, geometries, areas, threshold=None):
+    """
+    Measure index pairs (left, right) into `geometries` (Shapely polygons,
+    geodesic `areas` in m² at the same positions). Returns tuples of
+    (a, b, area m², ratio_a, ratio_b, flagged); pairs that only touch along
+    an edge are skipped.
+    """
+    threshold = overlap_threshold() if threshold is None else threshold
+    left, right = pairs
+    if not len(left):
+        return []
+    intersections = shapely.intersection(geometries[left], geometries[right])
+
+    overlaps = []
+    for a, b, intersection in zip(left, right, intersections):
+        area = geodesic_area_m2(intersection)
+        if area <= 0:
+            continue
+        ratio_a = area / areas[a] if areas[a] else 0.0
+        ratio_b = area / areas[b] if areas[b] else 0.0
+        overlaps.append((a, b, area, ratio_a, ratio_b, max(ratio_a, ratio_b) >= threshold))
+    return overlaps
+
+
+def save_overlaps(ids, overlaps, scope):
+    """
+    Upsert overlaps between parcel `ids` and delete the rows of `scope` (a
+    ParcelOverlap queryset covering what was checked) that were not found
+    again. Reviewer decisions (status) are kept on rows that still exist.
+    """
+    rows = []
+    for a, b, area, ratio_a, ratio_b, flagged in overlaps:
+        if ids[a] > ids[b]:
+            a, b, ratio_a, ratio_b = b, a, ratio_b, ratio_a
+        rows.append(ParcelOverlap(
+            parcel_a_id=ids[a], parcel_b_id=ids[b], intersection_area=area / 10_000,
+            ratio_a=ratio_a, ratio_b=ratio_b, flagged=flagged
+        ))
+
+    with transaction.atomic():
+        ParcelOverlap.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=['parcel_a', 'parcel_b'],
+            update_fields=['intersection_area', 'ratio_a', 'ratio_b', 'flagged', 'updated_at'],
+            batch_size=1000
+        )
+        found = {(row.parcel_a_id, row.parcel_b_id) for row in rows}
+        stale = [
+            pk for pk, a, b in scope.values_list('pk', 'parcel_a_id', 'parcel_b_id') if (a, b) not in found
+        ]
+        ParcelOverlap.objects.filter(pk__in=stale).delete()
+    return rows
+
+
+def check_parcel(parcel, threshold=None):
+    """Find and store the overlaps of one parcel. Returns the ParcelOverlap rows found."""
+    if parcel.boundary is None:
+        return []
+    neighbours = list(
+        LandParcel.objects
+        .filter(boundary__intersects=parcel.boundary)
+        .exclude(pk=parcel.pk)
+        .values_list('id', 'boundary')
+    )
+    ids = [parcel.pk] + [pk for pk, _ in neighbours]
+    geometries = np.array([to_shapely(parcel.boundary)] + [to_shapely(boundary) for _, boundary in neighbours])
+    areas = [geodesic_area_m2(geometry) for geometry in geometries]
+    pairs = (np.zeros(len(neighbours), dtype=int), np.arange(1, len(neighbours) + 1))
+
+    return save_overlaps(ids, measure(pairs, geometries, areas, threshold), overlaps_of(parcel))
+
+
+def scan(queryset, threshold=None):
+    """
+    Re-check every parcel in `queryset` (e.g. one region) against each
+    other. Overlaps with parcels outside `queryset` are left as they are.
+    Returns (parcels scanned, overlaps found, overlaps flagged).
+    """
+    parcels = [(pk, boundary) for pk, boundary in queryset.values_list('id', 'boundary') if boundary is not None]
+    if not parcels:
+        return 0, 0, 0
+    ids = [pk for pk, _ in parcels]
+    geometries = np.array([to_shapely(boundary) for _, boundary in parcels])
+    areas = [geodesic_area_m2(geometry) for geometry in geometries]
+
+    tree = shapely.STRtree(geometries)
+    left, right = tree.query(geometries, predicate='intersects')
+    keep = left < right
+    overlaps = measure((left[keep], right[keep]), geometries, areas, threshold)
+
+    saved = save_overlaps(ids, overlaps, ParcelOverlap.objects.filter(parcel_a_id__in=ids, parcel_b_id__in=ids))
+    flagged = sum(1 for row in saved if row.flagged)
+    logger.info("Scanned %d parcels: %d overlaps, %d flagged", len(ids), len(saved), flagged)
+    return len(ids), len(saved), flagged
+
+
+def overlaps_of(parcel):
+    return ParcelOverlap.objects.filter(Q(parcel_a=parcel) | Q(parcel_b=parcel)).order_by('-intersection_area')
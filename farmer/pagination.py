@@ -0,0 +1,175 @@
+"""
+Keyset pagination for high-volume list endpoints.
+
+Pages are addressed by the sort key of the last row seen instead of an
+OFFSET, so page 10,000 costs the same index range scan as page 1. Counts
+are skipped unless asked for with ?count=exact or ?count=estimate.
+"""
+import base64
+import json
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+def estimated_count(queryset):
+    """
+    Row estimate from the planner. An unfiltered table uses pg_class.reltuples
+    (summed over partitions), anything else the EXPLAIN row estimate.
+    """
+    if connection.vendor != 'postgresql':
+        return queryset.count()
+
+    if not queryset.query.where:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT CASE WHEN parent.relkind = 'p' THEN (
+                    SELECT coalesce(sum(greatest(child.reltuples, 0)), 0)
+                    FROM pg_inherits JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+                    WHERE pg_inherits.inhparent = parent.oid
+                ) ELSE greatest(parent.reltuples, 0) END::bigint
+                FROM pg_class parent
+                WHERE parent.oid = %s::regclass
+                """,
+                [queryset.model._meta.db_table]
+            )
+            return cursor.fetchone()[0]
+
+    plan = json.loads(queryset.order_by().explain(format='json'))
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class KeysetPagination(BasePagination):
+    """
+    `ordering` must end in a unique column so the key is unambiguous.
+    Clients pick ?page_size= up to KEYSET_MAX_PAGE_SIZE.
+    """
+    ordering = ('-id',)
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    count_query_param = 'count'
+
+    def __init__(self):
+        self.page_size = settings.REST_FRAMEWORK.get('PAGE_SIZE') or 10
+        self.max_page_size = getattr(settings, 'KEYSET_MAX_PAGE_SIZE', 1000)
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(page_size, 1), self.max_page_size)
+
+    def encode_cursor(self, values, reverse=False):
+        payload = json.dumps({'k': values, 'r': reverse}, separators=(',', ':'), default=str)
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, request, model):
+        raw = request.query_params.get(self.cursor_query_param)
+        if not raw:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(raw + '=' * (-len(raw) % 4)))
+            values = [
+                model._meta.get_field(name.lstrip('-')).to_python(value)
+                for name, value in zip(self.ordering, payload['k'], strict=True)
+            ]
+            return values, bool(payload.get('r'))
+        except Exception:
+            raise NotFound("Invalid cursor")
+
+    def key_of(self, obj):
+        return [getattr(obj, name.lstrip('-')) for name in self.ordering]
+
+    def after(self, values, reverse):
+        """Q selecting rows strictly after `values` in `ordering` (before it when reversed)."""
+        condition = Q()
+        for position in reversed(range(len(self.ordering))):
+            name = self.ordering[position].lstrip('-')
+            descending = self.ordering[position].startswith('-') != reverse
+            step = Q(**{f"{name}__{'lt' if descending else 'gt'}": values[position]})
+            if position < len(self.ordering) - 1:
+                step |= Q(**{name: values[position]}) & condition
+            condition = step
+        return condition
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size_used = self.get_page_size(request)
+        values, reverse = self.decode_cursor(request, queryset.model)
+
+        ordering = self.ordering
+        if reverse:
+            ordering = [name[1:] if name.startswith('-') else f'-{name}' for name in ordering]
+        page = queryset.order_by(*ordering)
+        if values is not None:
+            page = page.filter(self.after(values, reverse))
+        rows = list(page[:self.page_size_used + 1])
+
+        has_more = len(rows) > self.page_size_used
+        rows = rows[:self.page_size_used]
+        if reverse:
+            rows.reverse()
+            self.has_next, self.has_previous = values is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, values is not None
+
+        self.count = self.get_count(queryset, request)
+        self.rows = rows
+        return rows
+
+    def get_count(self, queryset, request):
+        mode = request.query_params.get(self.count_query_param)
+        if mode == 'exact':
+            return queryset.count()
+        if mode == 'estimate':
+            return estimated_count(queryset)
+        return None
+
+    def get_next_link(self):
+        if not self.has_next or not self.rows:
+            return None
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, self.encode_cursor(self.key_of(self.rows[-1]))
+        )
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.rows:
+            return None
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, self.encode_cursor(self.key_of(self.rows[0]), reverse=True)
+        )
+
+    def get_paginated_response(self, data):
+        response = {
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'page_size': self.page_size_used,
+        }
+        if self.count is not None:
+            response['count'] = self.count
+        response['results'] = data
+        return Response(response)
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {'name': self.cursor_query_param, 'required': False, 'in': 'query', 'schema': {'type': 'string'}},
+            {'name': self.page_size_query_param, 'required': False, 'in': 'query', 'schema': {'type': 'integer'}},
+            {'name': self.count_query_param, 'required': False, 'in': 'query',
+             'schema': {'type': 'string', 'enum': ['exact', 'estimate']}},
+        ]
+
+
+class SensorDataPagination(KeysetPagination):
+    ordering = ('-reading_date', '-id')
+
+
+class IssuancePagination(KeysetPagination):
+    ordering = ('-issuance_date', '-id')
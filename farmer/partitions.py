@@ -0,0 +1,201 @@
+"""
+Monthly range partitions of the sensor data table on PostgreSQL.
+
+The parent table is partitioned by `reading_date` in migration 0008. There
+is no default partition (it would block concurrent detaches), so a month
+must exist before readings for it are written: `manage.py sensor_partitions
+--ahead N` keeps future months ready and writers go through
+`write_partitioned()` for anything else.
+"""
+import datetime
+
+from django.db import DatabaseError, connection, transaction
+
+from farmer.models import SensorData
+
+PARENT_TABLE = SensorData._meta.db_table
+
+# Months known to have a committed partition, as seen by this process
+_known_months = set()
+
+# PostgreSQL check_violation, raised as "no partition of relation ... found for row"
+NO_PARTITION_PGCODE = '23514'
+
+
+def month_start(value):
+    return datetime.date(value.year, value.month, 1)
+
+
+def add_months(value, months):
+    month = value.month - 1 + months
+    return datetime.date(value.year + month // 12, month % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f"{PARENT_TABLE}_y{month.year}m{month.month:02d}"
+
+
+def is_partitioned():
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_partitioned_table WHERE partrelid = %s::regclass", [PARENT_TABLE])
+        return cursor.fetchone() is not None
+
+
+def list_partitions():
+    """Return [(name, lower_bound, upper_bound)] for the attached monthly partitions, oldest first."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT child.relname
+            FROM pg_inherits
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE pg_inherits.inhparent = %s::regclass
+            ORDER BY child.relname
+            """,
+            [PARENT_TABLE]
+        )
+        names = [row[0] for row in cursor.fetchall()]
+
+    partitions = []
+    for name in names:
+        year, month = name.rsplit('_y', 1)[1].split('m')
+        lower = datetime.date(int(year), int(month), 1)
+        partitions.append((name, lower, add_months(lower, 1)))
+    return partitions
+
+
+class PartitionDetached(ValueError):
+    """A month whose partition was detached (retired) and can no longer be written."""
+
+
+def detached_months():
+    """Months whose partition table still exists but is no longer attached to the parent."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT relname FROM pg_class WHERE relkind = 'r' AND NOT relispartition AND relname LIKE %s",
+            [f"{PARENT_TABLE}\\_y%"]
+        )
+        names = [row[0] for row in cursor.fetchall()]
+    months = set()
+    for name in names:
+        year, month = name.rsplit('_y', 1)[1].split('m')
+        months.add(datetime.date(int(year), int(month), 1))
+    return months
+
+
+def create_partition(month):
+    """
+    Create the partition holding `month` if it does not exist yet. Returns True if created.
+
+    CREATE TABLE ... PARTITION OF takes an ACCESS EXCLUSIVE lock on the parent,
+    so the table is created on its own and then attached, which only takes
+    SHARE UPDATE EXCLUSIVE and lets reads and writes of other months go on.
+    """
+    month = month_start(month)
+    name = partition_name(month)
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT EXISTS (SELECT 1 FROM pg_inherits WHERE inhrelid = relation AND inhparent = %s::regclass) "
+            "FROM (SELECT to_regclass(%s) AS relation) existing WHERE relation IS NOT NULL",
+            [PARENT_TABLE, name]
+        )
+        existing = cursor.fetchone()
+        if existing is not None:
+            if not existing[0]:
+                raise PartitionDetached(
+                    f"{name} was detached from {PARENT_TABLE}; its month can no longer be written"
+                )
+            return False
+        bounds = [month.isoformat(), add_months(month, 1).isoformat()]
+        cursor.execute(f"CREATE TABLE {quote(name)} (LIKE {quote(PARENT_TABLE)} INCLUDING DEFAULTS)")
+        # Lets ATTACH skip scanning the table for rows outside the bounds
+        cursor.execute(
+            f"ALTER TABLE {quote(name)} ADD CONSTRAINT {quote(name + '_bounds')} "
+            f"CHECK (reading_date >= %s AND reading_date < %s)",
+            bounds
+        )
+        cursor.execute(
+            f"ALTER TABLE {quote(PARENT_TABLE)} ATTACH PARTITION {quote(name)} FOR VALUES FROM (%s) TO (%s)",
+            bounds
+        )
+    return True
+
+
+def ensure_months(dates):
+    """
+    Make sure a partition exists for the month of every date in `dates`.
+    Each month is created in its own transaction; call this before opening
+    the transaction that writes the readings, so the attach locks are not
+    held for the rest of it.
+    """
+    missing = {month_start(value) for value in dates} - _known_months
+    if not missing or not is_partitioned():
+        return
+    for month in sorted(missing):
+        with transaction.atomic():
+            create_partition(month)
+    # Only remembered once committed; a rolled back CREATE TABLE leaves no partition
+    transaction.on_commit(lambda: _known_months.update(missing))
+
+
+def is_missing_partition(error):
+    cause = error.__cause__
+    return getattr(cause, 'pgcode', None) == NO_PARTITION_PGCODE and 'no partition of relation' in str(cause)
+
+
+def write_partitioned(dates, write):
+    """
+    Ensure the months of `dates` exist, then call `write()`. If a partition
+    this process remembered is gone (detached by another process), forget
+    the months, create them again and retry once.
+    """
+    dates = list(dates)
+    ensure_months(dates)
+    try:
+        with transaction.atomic():
+            return write()
+    except DatabaseError as e:
+        if not is_missing_partition(e):
+            raise
+    _known_months.difference_update(month_start(value) for value in dates)
+    ensure_months(dates)
+    with transaction.atomic():
+        return write()
+
+
+def ensure_partitions(ahead=3, today=None):
+    """Create partitions from the current month through `ahead` months into the future."""
+    current = month_start(today or datetime.date.today())
+    return [
+        partition_name(add_months(current, offset))
+        for offset in range(ahead + 1)
+        if create_partition(add_months(current, offset))
+    ]
+
+
+def detach_partition(name, tablespace=None):
+    """
+    Detach a partition without blocking writers on the parent
+    (DETACH ... CONCURRENTLY, PostgreSQL 14+), then optionally move the now
+    standalone table to a cold-storage tablespace. Must run outside a
+    transaction block.
+    """
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(f"ALTER TABLE {quote(PARENT_TABLE)} DETACH PARTITION {quote(name)} CONCURRENTLY")
+        if tablespace:
+            cursor.execute(f"ALTER TABLE {quote(name)} SET TABLESPACE {quote(tablespace)}")
+
+
+def retire_partitions(retain_months, tablespace=None, today=None):
+    """Detach every monthly partition that ends before the retention window."""
+    cutoff = add_months(month_start(today or datetime.date.today()), -retain_months)
+    retired = []
+    for name, lower, upper in list_partitions():
+        if upper <= cutoff:
+            detach_partition(name, tablespace)
+            retired.append(name)
+    return retired
@@ -0,0 +1,200 @@
+import datetime
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+from hiero_sdk_python import PrivateKey
+
+from farmer import key_pool
+from farmer.hedera import create_hedera_account
+from farmer.models import HederaAccount
+from farmer.utils import get_crypto
+
+logger = logging.getLogger(__name__)
+
+
+def max_attempts():
+    return getattr(settings, 'HEDERA_PROVISION_MAX_ATTEMPTS', 5)
+
+
+def retry_delay(attempts):
+    """Exponential backoff: 30s, 60s, 120s, ... capped at one hour."""
+    base = getattr(settings, 'HEDERA_PROVISION_RETRY_SECONDS', 30)
+    return timedelta(seconds=min(base * 2 ** (attempts - 1), 3600))
+
+
+def build_did_document(farmer, account_id):
+    # Optional: simulate DID registration (you can implement this)
+    return {
+        "id": f"did:hedera:{account_id}",
+        "type": "FarmerIdentity",
+        "owner": f"{farmer.first_name} {farmer.last_name}",
+        "created": datetime.datetime.utcnow().isoformat()
+    }
+
+
+def activate(hedera_account, account_id):
+    """Store the account id and DID document and mark the wallet active."""
+    did_document = build_did_document(hedera_account.farmer, account_id)
+    hedera_account.account_id = account_id
+    hedera_account.did = did_document['id']
+    hedera_account.did_document = did_document
+    hedera_account.status = 'active'
+    hedera_account.last_error = None
+    hedera_account.save()
+    return hedera_account
+
+
+def provision(hedera_account):
+    """
+    Create the on-chain account for a claimed wallet. Failures are recorded
+    and the wallet goes back to `pending` with a backoff until it runs out
+    of attempts.
+
+    The key is stored before the account is created, so a retry after a
+    call that funded an account the worker never heard back from reuses
+    the same key instead of losing it.
+    """
+    try:
+        if not hedera_account.private_key:
+            private_key = PrivateKey.generate("ed25519")
+            get_crypto().seal(hedera_account, private_key.to_string(), private_key.public_key().to_string())
+            hedera_account.save(update_fields=['public_key', 'private_key', 'data_key', 'key_version', 'updated_at'])
+        existing_key = PrivateKey.from_string(get_crypto().private_key(hedera_account))
+        account_id, _ = create_hedera_account(existing_key)
+    except Exception as e:
+        logger.warning("Provisioning wallet %s failed", hedera_account.id, exc_info=True)
+        exhausted = hedera_account.provision_attempts >= max_attempts()
+        hedera_account.status = 'failed' if exhausted else 'pending'
+        hedera_account.last_error = str(e)
+        hedera_account.next_attempt_at = None if exhausted else timezone.now() + retry_delay(
+            hedera_account.provision_attempts
+        )
+        hedera_account.save(update_fields=['status', 'last_error', 'next_attempt_at', 'updated_at'])
+        return hedera_account
+    return activate(hedera_account, account_id)
+
+
+def claim_pending(limit=None, ids=None):
+    """Move due `pending` wallets to `provisioning`, skipping rows other workers hold."""
+    now = timezone.now()
+    with transaction.atomic():
+        queryset = (
+            HederaAccount.objects
+            .select_for_update(skip_locked=True)
+            .filter(status='pending')
+            .filter(Q(next_attempt_at__isnull=True) | Q(next_attempt_at__lte=now))
+            .order_by('created_at')
+        )
+        if ids is not None:
+            queryset = queryset.filter(id__in=ids)
+        accounts = list(queryset[:limit or getattr(settings, 'HEDERA_PROVISION_BATCH_SIZE', 50)])
+        for account in accounts:
+            account.status = 'provisioning'
+            account.provision_attempts += 1
+            account.updated_at = now
+        HederaAccount.objects.bulk_update(accounts, ['status', 'provision_attempts', 'updated_at'])
+    return accounts
+
+
+def release_abandoned(timeout=timedelta(minutes=10)):
+    """
+    Return wallets stuck in `provisioning` (worker died mid-call) to the queue,
+    or fail them once they have used up their attempts, as provision() does.
+    The previous attempt may have created an unused account on the network.
+    """
+    cutoff = timezone.now() - timeout
+    abandoned = HederaAccount.objects.filter(status='provisioning', updated_at__lt=cutoff)
+    failed = abandoned.filter(provision_attempts__gte=max_attempts()).update(
+        status='failed', next_attempt_at=None, last_error='Worker stopped before provisioning completed.',
+        updated_at=timezone.now()
+    )
+    return failed + abandoned.filter(provision_attempts__lt=max_attempts()).update(
+        status='pending', next_attempt_at=None
+    )
+
+
+def _provision_in_thread(hedera_account):
+    try:
+        return provision(hedera_account)
+    finally:
+        close_old_connections()
+
+
+def provision_pending(limit=None, max_workers=None):
+    """Provision a batch of due wallets concurrently. Returns the number now active."""
+    accounts = claim_pending(limit)
+    if not accounts:
+        return 0
+    max_workers = max_workers or getattr(settings, 'HEDERA_PROVISION_WORKERS', 8)
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(accounts))) as executor:
+        results = list(executor.map(_provision_in_thread, accounts))
+    return sum(1 for account in results if account.status == 'active')
+
+
+class WalletProvisioner:
+    """
+    In-process pool that starts provisioning as soon as a registration commits.
+    The provision_wallets command picks up anything it misses, and retries.
+    """
+
+    def __init__(self):
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, 'HEDERA_PROVISION_WORKERS', 8),
+                    thread_name_prefix='wallet-provisioner'
+                )
+        return self._executor
+
+    def submit(self, hedera_account_id):
+        self._get_executor().submit(self._run, hedera_account_id)
+
+    @staticmethod
+    def _run(hedera_account_id):
+        try:
+            close_old_connections()
+            for account in claim_pending(ids=[hedera_account_id]):
+                provision(account)
+        except Exception:
+            logger.exception("Background provisioning of wallet %s failed", hedera_account_id)
+        finally:
+            close_old_connections()
+
+
+wallet_provisioner = WalletProvisioner()
+
+
+def create_pending_wallet(farmer):
+    """
+    Create the farmer's wallet row. A pooled key with a pre-created account
+    makes the wallet active immediately; otherwise it is created `pending`
+    (with pooled keys when available) and queued for provisioning.
+    """
+    pooled_key = key_pool.claim()
+    if pooled_key is None:
+        hedera_account = HederaAccount.objects.create(farmer=farmer, status='pending')
+    else:
+        hedera_account = HederaAccount(
+            farmer=farmer,
+            public_key=pooled_key.public_key,
+            private_key=pooled_key.private_key,
+            data_key=pooled_key.data_key,
+            key_version=pooled_key.key_version,
+            status='pending'
+        )
+        if pooled_key.account_id:
+            return activate(hedera_account, pooled_key.account_id)
+        hedera_account.save()
+
+    transaction.on_commit(lambda: wallet_provisioner.submit(hedera_account.id))
+    return hedera_account
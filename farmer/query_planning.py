@@ -0,0 +1,134 @@
+"""
+select_related/prefetch_related planning derived from serializer trees.
+
+Walking the fields a serializer renders tells us which relations it will
+touch: forward foreign keys and one-to-ones can be joined, reverse and
+many-to-many relations have to be prefetched, and anything nested under a
+prefetch is prefetched along with it.
+"""
+from contextlib import ContextDecorator
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
+from rest_framework import serializers
+
+# Plans per serializer class; fields do not change between requests
+_plans = {}
+
+
+def _relation_path(model, field):
+    """Leading attributes of the field's source that are model relations, plus where they end up."""
+    path, many = [], False
+    for attr in field.source_attrs:
+        if model is None:
+            break
+        try:
+            model_field = model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            break
+        if not model_field.is_relation:
+            break
+        path.append(attr)
+        many = many or model_field.many_to_many or model_field.one_to_many
+        model = model_field.related_model
+    return path, model, many
+
+
+def _walk(serializer, model, prefix, prefetching, select, prefetch):
+    for field in serializer.fields.values():
+        if field.write_only or field.source == '*':
+            continue
+        path, related_model, many = _relation_path(model, field)
+        if not path:
+            continue
+
+        # The pk of a forward relation is read from the local column
+        if (isinstance(field, serializers.PrimaryKeyRelatedField) and len(path) == 1
+                and len(field.source_attrs) == 1 and not many):
+            continue
+        many = many or prefetching
+
+        lookup = prefix + '__'.join(path)
+        (prefetch if many else select).add(lookup)
+
+        if isinstance(field, serializers.BaseSerializer):
+            child = field.child if isinstance(field, serializers.ListSerializer) else field
+            _walk(child, related_model, lookup + '__', many, select, prefetch)
+
+
+def related_lookups(serializer):
+    """Return (select_related, prefetch_related) lookups for what `serializer` renders."""
+    if isinstance(serializer, serializers.ListSerializer):
+        serializer = serializer.child
+    select, prefetch = set(), set()
+    model = getattr(getattr(serializer, 'Meta', None), 'model', None)
+    _walk(serializer, model, '', False, select, prefetch)
+
+    # A join already covers its own prefixes
+    select = {lookup for lookup in select if not any(other.startswith(lookup + '__') for other in select)}
+    return sorted(select), sorted(prefetch)
+
+
+def plan_queryset(queryset, serializer, variant=None):
+    """
+    Apply the select/prefetch plan for `serializer` (an instance or a class)
+    to `queryset`. `variant` marks a per-request shape of the serializer
+    (see representation.py); those plans are not cached.
+    """
+    if isinstance(serializer, type):
+        serializer_class, serializer = serializer, None
+    else:
+        serializer_class = type(serializer)
+
+    if variant is None:
+        plan = _plans.get(serializer_class)
+        if plan is None:
+            plan = _plans[serializer_class] = related_lookups(serializer or serializer_class())
+    else:
+        plan = related_lookups(serializer or serializer_class())
+    select, prefetch = plan
+    if select:
+        queryset = queryset.select_related(*select)
+    if prefetch:
+        queryset = queryset.prefetch_related(*prefetch)
+    return queryset
+
+
+class QueryPlanMixin:
+    """
+    Viewset mixin that applies the serializer's query plan to list and
+    detail querysets. It hooks filter_queryset() so viewsets keep
+    overriding get_queryset() for scoping as usual.
+    """
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        representation = self.get_serializer_context().get('representation')
+        if representation is None:
+            return plan_queryset(queryset, self.get_serializer_class())
+        return plan_queryset(queryset, self.get_serializer(), representation.key)
+
+
+class assert_max_queries(CaptureQueriesContext, ContextDecorator):
+    """
+    Fail when the wrapped block runs more than `limit` queries, listing them:
+
+        with assert_max_queries(6):
+            client.get('/api/v1/farmer/sensor-data/')
+    """
+
+    def __init__(self, limit, using=DEFAULT_DB_ALIAS):
+        self.limit = limit
+        super().__init__(connections[using])
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        super().__exit__(exc_type, exc_value, traceback)
+        if exc_type is not None:
+            return
+        executed = len(self)
+        if executed > self.limit:
+            queries = '\n'.join(
+                f"{number}. {query['sql']}" for number, query in enumerate(self.captured_queries, start=1)
+            )
+            raise AssertionError(f"{executed} queries executed, budget is {self.limit}:\n{queries}")
@@ -0,0 +1,162 @@
+"""
+Per-request response shapes for list and detail endpoints.
+
+    ?fields=id,value,project.project_name   only these fields (dotted for nested ones)
+    ?compact=1                              nested objects rendered as their ids
+    ?expand=project,project.land_parcel     keep these nested in compact mode
+    ?include=project                        render `project` as an id and send each
+                                            distinct project once under "included"
+
+Serializers opt in with DynamicFieldsMixin, viewsets with RepresentationMixin.
+"""
+from rest_framework import serializers
+from rest_framework.response import Response
+
+from farmer.query_planning import plan_queryset
+
+TRUE_VALUES = {'1', 'true', 'yes', 'on'}
+
+
+def _split(value):
+    return {item.strip() for item in (value or '').split(',') if item.strip()}
+
+
+class Representation:
+    def __init__(self, fields=(), expand=(), include=(), compact=False):
+        self.fields = frozenset(fields)
+        self.expand = frozenset(expand)
+        self.include = frozenset(include)
+        self.compact = compact
+
+    @classmethod
+    def from_request(cls, request):
+        """Read the shape from the query string; None when the default shape was asked for."""
+        params = request.query_params
+        representation = cls(
+            fields=_split(params.get('fields')),
+            expand=_split(params.get('expand')),
+            include=_split(params.get('include')),
+            compact=params.get('compact', '').lower() in TRUE_VALUES
+        )
+        return representation if representation.key != cls().key else None
+
+    @property
+    def key(self):
+        return self.fields, self.expand, self.include, self.compact
+
+    def fields_at(self, path):
+        """Names requested directly below `path`, or None when every field is wanted there."""
+        prefix = f"{path}." if path else ''
+        names = {name[len(prefix):].split('.', 1)[0] for name in self.fields if name.startswith(prefix)}
+        if not names or path in self.fields:
+            return None
+        return names
+
+    def as_id(self, path):
+        if path in self.include:
+            return True
+        if not self.compact:
+            return False
+        # Asking for a nested field expands its parent too
+        return path not in self.expand and not any(
+            name.startswith(f"{path}.") for name in self.fields | self.expand
+        )
+
+
+class DynamicFieldsMixin:
+    """Prunes and collapses the serializer's fields according to context['representation']."""
+
+    @property
+    def representation_path(self):
+        parts, node = [], self
+        while node.parent is not None:
+            if node.field_name:
+                parts.append(node.field_name)
+            node = node.parent
+        base = self.context.get('representation_path')
+        if base:
+            parts.append(base)
+        return '.'.join(reversed(parts))
+
+    def get_fields(self):
+        fields = super().get_fields()
+        representation = self.context.get('representation')
+        if representation is None:
+            return fields
+
+        path = self.representation_path
+        wanted = representation.fields_at(path)
+        if wanted is not None:
+            fields = {name: field for name, field in fields.items() if name in wanted}
+
+        for name, field in list(fields.items()):
+            if not isinstance(field, serializers.BaseSerializer) or field.write_only:
+                continue
+            if representation.as_id(f"{path}.{name}" if path else name):
+                fields[name] = serializers.PrimaryKeyRelatedField(
+                    source=field.source, read_only=True, many=isinstance(field, serializers.ListSerializer)
+                )
+        return fields
+
+
+class RepresentationMixin:
+    """
+    Viewset mixin: passes the requested shape to the serializer and adds the
+    "included" section to list responses. List it before QueryPlanMixin.
+    """
+
+    def get_representation(self):
+        if not hasattr(self, '_representation'):
+            request = getattr(self, 'request', None)
+            self._representation = (
+                Representation.from_request(request) if request is not None and request.method == 'GET' else None
+            )
+        return self._representation
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        representation = self.get_representation()
+        if representation is not None:
+            context['representation'] = representation
+        return context
+
+    def get_included(self, objects):
+        """Serialize each distinct related object named in ?include= once."""
+        representation = self.get_representation()
+        if representation is None or not representation.include or not objects:
+            return None
+
+        declared = self.get_serializer_class()._declared_fields
+        model = type(objects[0])
+        included = {}
+        for name in sorted(representation.include):
+            field = declared.get(name)
+            if not isinstance(field, serializers.Serializer):
+                continue
+            attname = model._meta.get_field(field.source or name).attname
+            ids = {getattr(obj, attname) for obj in objects} - {None}
+            context = {**self.get_serializer_context(), 'representation_path': name}
+            queryset = plan_queryset(
+                field.Meta.model.objects.filter(pk__in=ids), type(field)(context=context), representation.key
+            )
+            included[name] = type(field)(queryset, many=True, context=context).data
+        return included
+
+    def list(self, request, *args, **kwargs):
+        if self.get_representation() is None:
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        objects = list(page if page is not None else queryset)
+        data = self.get_serializer(objects, many=True).data
+        included = self.get_included(objects)
+        if page is not None:
+            response = self.get_paginated_response(data)
+        elif included is not None:
+            response = Response({'results': data})
+        else:
+            return Response(data)
+        if included is not None:
+            response.data['included'] = included
+        return response
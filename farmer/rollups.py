@@ -0,0 +1,147 @@
+import datetime
+
+from django.db import connection, transaction
+from django.db.models import Count, Max, Min, Q, Sum
+from django.db.models.functions import TruncDay, TruncHour, TruncWeek
+
+from farmer.models import SensorData, SensorRollup
+
+UTC = datetime.timezone.utc
+
+BUCKETS = {
+    'hour': (TruncHour, datetime.timedelta(hours=1)),
+    'day': (TruncDay, datetime.timedelta(days=1)),
+    'week': (TruncWeek, datetime.timedelta(weeks=1)),
+}
+
+
+def bucket_floor(value, bucket):
+    value = value.astimezone(UTC)
+    if bucket == 'hour':
+        return value.replace(minute=0, second=0, microsecond=0)
+    value = value.replace(hour=0, minute=0, second=0, microsecond=0)
+    if bucket == 'week':
+        value -= datetime.timedelta(days=value.weekday())
+    return value
+
+
+def _merge(starts, step):
+    """Turn bucket starts into as few [lower, upper) ranges as cover them exactly."""
+    ranges = []
+    for start in sorted(starts):
+        if ranges and ranges[-1][1] == start:
+            ranges[-1][1] = start + step
+        else:
+            ranges.append([start, start + step])
+    return ranges
+
+
+def lock_series(project_id, sensor_type):
+    """
+    Serialise rollup refreshes of one project and sensor type until the
+    transaction ends. A refresh that starts after another has upserted
+    then re-reads the readings both writers committed, so neither's are lost.
+    """
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_advisory_xact_lock(hashtextextended(%s, 0))", [f"{project_id}:{sensor_type}"])
+
+
+def _refresh(project_id, sensor_type, ranges):
+    with transaction.atomic():
+        lock_series(project_id, sensor_type)
+        for bucket, (trunc, _) in BUCKETS.items():
+            if not ranges[bucket]:
+                continue
+            readings, buckets = Q(), Q()
+            for lower, upper in ranges[bucket]:
+                readings |= Q(reading_date__gte=lower, reading_date__lt=upper)
+                buckets |= Q(bucket_start__gte=lower, bucket_start__lt=upper)
+            aggregates = (
+                SensorData.objects
+                .filter(readings, project_id=project_id, sensor_type=sensor_type)
+                .order_by()
+                .annotate(bucket_start=trunc('reading_date', tzinfo=UTC))
+                .values('bucket_start')
+                .annotate(count=Count('id'), total=Sum('value'), minimum=Min('value'), maximum=Max('value'))
+            )
+            rollups = [
+                SensorRollup(project_id=project_id, sensor_type=sensor_type, bucket=bucket, **row)
+                for row in aggregates
+            ]
+            SensorRollup.objects.bulk_create(
+                rollups,
+                update_conflicts=True,
+                unique_fields=['project', 'sensor_type', 'bucket', 'bucket_start'],
+                update_fields=['count', 'total', 'minimum', 'maximum', 'updated_at']
+            )
+            # Buckets whose readings were all deleted
+            SensorRollup.objects.filter(
+                buckets, project_id=project_id, sensor_type=sensor_type, bucket=bucket
+            ).exclude(bucket_start__in=[rollup.bucket_start for rollup in rollups]).delete()
+
+
+def refresh_rollups(project_id, sensor_type, reading_dates):
+    """
+    Recompute the buckets holding `reading_dates` for one project and sensor
+    type. Only those buckets are re-aggregated, so the cost follows the size
+    of the change rather than the size of the table.
+    """
+    _refresh(project_id, sensor_type, {
+        bucket: _merge({bucket_floor(value, bucket) for value in reading_dates}, step)
+        for bucket, (_, step) in BUCKETS.items()
+    })
+
+
+class RollupTracker:
+    """Collects the hours touched per (project, sensor_type) while writing a batch."""
+
+    def __init__(self):
+        self.hours = {}
+
+    def add(self, project_id, sensor_type, reading_date):
+        self.hours.setdefault((project_id, sensor_type), set()).add(bucket_floor(reading_date, 'hour'))
+
+    def flush(self):
+        """Refresh the touched buckets; call after the readings are committed."""
+        for (project_id, sensor_type), hours in self.hours.items():
+            refresh_rollups(project_id, sensor_type, hours)
+        self.hours = {}
+
+
+def rebuild_rollups(project_id=None):
+    """Recompute all rollups from raw readings, e.g. after a backfill."""
+    spans = (
+        SensorData.objects
+        .order_by()
+        .values('project_id', 'sensor_type')
+        .annotate(start=Min('reading_date'), end=Max('reading_date'))
+    )
+    if project_id is not None:
+        spans = spans.filter(project_id=project_id)
+    spans = list(spans)
+    for span in spans:
+        _refresh(span['project_id'], span['sensor_type'], {
+            bucket: [[bucket_floor(span['start'], bucket), bucket_floor(span['end'], bucket) + step]]
+            for bucket, (_, step) in BUCKETS.items()
+        })
+    return len(spans)
+
+
+def series(project_id, sensor_type, bucket, start=None, end=None):
+    queryset = SensorRollup.objects.filter(project_id=project_id, sensor_type=sensor_type, bucket=bucket)
+    if start is not None:
+        queryset = queryset.filter(bucket_start__gte=bucket_floor(start, bucket))
+    if end is not None:
+        queryset = queryset.filter(bucket_start__lte=end)
+    return [
+        {
+            'bucket_start': row['bucket_start'],
+            'count': row['count'],
+            'min': row['minimum'],
+            'max': row['maximum'],
+            'avg': round(row['total'] / row['count'], 4) if row['count'] else None,
+        }
+        for row in queryset.order_by('bucket_start').values('bucket_start', 'count', 'total', 'minimum', 'maximum')
+    ]
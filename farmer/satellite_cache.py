@@ -0,0 +1,142 @@
+"""
+Persistent cache of Sentinel Hub land analysis results.
+
+Entries are keyed by a sha256 over the parcel polygon in canonical form
+(snapped to a 1e-7 degree grid, normalized ring orientation and start
+vertex), the resolution and the imagery date window. The same field
+re-submitted with its points in another order or direction, or with
+rounding noise, therefore hits the same entry. Entries live for
+SATELLITE_CACHE_TTL seconds; `evict` drops expired ones and trims the
+least recently used beyond SATELLITE_CACHE_MAX_ENTRIES.
+"""
+import hashlib
+import logging
+import threading
+from datetime import timedelta
+
+import shapely
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+
+from farmer.models import SatelliteResult
+
+logger = logging.getLogger(__name__)
+
+GRID_SIZE = 1e-7  # degrees, about 1 cm
+
+
+def cache_ttl():
+    return getattr(settings, 'SATELLITE_CACHE_TTL', 7 * 24 * 3600)
+
+
+def max_entries():
+    return getattr(settings, 'SATELLITE_CACHE_MAX_ENTRIES', 100_000)
+
+
+class CacheCounters:
+    """Per-process cache counters, reported next to the table size."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.stores = 0
+
+    def incr(self, name, amount=1):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + amount)
+
+    def as_dict(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'refreshes': self.refreshes,
+            'stores': self.stores,
+            'hit_ratio': round(self.hits / lookups, 4) if lookups else None,
+        }
+
+
+counters = CacheCounters()
+
+
+def canonical_wkb(coords):
+    """WKB of the polygon through `coords` ([lon, lat] pairs) in canonical form."""
+    polygon = shapely.Polygon(coords)
+    return shapely.to_wkb(shapely.normalize(shapely.set_precision(polygon, GRID_SIZE)))
+
+
+def geometry_key(coords, resolution, date_from=None, date_to=None):
+    digest = hashlib.sha256(canonical_wkb(coords))
+    digest.update(f"|{resolution}|{date_from or ''}|{date_to or ''}".encode())
+    return digest.hexdigest()
+
+
+def lookup(key):
+    """Cached result for `key` if there is a live entry, else None. Counts the hit."""
+    now = timezone.now()
+    entry = SatelliteResult.objects.filter(key=key, expires_at__gt=now).values('pk', 'result').first()
+    if entry is None:
+        return None
+    SatelliteResult.objects.filter(pk=entry['pk']).update(hits=F('hits') + 1, last_used_at=now)
+    return entry['result']
+
+
+def store(key, result, resolution, date_from=None, date_to=None):
+    now = timezone.now()
+    SatelliteResult.objects.update_or_create(key=key, defaults={
+        'result': result,
+        'resolution': resolution,
+        'date_from': date_from,
+        'date_to': date_to,
+        'hits': 0,
+        'expires_at': now + timedelta(seconds=cache_ttl()),
+        'last_used_at': now,
+    })
+    counters.incr('stores')
+
+
+def cached_result(coords, resolution, fetch, date_from=None, date_to=None, force_refresh=False):
+    """
+    Return (result, cached). `fetch()` is called on a miss, or always with
+    `force_refresh`, and must return (result, cacheable); only cacheable
+    results are stored.
+    """
+    key = geometry_key(coords, resolution, date_from, date_to)
+    if force_refresh:
+        counters.incr('refreshes')
+    else:
+        result = lookup(key)
+        if result is not None:
+            counters.incr('hits')
+            return result, True
+        counters.incr('misses')
+
+    result, cacheable = fetch()
+    if cacheable:
+        store(key, result, resolution, date_from, date_to)
+    return result, False
+
+
+def evict(limit=None):
+    """Delete expired entries and the least recently used beyond `limit`. Returns (expired, trimmed)."""
+    limit = max_entries() if limit is None else limit
+    expired, _ = SatelliteResult.objects.filter(expires_at__lte=timezone.now()).delete()
+    surplus = SatelliteResult.objects.order_by('-last_used_at', '-id').values_list('pk', flat=True)[limit:]
+    trimmed, _ = SatelliteResult.objects.filter(pk__in=surplus).delete()
+    if expired or trimmed:
+        logger.info("Evicted %d expired and %d surplus satellite results", expired, trimmed)
+    return expired, trimmed
+
+
+def stats():
+    now = timezone.now()
+    return {
+        'entries': SatelliteResult.objects.count(),
+        'expired': SatelliteResult.objects.filter(expires_at__lte=now).count(),
+        'ttl_seconds': cache_ttl(),
+        'max_entries': max_entries(),
+        **counters.as_dict(),
+    }
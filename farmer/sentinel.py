@@ -0,0 +1,152 @@
+"""
+Sentinel Hub HTTP access: one pooled `requests.Session`, and an OAuth
+token that is reused until shortly before it expires. When it does,
+exactly one thread fetches a new token while the others wait for it.
+
+Retries with backoff happen in SentinelClient.post rather than in the
+connection adapter, so that a call's timeout covers all of its attempts.
+
+SENTINEL_BASE_URL points everything at another host, e.g. the stub from
+`manage.py sentinel_stub`.
+"""
+import logging
+import os
+import threading
+import time
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASE_URL = "https://services.sentinel-hub.com"
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+def base_url():
+    return getattr(settings, 'SENTINEL_BASE_URL', DEFAULT_BASE_URL).rstrip('/')
+
+
+def max_retries():
+    return getattr(settings, 'SENTINEL_HTTP_RETRIES', 3)
+
+
+def retry_delay(attempt, headers=None):
+    """Seconds to wait before retry number `attempt` + 1: Retry-After when given, else exponential backoff."""
+    retry_after = headers.get('Retry-After') if headers is not None else None
+    if retry_after and retry_after.isdigit():
+        return float(retry_after)
+    return 0.5 * 2 ** attempt
+
+
+def build_session():
+    pool_size = getattr(settings, 'SENTINEL_HTTP_POOL_SIZE', 10)
+    adapter = HTTPAdapter(max_retries=0, pool_connections=pool_size, pool_maxsize=pool_size)
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+class SentinelTokenCache:
+    """OAuth client-credentials token shared by all threads of the process."""
+
+    def __init__(self, session):
+        self.session = session
+        self._lock = threading.Lock()
+        self._token = None
+        self._expires_at = 0.0
+        self.fetches = 0
+
+    def _valid(self):
+        margin = getattr(settings, 'SENTINEL_TOKEN_REFRESH_MARGIN', 60)
+        return self._token is not None and time.monotonic() < self._expires_at - margin
+
+    def get(self, timeout=10):
+        if self._valid():
+            return self._token
+        with self._lock:
+            # Another thread may have refreshed while this one waited
+            if not self._valid():
+                self._fetch(timeout)
+            return self._token
+
+    def invalidate(self, token):
+        """Drop `token` after the API rejected it, unless it was already replaced."""
+        with self._lock:
+            if self._token == token:
+                self._token = None
+
+    def _fetch(self, timeout):
+        response = self.session.post(
+            f"{base_url()}/oauth/token",
+            data={
+                "grant_type": "client_credentials",
+                "client_id": f"{os.getenv('SENTINEL_CLIENT')}",
+                "client_secret": f"{os.getenv('SENTINEL_SECRET')}"
+            },
+            timeout=timeout
+        )
+        response.raise_for_status()
+        payload = response.json()
+        self._token = payload["access_token"]
+        self._expires_at = time.monotonic() + float(payload.get("expires_in", 3600))
+        self.fetches += 1
+        logger.info("Fetched Sentinel Hub token valid for %ss", payload.get("expires_in", 3600))
+
+
+class SentinelClient:
+    def __init__(self):
+        self.session = build_session()
+        self.tokens = SentinelTokenCache(self.session)
+
+    def post(self, path, json, timeout=15):
+        """
+        POST to the Sentinel Hub API with a cached token, refreshing it once
+        on 401. `timeout` is a deadline for the whole call: every attempt,
+        and a token fetch, gets what is left of it, and 429/5xx answers and
+        connection errors are retried only while the backoff and another
+        attempt still fit. Raises requests.Timeout once it has run out.
+        """
+        deadline = time.monotonic() + timeout
+        attempt = 0
+        reauthenticated = False
+        while True:
+            token = self.tokens.get(timeout=self._remaining(deadline, timeout))
+            try:
+                response = self.session.post(
+                    f"{base_url()}{path}",
+                    headers={"Authorization": f"Bearer {token}"},
+                    json=json,
+                    timeout=self._remaining(deadline, timeout)
+                )
+            except requests.ConnectionError:
+                if not self._may_retry(attempt, retry_delay(attempt), deadline):
+                    raise
+                headers = None
+            else:
+                if response.status_code == 401 and not reauthenticated:
+                    self.tokens.invalidate(token)
+                    reauthenticated = True
+                    continue
+                if response.status_code not in RETRY_STATUSES or \
+                        not self._may_retry(attempt, retry_delay(attempt, response.headers), deadline):
+                    return response
+                headers = response.headers
+            time.sleep(retry_delay(attempt, headers))
+            attempt += 1
+
+    @staticmethod
+    def _remaining(deadline, timeout):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise requests.Timeout(f"Sentinel Hub call ran over its {timeout}s budget")
+        return remaining
+
+    @staticmethod
+    def _may_retry(attempt, delay, deadline):
+        return attempt < max_retries() and time.monotonic() + delay < deadline
+
+
+sentinel = SentinelClient()
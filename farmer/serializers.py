@@ -1,18 +1,22 @@
-import datetime
 import json
 
+from django.conf import settings
 from django.contrib.auth import authenticate
 from django.contrib.auth.hashers import make_password
-from hiero_sdk_python import Client, AccountId, PrivateKey, Network, AccountCreateTransaction, Hbar, ResponseCode
+from django.db import transaction
 from rest_framework import serializers
 from django.contrib.auth.models import User
-from .models import FarmerProfile, HederaAccount, LandParcel, VerificationRequest, CarbonCreditProject, \
-    CarbonCreditIssuance, SensorData, VerificationEvidence, PracticeVerification
+from .models import FarmerProfile, LandParcel, VerificationRequest, CarbonCreditProject, \
+    CarbonCreditIssuance, SensorData, VerificationEvidence, PracticeVerification, TokenizationJob, LandToken, \
+    SensorRollup, ParcelOverlap, EvidenceUpload
 from django.core.exceptions import ValidationError
 from django.core.validators import FileExtensionValidator
 import os
 from dotenv import load_dotenv
-from .utils import get_crypto
+from .evidence_uploads import chunk_size, max_size
+from .provisioning import create_pending_wallet
+from .representation import DynamicFieldsMixin
+from .geometry import bbox_polygon, parse_coordinates, polygon_from_coordinates, tile_bbox
 load_dotenv()  # Load environment variables
 
 
@@ -45,18 +49,22 @@ class UserSerializer(serializers.ModelSerializer):
         return User.objects.create_user(**validated_data)
 
 
-class FarmerProfileSerializer(serializers.ModelSerializer):
+class FarmerProfileSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     # user = UserSerializer()
     id_document = serializers.FileField(
         validators=[FileExtensionValidator(allowed_extensions=['pdf', 'jpg', 'jpeg', 'png'])],
         required=True
     )
+    # Read through the one-to-one, so list views join the wallet (see query_planning)
+    hedera_account_id = serializers.CharField(source='hedera_account.account_id', read_only=True)
+    wallet_status = serializers.CharField(source='hedera_account.status', read_only=True)
 
     class Meta:
         model = FarmerProfile
         fields = [
             "id_document", "first_name", "last_name", "email", "username", "phone_number", "date_of_birth",
-            "government_id_number", "physical_address", "country", "region", "password"
+            "government_id_number", "physical_address", "country", "region", "password",
+            "hedera_account_id", "wallet_status"
         ]
         read_only_fields = ['is_verified', 'verification_date']
 
@@ -69,59 +77,22 @@ class FarmerProfileSerializer(serializers.ModelSerializer):
         # user_data = validated_data.pop('user')
         # user = User.objects.create_user(**user_data)
 
-        # Initialize Hiero Hedera Client
-        client = Client(network=Network(os.getenv('HEDERA_NETWORK', 'testnet')))
-        operator_id = os.getenv('HEDERA_OPERATOR_ID')
-        operator_key = os.getenv('HEDERA_OPERATOR_PK')
-        # print(operator_id, operator_key)
-        client.set_operator(AccountId.from_string(operator_id), PrivateKey.from_string(operator_key))
-
-        # Generate key for the new farmer wallet
-        new_private_key = PrivateKey.generate("ed25519")
-        new_public_key = new_private_key.public_key()
-
-        # Create the Hedera account with 1 HBAR (100_000_000 tinybars)
-        tx = AccountCreateTransaction().set_key(new_public_key).set_initial_balance(100_000_000)
-
-        receipt = tx.execute(client=client)
-        # receipt = tx_response.get_receipt(client)
-        if receipt.status != ResponseCode.SUCCESS:
-            status_message = ResponseCode.get_name(receipt.status)
-            raise Exception(f"Transaction failed with status: {status_message}")
-
-        new_account_id = receipt.accountId
-
-        # Optional: simulate DID registration (you can implement this)
-        did_document = {
-            "id": f"did:hedera:{new_account_id}",
-            "type": "FarmerIdentity",
-            "owner": f"{validated_data['first_name']} {validated_data['last_name']}",
-            "created": datetime.datetime.utcnow().isoformat()
-        }
         validated_data['password'] = make_password(validated_data['password'])
 
-        # Create Farmer Profile
-        print(validated_data)
-        profile = FarmerProfile.objects.create(**validated_data)
-
-        # Store Hedera account securely
-        crypto = get_crypto()
-        HederaAccount.objects.create(
-            farmer=profile,
-            account_id=str(new_account_id),
-            public_key=crypto.encrypt(new_public_key.to_string()),
-            private_key=crypto.encrypt(new_private_key.to_string()),
-            did=did_document['id'],
-            did_document=did_document
-        )
+        # Create Farmer Profile; the Hedera account, keys and DID document are
+        # created by the background provisioner once this transaction commits
+        with transaction.atomic():
+            profile = FarmerProfile.objects.create(**validated_data)
+            create_pending_wallet(profile)
 
         return profile
 
 
-class LandParcelSerializer(serializers.ModelSerializer):
+class LandParcelSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = LandParcel
-        fields = '__all__'
+        # boundary mirrors gps_coordinates and is derived from it on save
+        exclude = ['boundary']
         read_only_fields = [
             'verification_status',
             'verification_method',
@@ -135,9 +106,12 @@ class LandParcelSerializer(serializers.ModelSerializer):
             coords = json.loads(value)
             if not isinstance(coords, list) or len(coords) < 3:
                 raise serializers.ValidationError("At least 3 coordinates required")
+            polygon_from_coordinates(parse_coordinates(value))
             return value
         except json.JSONDecodeError:
             raise serializers.ValidationError("Invalid JSON format")
+        except (ValueError, TypeError, IndexError) as e:
+            raise serializers.ValidationError(str(e))
 
 
 class VerificationRequestSerializer(serializers.ModelSerializer):
@@ -153,7 +127,40 @@ class TokenizationSerializer(serializers.Serializer):
     )
 
 
-class CarbonCreditProjectSerializer(serializers.ModelSerializer):
+class BulkTokenizationSerializer(serializers.Serializer):
+    land_parcels = serializers.ListField(child=serializers.IntegerField(), allow_empty=False, max_length=5000)
+    collection = serializers.CharField(max_length=100, required=False)
+
+
+class TokenizationJobSerializer(serializers.ModelSerializer):
+    status_display = serializers.CharField(source='get_status_display', read_only=True)
+    token_id = serializers.CharField(source='land_token.token_id', read_only=True, default=None)
+    serial_number = serializers.IntegerField(source='land_token.serial_number', read_only=True, default=None)
+    transaction_id = serializers.CharField(source='land_token.mint_transaction_id', read_only=True, default=None)
+    collection = serializers.SlugRelatedField(slug_field='name', read_only=True)
+    collection_token_id = serializers.CharField(source='collection.token_id', read_only=True, default=None)
+    tokens = serializers.SerializerMethodField()
+
+    class Meta:
+        model = TokenizationJob
+        fields = [
+            'id', 'land_parcel', 'parcels', 'collection', 'collection_token_id', 'status', 'status_display',
+            'token_id', 'serial_number', 'transaction_id', 'tokens', 'error', 'attempts', 'created_at',
+            'started_at', 'completed_at'
+        ]
+        read_only_fields = fields
+
+    def get_tokens(self, obj):
+        if obj.land_parcel_id is not None:
+            return None
+        return list(
+            LandToken.objects.filter(land_parcel__in=obj.parcels.all(), collection=obj.collection)
+            .order_by('serial_number')
+            .values('land_parcel', 'serial_number', 'mint_transaction_id')
+        )
+
+
+class CarbonCreditProjectSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     farmer = FarmerProfileSerializer(read_only=True)
     land_parcel = LandParcelSerializer(read_only=True)
     land_parcel_id = serializers.PrimaryKeyRelatedField(
@@ -170,7 +177,7 @@ class CarbonCreditProjectSerializer(serializers.ModelSerializer):
         read_only_fields = ['created_at', 'updated_at', 'farmer', 'is_approved', 'approved_date']
 
 
-class CarbonCreditIssuanceSerializer(serializers.ModelSerializer):
+class CarbonCreditIssuanceSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     project = CarbonCreditProjectSerializer(read_only=True)
     status_display = serializers.CharField(source='get_status_display', read_only=True)
 
@@ -180,7 +187,7 @@ class CarbonCreditIssuanceSerializer(serializers.ModelSerializer):
         read_only_fields = ['created_at', 'updated_at', 'transaction_id', 'token_id']
 
 
-class SensorDataSerializer(serializers.ModelSerializer):
+class SensorDataSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     project = CarbonCreditProjectSerializer(read_only=True)
     sensor_type_display = serializers.CharField(source='get_sensor_type_display', read_only=True)
     source_display = serializers.CharField(source='get_source_display', read_only=True)
@@ -191,14 +198,100 @@ class SensorDataSerializer(serializers.ModelSerializer):
         read_only_fields = ['created_at', 'is_verified']
 
 
-class VerificationEvidenceSerializer(serializers.ModelSerializer):
+class SensorSeriesQuerySerializer(serializers.Serializer):
+    project = serializers.IntegerField()
+    sensor_type = serializers.ChoiceField(choices=SensorData._meta.get_field('sensor_type').choices)
+    bucket = serializers.ChoiceField(choices=SensorRollup.BUCKET_CHOICES, default='day')
+    start = serializers.DateTimeField(required=False)
+    end = serializers.DateTimeField(required=False)
+
+
+class BulkGpsVerificationSerializer(serializers.Serializer):
+    land_parcels = serializers.ListField(child=serializers.IntegerField(), allow_empty=False, max_length=10000)
+
+
+class SatelliteVerificationOptionsSerializer(serializers.Serializer):
+    date_from = serializers.DateField(required=False, help_text="Start of the imagery window")
+    date_to = serializers.DateField(required=False, help_text="End of the imagery window")
+    force_refresh = serializers.BooleanField(default=False, help_text="Bypass the satellite result cache")
+
+    def validate(self, data):
+        if data.get('date_from') and data.get('date_to') and data['date_from'] > data['date_to']:
+            raise serializers.ValidationError("date_from must not be after date_to.")
+        return data
+
+
+class BulkSatelliteVerificationSerializer(SatelliteVerificationOptionsSerializer):
+    land_parcels = serializers.ListField(child=serializers.IntegerField(), allow_empty=False)
+
+    def validate_land_parcels(self, value):
+        limit = getattr(settings, 'SATELLITE_BULK_MAX_PARCELS', 100)
+        if len(set(value)) > limit:
+            raise serializers.ValidationError(
+                f"At most {limit} parcels per request; use `manage.py verify_parcels` for larger runs."
+            )
+        return value
+
+
+class ParcelOverlapSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ParcelOverlap
+        fields = [
+            'id', 'parcel_a', 'parcel_b', 'intersection_area', 'ratio_a', 'ratio_b', 'flagged', 'status',
+            'detected_at', 'updated_at'
+        ]
+        read_only_fields = fields
+
+
+class ParcelAreaQuerySerializer(serializers.Serializer):
+    bbox = serializers.CharField(required=False, help_text="min_lon,min_lat,max_lon,max_lat")
+    tile = serializers.RegexField(r'^\d{1,2}/\d+/\d+$', required=False, help_text="z/x/y")
+
+    def validate(self, data):
+        if ('bbox' in data) == ('tile' in data):
+            raise serializers.ValidationError("Pass exactly one of bbox or tile.")
+        try:
+            if 'tile' in data:
+                data['bounds'] = tile_bbox(*(int(part) for part in data['tile'].split('/')))
+            else:
+                data['bounds'] = tuple(float(part) for part in data['bbox'].split(','))
+            data['polygon'] = bbox_polygon(*data['bounds'])
+        except (TypeError, ValueError) as e:
+            raise serializers.ValidationError(str(e))
+        return data
+
+
+class ParcelRadiusQuerySerializer(serializers.Serializer):
+    lat = serializers.FloatField(min_value=-90, max_value=90)
+    lon = serializers.FloatField(min_value=-180, max_value=180)
+    radius = serializers.FloatField(min_value=0, help_text="meters")
+
+    def validate_radius(self, value):
+        limit = getattr(settings, 'PARCEL_SEARCH_MAX_RADIUS_M', 50_000)
+        if value > limit:
+            raise serializers.ValidationError(f"Radius may be at most {limit} meters.")
+        return value
+
+
+class ExportQuerySerializer(serializers.Serializer):
+    output = serializers.ChoiceField(choices=['csv', 'ndjson', 'parquet', 'arrow'], default='csv')
+    project = serializers.IntegerField(required=False)
+    start = serializers.DateTimeField(required=False)
+    end = serializers.DateTimeField(required=False)
+    sensor_type = serializers.CharField(required=False)
+    source = serializers.CharField(required=False)
+    status = serializers.CharField(required=False)
+
+
+class VerificationEvidenceSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     file_type_display = serializers.CharField(source='get_file_type_display', read_only=True)
     file_url = serializers.SerializerMethodField()
+    thumbnails = serializers.SerializerMethodField()
 
     class Meta:
         model = VerificationEvidence
         fields = '__all__'
-        read_only_fields = ['timestamp']
+        read_only_fields = ['timestamp', 'content_hash', 'image_status', 'captured_at']
 
     def get_file_url(self, obj):
         request = self.context.get('request')
@@ -206,8 +299,37 @@ class VerificationEvidenceSerializer(serializers.ModelSerializer):
             return request.build_absolute_uri(obj.file.url)
         return None
 
+    def get_thumbnails(self, obj):
+        """{size: {"webp": url, "jpeg": url}} once the image worker has processed the photo."""
+        request = self.context.get('request')
+        url = request.build_absolute_uri if request else str
+        return {
+            size: {extension: url(obj.file.storage.url(name)) for extension, name in names.items()}
+            for size, names in obj.thumbnails.items()
+        }
+
+
+class EvidenceUploadSerializer(serializers.ModelSerializer):
+    chunk_size = serializers.SerializerMethodField()
+
+    class Meta:
+        model = EvidenceUpload
+        fields = [
+            'id', 'verification', 'filename', 'file_type', 'description', 'latitude', 'longitude', 'size',
+            'received', 'parts', 'status', 'content_hash', 'evidence', 'chunk_size', 'created_at', 'updated_at'
+        ]
+        read_only_fields = ['received', 'parts', 'status', 'content_hash', 'evidence', 'created_at', 'updated_at']
+
+    def get_chunk_size(self, obj):
+        return chunk_size()
+
+    def validate_size(self, value):
+        if value <= 0 or value > max_size():
+            raise serializers.ValidationError(f"Size must be between 1 and {max_size()} bytes.")
+        return value
+
 
-class PracticeVerificationSerializer(serializers.ModelSerializer):
+class PracticeVerificationSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     project = CarbonCreditProjectSerializer(read_only=True)
     verified_by = UserSerializer(read_only=True)
     verification_type_display = serializers.CharField(source='get_verification_type_display', read_only=True)
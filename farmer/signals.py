@@ -0,0 +1,50 @@
+from functools import partial
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .auth_cache import auth_cache
+from .models import FarmerProfile, HederaAccount, SensorData
+from .rollups import refresh_rollups
+
+
+ROLLUP_KEY = ('project_id', 'sensor_type', 'reading_date')
+
+
+@receiver(pre_save, sender=SensorData)
+def remember_rollup_bucket(sender, instance, **kwargs):
+    # An update that moves the reading must also refresh the bucket it leaves
+    instance._rollup_original = None
+    if not instance._state.adding and instance.pk is not None:
+        instance._rollup_original = SensorData.objects.filter(pk=instance.pk).values_list(*ROLLUP_KEY).first()
+
+
+@receiver(post_save, sender=SensorData)
+@receiver(post_delete, sender=SensorData)
+def refresh_sensor_rollups(sender, instance, **kwargs):
+    current = tuple(getattr(instance, field) for field in ROLLUP_KEY)
+    original = getattr(instance, '_rollup_original', None)
+    for project_id, sensor_type, reading_date in {current, original or current}:
+        transaction.on_commit(partial(refresh_rollups, project_id, sensor_type, [reading_date]))
+
+
+def invalidate_auth_cache(user_id):
+    auth_cache.invalidate(user_id)
+    # Again after commit: a request may have cached the old row in between
+    transaction.on_commit(lambda: auth_cache.invalidate(user_id))
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+@receiver(post_save, sender=FarmerProfile)
+@receiver(post_delete, sender=FarmerProfile)
+def invalidate_user_auth_cache(sender, instance, **kwargs):
+    invalidate_auth_cache(instance.pk)
+
+
+@receiver(post_save, sender=HederaAccount)
+@receiver(post_delete, sender=HederaAccount)
+def invalidate_wallet_auth_cache(sender, instance, **kwargs):
+    invalidate_auth_cache(instance.farmer_id)
@@ -1,3 +1,1338 @@
-from django.test import TestCase
+import csv
+import datetime
+import hashlib
+import io
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from decimal import Decimal
+from http.server import ThreadingHTTPServer
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from cryptography.fernet import Fernet
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.db import DatabaseError, IntegrityError, connection, transaction
+from django.db.migrations.executor import MigrationExecutor
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from geographiclib.geodesic import Geodesic
+from PIL import ExifTags, Image
+from rest_framework.exceptions import ValidationError
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from farmer import balances, evidence_images, evidence_uploads, images, key_pool, partitions, provisioning, rollups, \
+    satellite_cache, verification_providers
+from farmer.auth_cache import AuthCache, auth_cache, shared_cache
+from farmer.batch_verification import verify_parcels
+from farmer.evidence_storage import FileSystemEvidenceStorage, S3EvidenceStorage, boto3, evidence_storage, part_name
+from farmer.exports import pyarrow
+from farmer.geometry import radius_in_degrees
+from farmer.hedera import HederaClientPool, hedera_clients
+from farmer.ingestion import SensorBatchIngestor, iter_rows
+from farmer.jobs import enqueue_batch_tokenization, enqueue_tokenization, fail_abandoned_jobs, work
+from farmer.management.commands import s3_stub, sentinel_stub
+from farmer.models import CarbonCreditIssuance, CarbonCreditProject, Device, EvidenceUpload, FarmerProfile, \
+    HederaAccount, LandParcel, LandToken, LandTokenCollection, PracticeVerification, SatelliteResult, SensorData, \
+    SensorRollup, TokenizationJob, VerificationEvidence, VerificationRequest, WalletKey
+from farmer.partitions import ensure_months
+from farmer.query_planning import assert_max_queries
+from farmer.sentinel import SentinelClient
+from farmer.tokenization import FakeLandTokenizationService
+from farmer.utils import get_crypto, reset_crypto
+from farmer.views import SensorDataViewSet
+
+User = get_user_model()
+
+READING_DATE = datetime.datetime(2025, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+def serve(handler):
+    """Run `handler` on a free local port for the rest of the test; returns the base URL."""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+def create_farmer(username, **extra):
+    return FarmerProfile.objects.create(
+        username=username, email=f"{username}@example.com", phone_number=username, physical_address='x',
+        country='KE', region='Nairobi', **extra
+    )
+
+
+def create_parcel(farmer, offset=0, **extra):
+    x, y = 36.8 + offset * 0.01, -1.3
+    ring = [[x, y], [x + 0.005, y], [x + 0.005, y + 0.005], [x, y + 0.005]]
+    return LandParcel.objects.create(
+        farmer=farmer, total_area=30, gps_coordinates=json.dumps(ring), address='x', country='KE',
+        region='Nairobi', **extra
+    )
+
+
+def create_project(farmer, offset=0, **extra):
+    return CarbonCreditProject.objects.create(
+        farmer=farmer, land_parcel=create_parcel(farmer, offset), project_name=f"Project {offset}",
+        project_description='d', methodology='organic', start_date='2024-01-01', expected_credits_per_year=1,
+        verification_standard='verra', **extra
+    )
+
+
+class ListQueryBudgetTests(TestCase):
+    """List endpoints run the same number of queries however many rows they return."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.farmer = create_farmer('budget', is_staff=True)
+        ensure_months([READING_DATE])
+        for number in range(10):
+            parcel = create_parcel(cls.farmer, number)
+            project = CarbonCreditProject.objects.create(
+                farmer=cls.farmer, land_parcel=parcel, project_name=f"Project {number}", project_description='d',
+                methodology='organic', start_date='2024-01-01', expected_credits_per_year=1,
+                verification_standard='verra'
+            )
+            CarbonCreditIssuance.objects.create(
+                project=project, issuance_date='2025-01-01', amount=1, batch_number=f"B-{number}",
+                verification_report='report.pdf', verification_body='body', verification_date='2025-01-01'
+            )
+            SensorData.objects.create(
+                project=project, sensor_type='ndvi', value=1, unit='index', reading_date=READING_DATE
+            )
+            verification = PracticeVerification.objects.create(
+                project=project, verification_date='2025-01-01', verification_type='remote',
+                verified_by=cls.farmer, findings='f', is_compliant=True
+            )
+            VerificationEvidence.objects.create(verification=verification, file='a.pdf', file_type='document')
+            VerificationEvidence.objects.create(verification=verification, file='b.pdf', file_type='document')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.farmer)
+
+    def assert_list_budget(self, url, limit):
+        with assert_max_queries(limit):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+    def test_projects(self):
+        self.assert_list_budget('/api/v1/farmer/projects/', 2)
+
+    def test_issuances(self):
+        self.assert_list_budget('/api/v1/farmer/issuances/', 2)
+
+    def test_verifications(self):
+        self.assert_list_budget('/api/v1/farmer/verifications/', 3)
+
+    def test_evidence(self):
+        self.assert_list_budget('/api/v1/farmer/evidence/', 2)
+
+    def test_sensor_data(self):
+        self.assert_list_budget('/api/v1/farmer/sensor-data/', 2)
+
+
+class SensorRollupTests(TestCase):
+    def setUp(self):
+        farmer = create_farmer('rollups')
+        self.project = CarbonCreditProject.objects.create(
+            farmer=farmer, land_parcel=create_parcel(farmer), project_name='Rollups', project_description='d',
+            methodology='organic', start_date='2024-01-01', expected_credits_per_year=1,
+            verification_standard='verra'
+        )
+        ensure_months([READING_DATE])
+
+    def day_counts(self):
+        return [(point['bucket_start'].day, point['count']) for point in rollups.series(self.project.id, 'ndvi', 'day')]
+
+    def test_moving_a_reading_refreshes_the_bucket_it_leaves(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            reading = SensorData.objects.create(
+                project=self.project, sensor_type='ndvi', value=1, unit='index', reading_date=READING_DATE
+            )
+        self.assertEqual(self.day_counts(), [(1, 1)])
+
+        reading.reading_date = READING_DATE + datetime.timedelta(days=1)
+        with self.captureOnCommitCallbacks(execute=True):
+            reading.save()
+        self.assertEqual(self.day_counts(), [(2, 1)])
+
+    def test_tracker_refreshes_only_the_buckets_it_saw(self):
+        untouched = SensorRollup.objects.create(
+            project=self.project, sensor_type='ndvi', bucket='day', bucket_start=READING_DATE.replace(day=10),
+            count=1, total=1, minimum=1, maximum=1
+        )
+        tracker = rollups.RollupTracker()
+        for day in (1, 20):
+            reading = SensorData.objects.create(
+                project=self.project, sensor_type='ndvi', value=day, unit='index',
+                reading_date=READING_DATE.replace(day=day)
+            )
+            tracker.add(reading.project_id, reading.sensor_type, reading.reading_date)
+        tracker.flush()
+        self.assertEqual(self.day_counts(), [(1, 1), (10, 1), (20, 1)])
+        self.assertTrue(SensorRollup.objects.filter(pk=untouched.pk).exists())
+
+        self.assertEqual(rollups.rebuild_rollups(self.project.id), 1)
+        self.assertEqual(self.day_counts(), [(1, 1), (20, 1)])
+        week = rollups.series(self.project.id, 'ndvi', 'week')
+        self.assertEqual([(point['count'], point['avg']) for point in week], [(1, 1), (1, 20)])
+
+
+class TokenizationJobTests(TestCase):
+    def setUp(self):
+        self.farmer = create_farmer('tokens')
+        self.parcel = create_parcel(self.farmer, verification_status='verified')
+        self.service = FakeLandTokenizationService()
+        self.client = APIClient()
+        self.client.force_authenticate(self.farmer)
+
+    def test_request_queues_a_job(self):
+        response = self.client.post('/api/v1/farmer/land/tokenize/', {'land_parcel': self.parcel.id}, format='json')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['status'], 'queued')
+
+        response = self.client.post('/api/v1/farmer/land/tokenize/', {'land_parcel': self.parcel.id}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(TokenizationJob.objects.count(), 1)
+
+    def test_worker_mints_the_token(self):
+        job = enqueue_tokenization(self.parcel, requested_by=self.farmer)
+        self.assertEqual(work(service=self.service), 1)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'done')
+        self.assertEqual(job.land_token.land_parcel, self.parcel)
+        self.assertEqual(job.land_token.serial_number, 1)
+        self.assertEqual(len(self.service.minted), 1)
+
+        response = self.client.get(f'/api/v1/farmer/land/tokenize/jobs/{job.id}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['serial_number'], 1)
+
+    def test_abandoned_jobs_fail_instead_of_minting_again(self):
+        job = enqueue_tokenization(self.parcel, requested_by=self.farmer)
+        TokenizationJob.objects.filter(pk=job.pk).update(
+            status='minting', updated_at=timezone.now() - datetime.timedelta(hours=1)
+        )
+        self.assertEqual(fail_abandoned_jobs(), 1)
+        self.assertEqual(work(service=self.service), 0)
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'failed')
+
+
+class BatchTokenizationTests(TestCase):
+    def setUp(self):
+        self.farmer = create_farmer('tokens')
+        self.parcels = [create_parcel(self.farmer, number, verification_status='verified') for number in range(3)]
+        self.service = FakeLandTokenizationService()
+
+    @override_settings(HEDERA_MAX_MINT_METADATA=2)
+    def test_batch_job_mints_one_serial_per_parcel(self):
+        job = enqueue_batch_tokenization(self.parcels, requested_by=self.farmer)
+        self.assertEqual(work(service=self.service), 1)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'done')
+        tokens = LandToken.objects.filter(collection=job.collection).order_by('serial_number')
+        self.assertEqual([token.land_parcel_id for token in tokens], [parcel.id for parcel in self.parcels])
+        self.assertEqual([token.serial_number for token in tokens], [1, 2, 3])
+        self.assertEqual({token.token_id for token in tokens}, {job.collection.token_id})
+        self.assertEqual(len(self.service.minted), 3)
+
+    @override_settings(HEDERA_MAX_MINT_METADATA=2)
+    def test_retry_records_minted_chunk_instead_of_minting_it_again(self):
+        failed_job = enqueue_batch_tokenization(self.parcels, requested_by=self.farmer)
+        with mock.patch.object(LandToken.objects, 'bulk_create', side_effect=DatabaseError("insert failed")):
+            work(service=self.service)
+        failed_job.refresh_from_db()
+        self.assertEqual(failed_job.status, 'failed')
+        self.assertEqual(len(failed_job.minted), 2)
+
+        job = enqueue_batch_tokenization(self.parcels, requested_by=self.farmer)
+        work(service=self.service)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'done')
+        self.assertEqual(len(self.service.minted), 3)
+        self.assertEqual(
+            sorted(LandToken.objects.values_list('land_parcel_id', 'serial_number')),
+            [(parcel.id, serial) for parcel, serial in zip(self.parcels, [1, 2, 3])]
+        )
+
+    def test_bulk_request_needs_an_existing_collection(self):
+        client = APIClient()
+        client.force_authenticate(self.farmer)
+        ids = [parcel.id for parcel in self.parcels]
+        response = client.post(
+            '/api/v1/farmer/land/tokenize/bulk/', {'land_parcels': ids, 'collection': 'Mine'}, format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(LandTokenCollection.objects.exists())
+
+        LandTokenCollection.objects.create(name='Mine', country='KE', region='Nairobi')
+        response = client.post(
+            '/api/v1/farmer/land/tokenize/bulk/', {'land_parcels': ids, 'collection': 'Mine'}, format='json'
+        )
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(
+            client.post('/api/v1/farmer/land/tokenize/bulk/', {'land_parcels': ids}, format='json').status_code, 400
+        )
+
+    def test_mixed_regions_need_an_explicit_collection(self):
+        LandParcel.objects.filter(pk=self.parcels[0].pk).update(region='Kiambu')
+        client = APIClient()
+        client.force_authenticate(self.farmer)
+        response = client.post(
+            '/api/v1/farmer/land/tokenize/bulk/', {'land_parcels': [parcel.id for parcel in self.parcels]},
+            format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('region', response.data['error'])
+        self.assertFalse(TokenizationJob.objects.exists())
+
+
+class HederaClientPoolTests(TestCase):
+    def setUp(self):
+        self.pool = HederaClientPool()
+        patcher = mock.patch.object(HederaClientPool, 'operator_credentials', return_value=('0.0.2', 'key'))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch('farmer.hedera.PooledClient')
+        self.clients = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.clients.side_effect = lambda network, *args: mock.Mock(network=network, healthy=True)
+
+    def test_clients_are_shared(self):
+        self.assertIs(self.pool.get('testnet'), self.pool.get('testnet'))
+        self.assertEqual(self.clients.call_count, 1)
+
+    def test_transport_error_reconnects_and_retries(self):
+        calls = []
+
+        def operation(pooled):
+            calls.append(pooled)
+            if len(calls) == 1:
+                raise ConnectionError("channel closed")
+            return 'ok'
+
+        self.assertEqual(self.pool.run(operation, network='testnet'), 'ok')
+        self.assertIsNot(calls[0], calls[1])
+        calls[0].close.assert_called_once()
+
+    def test_no_retry_for_transactions(self):
+        with self.assertRaises(ConnectionError):
+            self.pool.run(mock.Mock(side_effect=ConnectionError), network='testnet', retries=0)
+        self.assertEqual(self.clients.call_count, 1)
+
+
+class HederaHealthViewTests(TestCase):
+    def test_missing_operator_credentials_report_unhealthy(self):
+        client = APIClient()
+        client.force_authenticate(create_farmer('admin', is_staff=True))
+        hedera_clients.close_all()
+        with mock.patch.dict(os.environ, {'HEDERA_OPERATOR_ID': '', 'HEDERA_OPERATOR_PK': ''}):
+            response = client.get('/api/v1/farmer/hedera/health/')
+        self.assertEqual(response.status_code, 503)
+        self.assertFalse(response.data['healthy'])
+        self.assertIn('HEDERA_OPERATOR_ID', response.data['error'])
+
+
+class CachedBalanceTests(TestCase):
+    def setUp(self):
+        self.account = HederaAccount.objects.create(
+            farmer=create_farmer('balances'), account_id='0.0.1001', status='active', account_balance=5
+        )
+
+    @mock.patch('farmer.balances.get_account_balance')
+    def test_fresh_balance_is_served_without_the_network(self, get_account_balance):
+        self.account.last_balance_check = timezone.now()
+        with mock.patch.object(balances.balance_refresher, 'request') as request:
+            self.assertEqual(balances.cached_balance(self.account), 5)
+        get_account_balance.assert_not_called()
+        request.assert_not_called()
+
+    @mock.patch('farmer.balances.get_account_balance')
+    def test_stale_balance_is_queued_for_refresh(self, get_account_balance):
+        with mock.patch.object(balances.balance_refresher, 'request') as request:
+            self.assertEqual(balances.cached_balance(self.account), 5)
+        get_account_balance.assert_not_called()
+        request.assert_called_once_with(self.account.id)
+
+    @mock.patch('farmer.balances.get_account_balance', return_value=Decimal('7.5'))
+    def test_fresh_refreshes_inline(self, get_account_balance):
+        self.assertEqual(balances.cached_balance(self.account, fresh=True), Decimal('7.5'))
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.account_balance, Decimal('7.5'))
+        self.assertIsNotNone(self.account.last_balance_check)
+
+    @mock.patch('farmer.balances.get_account_balance', side_effect=ConnectionError)
+    def test_failed_refresh_keeps_the_previous_balance(self, get_account_balance):
+        self.assertEqual(balances.refresh_balances([self.account]), 0)
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.account_balance, 5)
+        self.assertIsNone(self.account.last_balance_check)
+
+
+class WalletProvisioningTests(TestCase):
+    def setUp(self):
+        self.account = HederaAccount.objects.create(farmer=create_farmer('wallets'), status='provisioning')
+        patcher = mock.patch('farmer.provisioning.PrivateKey')
+        self.private_keys = patcher.start()
+        self.addCleanup(patcher.stop)
+        key = self.private_keys.generate.return_value
+        key.to_string.return_value = 'private'
+        key.public_key.return_value.to_string.return_value = 'public'
+
+    @mock.patch('farmer.provisioning.create_hedera_account')
+    def test_retry_reuses_the_stored_key(self, create_hedera_account):
+        create_hedera_account.side_effect = [TimeoutError("no receipt"), ('0.0.1002', None)]
+        provisioning.provision(self.account)
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.status, 'pending')
+        self.assertIsNotNone(self.account.next_attempt_at)
+        self.assertEqual(get_crypto().private_key(self.account), 'private')
+
+        provisioning.provision(self.account)
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.status, 'active')
+        self.assertEqual(self.account.account_id, '0.0.1002')
+        self.private_keys.generate.assert_called_once()
+        self.assertEqual([call.args for call in self.private_keys.from_string.call_args_list], [('private',)] * 2)
+        self.assertEqual(get_crypto().public_key(self.account), 'public')
+
+    @override_settings(HEDERA_PROVISION_MAX_ATTEMPTS=2)
+    def test_abandoned_wallets_are_requeued_until_out_of_attempts(self):
+        stale = timezone.now() - datetime.timedelta(hours=1)
+        HederaAccount.objects.filter(pk=self.account.pk).update(provision_attempts=1, updated_at=stale)
+        self.assertEqual(provisioning.release_abandoned(), 1)
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.status, 'pending')
+
+        HederaAccount.objects.filter(pk=self.account.pk).update(
+            status='provisioning', provision_attempts=2, updated_at=stale
+        )
+        self.assertEqual(provisioning.release_abandoned(), 1)
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.status, 'failed')
+
+
+class WalletKeyPoolTests(TransactionTestCase):
+    def setUp(self):
+        patcher = mock.patch('farmer.key_pool.PrivateKey')
+        key = patcher.start().generate.return_value
+        self.addCleanup(patcher.stop)
+        key.to_string.return_value = 'private'
+        key.public_key.return_value.to_string.return_value = 'public'
+
+    @mock.patch('farmer.key_pool.create_hedera_account')
+    def test_refill_keeps_the_entries_built_before_a_failure(self, create_hedera_account):
+        accounts = iter(['0.0.2001', None, '0.0.2003'])
+
+        def create(private_key):
+            account_id = next(accounts)
+            if account_id is None:
+                raise ConnectionError("network down")
+            return account_id, private_key
+
+        create_hedera_account.side_effect = create
+        self.assertEqual(key_pool.refill(target=3, create_accounts=True, max_workers=1), 2)
+        self.assertEqual(
+            sorted(WalletKey.objects.values_list('account_id', flat=True)), ['0.0.2001', '0.0.2003']
+        )
+
+    @mock.patch.object(key_pool.pool_refiller, 'request')
+    def test_claim_leaves_no_key_material_in_the_pool(self, request):
+        key_pool.refill(target=1, create_accounts=False)
+        entry = key_pool.claim()
+        self.assertEqual(get_crypto().private_key(entry), 'private')
+        stored = WalletKey.objects.get(pk=entry.pk)
+        self.assertEqual(stored.status, 'claimed')
+        self.assertEqual((stored.public_key, stored.private_key, stored.data_key), ('', '', ''))
+        self.assertIsNone(key_pool.claim())
+
+
+class SensorIngestionTests(TestCase):
+    def setUp(self):
+        self.farmer = create_farmer('ingest')
+        self.project = CarbonCreditProject.objects.create(
+            farmer=self.farmer, land_parcel=create_parcel(self.farmer), project_name='Ingest', project_description='d',
+            methodology='organic', start_date='2024-01-01', expected_credits_per_year=1,
+            verification_standard='verra'
+        )
+        Device.objects.create(
+            farmer=self.farmer, device_id='probe-1', device_type='soil', installation_date='2024-01-01'
+        )
+
+    def reading(self, **fields):
+        return {
+            'device_id': 'probe-1', 'sensor_type': 'soil_moisture', 'value': '1.5', 'unit': '%',
+            'reading_date': READING_DATE.isoformat(), **fields
+        }
+
+    def ingest(self, body, content_type='application/x-ndjson'):
+        ingestor = SensorBatchIngestor(self.farmer, default_project=self.project.id)
+        return ingestor.ingest(iter_rows(io.BytesIO(body), content_type))
+
+    def test_invalid_utf8_rejects_only_its_line(self):
+        body = b'\n'.join([
+            json.dumps(self.reading()).encode(),
+            json.dumps(self.reading(unit='C')).encode().replace(b'"C"', b'"\xb0C"'),
+            json.dumps(self.reading(value='2')).encode(),
+        ])
+        report = self.ingest(body)
+        self.assertEqual((report['accepted'], report['rejected']), (2, 1))
+        self.assertEqual(report['errors'][0]['line'], 2)
+        self.assertIn('Invalid UTF-8', report['errors'][0]['errors']['non_field_errors'][0])
+
+    def test_invalid_utf8_in_csv(self):
+        body = b'device_id,sensor_type,value,unit,reading_date\n' \
+            b'probe-1,soil_moisture,1.5,%,2025-01-01T00:00:00Z\n' \
+            b'probe-1,soil_moisture,1.5,\xb0C,2025-01-01T00:00:00Z\n'
+        report = self.ingest(body, 'text/csv')
+        self.assertEqual((report['accepted'], report['rejected']), (1, 1))
+        self.assertEqual(report['errors'][0]['line'], 3)
+
+    def test_mistyped_fields_are_rejected(self):
+        rows = [
+            self.reading(value=[1]),
+            self.reading(reading_date=[READING_DATE.isoformat()]),
+            self.reading(project=True),
+            self.reading(sensor_type={'type': 'ndvi'}),
+        ]
+        report = self.ingest(b'\n'.join(json.dumps(row).encode() for row in rows))
+        self.assertEqual((report['accepted'], report['rejected']), (0, 4))
+        self.assertEqual(
+            [list(error['errors']) for error in report['errors']],
+            [['value'], ['reading_date'], ['project'], ['sensor_type']]
+        )
+
+
+class SensorPartitionTests(TestCase):
+    MONTH = datetime.datetime(2031, 3, 15, tzinfo=datetime.timezone.utc)
+
+    def setUp(self):
+        farmer = create_farmer('partitions')
+        self.project = CarbonCreditProject.objects.create(
+            farmer=farmer, land_parcel=create_parcel(farmer), project_name='Partitions', project_description='d',
+            methodology='organic', start_date='2024-01-01', expected_credits_per_year=1,
+            verification_standard='verra'
+        )
+        self.name = partitions.partition_name(partitions.month_start(self.MONTH))
+        partitions._known_months.discard(partitions.month_start(self.MONTH))
+
+    def write(self):
+        return partitions.write_partitioned([self.MONTH], lambda: SensorData.objects.create(
+            project=self.project, sensor_type='ndvi', value=1, unit='index', reading_date=self.MONTH
+        ))
+
+    def test_missing_month_is_attached_before_writing(self):
+        self.write()
+        self.assertIn(self.name, [name for name, _, _ in partitions.list_partitions()])
+        self.assertFalse(partitions.create_partition(self.MONTH))
+
+    def test_write_retries_when_a_remembered_partition_is_gone(self):
+        partitions._known_months.add(partitions.month_start(self.MONTH))
+        self.addCleanup(partitions._known_months.discard, partitions.month_start(self.MONTH))
+        reading = self.write()
+        self.assertEqual(SensorData.objects.get(pk=reading.pk).reading_date, self.MONTH)
+
+    def test_detached_month_is_rejected(self):
+        partitions.create_partition(self.MONTH)
+        with connection.cursor() as cursor:
+            cursor.execute(f'ALTER TABLE {partitions.PARENT_TABLE} DETACH PARTITION {self.name}')
+        self.assertEqual(partitions.detached_months(), {partitions.month_start(self.MONTH)})
+
+        ingestor = SensorBatchIngestor(self.project.farmer)
+        _, errors = ingestor.validate({
+            'device_id': 'probe-1', 'sensor_type': 'ndvi', 'value': 1, 'unit': 'index',
+            'reading_date': self.MONTH.isoformat(), 'project': self.project.id,
+        })
+        self.assertIn('archived', errors['reading_date'][0])
+
+        with self.assertRaises(ValidationError):
+            SensorDataViewSet().perform_create(mock.Mock(validated_data={'reading_date': self.MONTH}))
+
+
+class RepresentationTests(TestCase):
+    def setUp(self):
+        farmer = create_farmer('shapes', is_staff=True)
+        self.project = create_project(farmer)
+        ensure_months([READING_DATE])
+        for hour in range(3):
+            SensorData.objects.create(
+                project=self.project, sensor_type='ndvi', value=hour, unit='index',
+                reading_date=READING_DATE + datetime.timedelta(hours=hour)
+            )
+        self.client = APIClient()
+        self.client.force_authenticate(farmer)
+
+    def get(self, query):
+        response = self.client.get(f'/api/v1/farmer/sensor-data/?{query}')
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_default_shape_nests_the_project(self):
+        row = self.get('')['results'][0]
+        self.assertEqual(row['project']['land_parcel']['id'], self.project.land_parcel_id)
+
+    def test_fields_selects_nested_fields(self):
+        row = self.get('fields=id,value,project.project_name')['results'][0]
+        self.assertEqual(set(row), {'id', 'value', 'project'})
+        self.assertEqual(row['project'], {'project_name': 'Project 0'})
+
+    def test_compact_renders_relations_as_ids(self):
+        row = self.get('compact=1')['results'][0]
+        self.assertEqual(row['project'], self.project.id)
+
+        row = self.get('compact=1&expand=project')['results'][0]
+        self.assertEqual(row['project']['id'], self.project.id)
+        self.assertEqual(row['project']['land_parcel'], self.project.land_parcel_id)
+
+    def test_include_sends_shared_objects_once(self):
+        data = self.get('include=project')
+        self.assertEqual([row['project'] for row in data['results']], [self.project.id] * 3)
+        self.assertEqual([project['id'] for project in data['included']['project']], [self.project.id])
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        farmer = create_farmer('pages', is_staff=True)
+        project = create_project(farmer)
+        # Two issuances share each date, so pages have to break ties on id
+        self.issuances = [
+            CarbonCreditIssuance.objects.create(
+                project=project, issuance_date=datetime.date(2025, 1, 1 + number // 2), amount=1,
+                batch_number=f"P-{number}", verification_report='report.pdf', verification_body='body',
+                verification_date='2025-01-01'
+            )
+            for number in range(5)
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(farmer)
+
+    def walk(self, url):
+        ids, pages = [], []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            pages.append(response.data)
+            ids += [row['id'] for row in response.data['results']]
+            url = response.data['next']
+        return ids, pages
+
+    def test_pages_follow_the_sort_key(self):
+        ids, pages = self.walk('/api/v1/farmer/issuances/?page_size=2&fields=id')
+        newest_first = sorted(self.issuances, key=lambda issuance: (issuance.issuance_date, issuance.id), reverse=True)
+        self.assertEqual(ids, [issuance.id for issuance in newest_first])
+        self.assertEqual([len(page['results']) for page in pages], [2, 2, 1])
+        self.assertNotIn('count', pages[0])
+
+        previous = self.client.get(pages[2]['previous']).data
+        self.assertEqual(previous['results'], pages[1]['results'])
+
+    def test_counts_are_opt_in(self):
+        response = self.client.get('/api/v1/farmer/issuances/?count=exact')
+        self.assertEqual(response.data['count'], 5)
+        response = self.client.get('/api/v1/farmer/issuances/?count=estimate')
+        self.assertIsInstance(response.data['count'], int)
+
+    @override_settings(KEYSET_MAX_PAGE_SIZE=3)
+    def test_page_size_is_capped(self):
+        response = self.client.get('/api/v1/farmer/issuances/?page_size=100')
+        self.assertEqual(response.data['page_size'], 3)
+        self.assertEqual(len(response.data['results']), 3)
+
+    def test_invalid_cursor(self):
+        self.assertEqual(self.client.get('/api/v1/farmer/issuances/?cursor=nonsense').status_code, 404)
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        farmer = create_farmer('exports', is_staff=True)
+        self.project, other = create_project(farmer), create_project(farmer, 1)
+        ensure_months([READING_DATE])
+        for project in (self.project, other):
+            for day in range(1, 4):
+                SensorData.objects.create(
+                    project=project, sensor_type='ndvi', value=day, unit='index',
+                    reading_date=READING_DATE.replace(day=day)
+                )
+        self.client = APIClient()
+        self.client.force_authenticate(farmer)
+
+    def export(self, query):
+        response = self.client.get(f'/api/v1/farmer/sensor-data/export/?project={self.project.id}&{query}')
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content)
+
+    def test_csv_applies_the_filters(self):
+        body = self.export('start=2025-01-02T00:00:00Z&output=csv').decode()
+        rows = list(csv.DictReader(io.StringIO(body)))
+        self.assertEqual([row['value'] for row in rows], ['2.00', '3.00'])
+        self.assertEqual({row['project_id'] for row in rows}, {str(self.project.id)})
+
+    def test_ndjson(self):
+        rows = [json.loads(line) for line in self.export('output=ndjson').decode().splitlines()]
+        self.assertEqual([row['value'] for row in rows], ['1.00', '2.00', '3.00'])
+        self.assertEqual(rows[0]['reading_date'], READING_DATE.isoformat())
+
+    @skipUnless(pyarrow is not None, "pyarrow is not installed")
+    def test_parquet(self):
+        table = pyarrow.parquet.read_table(pyarrow.BufferReader(self.export('output=parquet')))
+        self.assertEqual(table.num_rows, 3)
+        self.assertEqual(table.column('project_id').to_pylist(), [self.project.id] * 3)
+
+    def test_command_writes_the_export(self):
+        with tempfile.NamedTemporaryFile(suffix='.ndjson') as destination:
+            call_command(
+                'export_data', 'sensor-data', output='ndjson', file=destination.name, project=self.project.id,
+                end='2025-01-03'
+            )
+            rows = [json.loads(line) for line in destination.read().decode().splitlines()]
+        self.assertEqual([row['value'] for row in rows], ['1.00', '2.00'])
+
+
+class RadiusPrefilterTests(SimpleTestCase):
+    def assert_covers(self, latitude, meters):
+        bound = radius_in_degrees(latitude, meters)
+        for azimuth in range(0, 360, 15):
+            point = Geodesic.WGS84.Direct(latitude, 36.8, azimuth, meters)
+            degrees = math.hypot(point['lat2'] - latitude, point['lon2'] - 36.8)
+            self.assertLessEqual(degrees, bound, f"azimuth {azimuth}")
+
+    def test_equator(self):
+        # A degree of latitude is 110 574 m here, shorter than the 111 320 m of longitude
+        self.assert_covers(0, 5000)
+        self.assertGreaterEqual(radius_in_degrees(0, 5000), 5000 / 110_574)
+
+    def test_high_latitudes(self):
+        self.assert_covers(-45, 50_000)
+        self.assert_covers(70, 50_000)
+
+
+class LandParcelOverlapTests(TestCase):
+    def setUp(self):
+        self.farmer = create_farmer('overlaps')
+        self.parcel = create_parcel(self.farmer)
+        self.client = APIClient()
+        self.client.force_authenticate(self.farmer)
+
+    @mock.patch('farmer.views.check_parcel')
+    def test_moving_a_parcel_checks_it_again(self, check_parcel):
+        ring = [[36.9, -1.3], [36.905, -1.3], [36.905, -1.295], [36.9, -1.295]]
+        response = self.client.patch(
+            f'/api/v1/farmer/land/{self.parcel.id}/', {'gps_coordinates': json.dumps(ring)}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        check_parcel.assert_called_once()
+        self.assertEqual(check_parcel.call_args.args[0].pk, self.parcel.pk)
+
+
+@mock.patch('farmer.land_verification.check_parcel', return_value=[])
+class BulkGpsVerificationTests(TestCase):
+    def setUp(self):
+        self.farmer = create_farmer('surveys')
+        self.parcels = [create_parcel(self.farmer, number) for number in range(2)]
+        self.client = APIClient()
+        self.client.force_authenticate(self.farmer)
+
+    def test_results_are_recorded(self, check_parcel):
+        response = self.client.post(
+            '/api/v1/farmer/land/verification/bulk-gps/',
+            {'land_parcels': [parcel.id for parcel in self.parcels]}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([result['status'] for result in response.data['results']], ['completed'] * 2)
+        self.assertGreater(response.data['results'][0]['result']['calculated_area'], 0)
+        self.assertEqual(
+            set(LandParcel.objects.values_list('verification_status', 'verification_method')), {('verified', 'gps')}
+        )
+        self.assertEqual(VerificationRequest.objects.filter(verification_method='gps').count(), 2)
+
+    def test_other_farmers_parcels_are_rejected(self, check_parcel):
+        other = create_parcel(create_farmer('neighbour'), 5)
+        response = self.client.post(
+            '/api/v1/farmer/land/verification/bulk-gps/',
+            {'land_parcels': [self.parcels[0].id, other.id]}, format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['land_parcels'], [other.id])
+        self.assertFalse(VerificationRequest.objects.exists())
+
+
+class SentinelClientTests(TestCase):
+    def setUp(self):
+        self.state = sentinel_stub.StubState(expires_in=3600, fail_every=0, latency=0)
+        server, url = serve(sentinel_stub.make_handler(self.state, io.StringIO()))
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        settings = override_settings(SENTINEL_BASE_URL=url)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.client = SentinelClient()
+
+    def analyse(self):
+        ring = [[36.8, -1.3], [36.805, -1.3], [36.805, -1.295], [36.8, -1.295], [36.8, -1.3]]
+        return self.client.post('/api/v1/analysis/land', json={'geometry': {'coordinates': [ring]}})
+
+    def test_token_is_reused_until_it_expires(self):
+        for _ in range(3):
+            self.assertEqual(self.analyse().status_code, 200)
+        self.assertEqual(self.state.tokens, 1)
+
+        self.state.expires_in = 30  # inside SENTINEL_TOKEN_REFRESH_MARGIN
+        self.client.tokens.invalidate(self.client.tokens.get())
+        self.analyse()
+        self.analyse()
+        self.assertEqual(self.state.tokens, 3)
+
+    def test_rejected_token_is_refreshed_once(self):
+        self.analyse()
+        self.state.current = 'revoked'
+        self.assertEqual(self.analyse().status_code, 200)
+        self.assertEqual(self.state.tokens, 2)
+
+    def test_concurrent_requests_share_one_token_fetch(self):
+        threads = [threading.Thread(target=self.analyse) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.state.tokens, 1)
+        self.assertEqual(self.state.requests, 8)
+
+
+class SatelliteCacheTests(TestCase):
+    RING = [[36.8, -1.3], [36.805, -1.3], [36.805, -1.295], [36.8, -1.295]]
+
+    def test_equivalent_polygons_share_a_key(self):
+        key = satellite_cache.geometry_key(self.RING, 10)
+        rotated = self.RING[1:] + self.RING[:1]
+        reversed_ring = list(reversed(self.RING))
+        noisy = [[lon + 1e-12, lat] for lon, lat in self.RING]
+        for ring in (rotated, reversed_ring, noisy):
+            self.assertEqual(satellite_cache.geometry_key(ring, 10), key)
+        self.assertNotEqual(satellite_cache.geometry_key(self.RING, 20), key)
+        self.assertNotEqual(satellite_cache.geometry_key(self.RING, 10, '2025-01-01', '2025-02-01'), key)
+
+    def test_cached_result(self):
+        fetch = mock.Mock(return_value=({'valid': True, 'area': 30}, True))
+        self.assertEqual(satellite_cache.cached_result(self.RING, 10, fetch), ({'valid': True, 'area': 30}, False))
+        self.assertEqual(satellite_cache.cached_result(self.RING, 10, fetch), ({'valid': True, 'area': 30}, True))
+        self.assertEqual(fetch.call_count, 1)
+        self.assertEqual(SatelliteResult.objects.get().hits, 1)
+
+        satellite_cache.cached_result(self.RING, 10, fetch, force_refresh=True)
+        self.assertEqual(fetch.call_count, 2)
+
+    def test_failures_are_not_stored(self):
+        fetch = mock.Mock(return_value=({'valid': False, 'error': 'unavailable'}, False))
+        satellite_cache.cached_result(self.RING, 10, fetch)
+        satellite_cache.cached_result(self.RING, 10, fetch)
+        self.assertEqual(fetch.call_count, 2)
+        self.assertFalse(SatelliteResult.objects.exists())
+
+    def test_evict(self):
+        now = timezone.now()
+        for number in range(4):
+            SatelliteResult.objects.create(
+                key=f"{number:064d}", resolution=10, result={}, expires_at=now + datetime.timedelta(hours=1),
+                last_used_at=now - datetime.timedelta(minutes=number)
+            )
+        SatelliteResult.objects.filter(key=f"{3:064d}").update(expires_at=now)
+        self.assertEqual(satellite_cache.evict(limit=2), (1, 1))
+        self.assertEqual(sorted(SatelliteResult.objects.values_list('key', flat=True)), [f"{0:064d}", f"{1:064d}"])
+
+
+class BatchSatelliteVerificationTests(TestCase):
+    def setUp(self):
+        self.state = sentinel_stub.StubState(expires_in=3600, fail_every=0, latency=0)
+        server, url = serve(sentinel_stub.make_handler(self.state, io.StringIO()))
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        settings = override_settings(SENTINEL_BASE_URL=url, SATELLITE_RATE_LIMIT=100)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        self.farmer = create_farmer('satellite')
+        self.parcels = [create_parcel(self.farmer, number) for number in range(3)]
+
+    def test_batch_verification_caches_analyses(self):
+        results = list(verify_parcels(self.parcels, self.farmer))
+        self.assertEqual([request.status for _, request, _ in results], ['completed'] * 3)
+        self.assertEqual(self.state.requests, 3)
+        self.assertEqual(
+            set(LandParcel.objects.values_list('verification_status', 'verification_method')),
+            {('verified', 'satellite')}
+        )
+
+        hits = satellite_cache.counters.hits
+        results = list(verify_parcels(self.parcels, self.farmer))
+        self.assertTrue(all(result['cached'] for _, _, result in results))
+        self.assertEqual(satellite_cache.counters.hits, hits + 3)
+        self.assertEqual(self.state.requests, 3)
+
+    def test_failed_analyses_are_not_cached(self):
+        self.state.fail_every = 1
+        with override_settings(SENTINEL_HTTP_RETRIES=0):
+            results = list(verify_parcels(self.parcels[:1], self.farmer))
+        self.assertEqual(results[0][1].status, 'failed')
+
+        self.state.fail_every = 0
+        results = list(verify_parcels(self.parcels[:1], self.farmer))
+        self.assertEqual(results[0][1].status, 'completed')
+        self.assertFalse(results[0][2]['cached'])
+
+
+class ProviderDeadlineTests(TestCase):
+    def setUp(self):
+        self.state = sentinel_stub.StubState(expires_in=3600, fail_every=1, latency=0)
+        server, url = serve(sentinel_stub.make_handler(self.state, io.StringIO()))
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        settings = override_settings(SENTINEL_BASE_URL=url, SENTINEL_HTTP_RETRIES=3, SATELLITE_RATE_LIMIT=100)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.parcel = create_parcel(create_farmer('deadline'))
+        self.provider = verification_providers.get_provider('satellite')
+        patcher = mock.patch.object(self.provider, 'timeout', 0.8)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(setattr, self.provider, 'breaker', self.provider.breaker)
+        self.provider.breaker = verification_providers.CircuitBreaker(5, 60)
+
+    def test_retries_stop_at_the_budget(self):
+        started = time.monotonic()
+        result = self.provider.call(self.parcel)
+        self.assertLess(time.monotonic() - started, 0.8)
+        self.assertIn('503', result['error'])
+        # 0.5 s of backoff fits in the budget once; the next 1 s does not
+        self.assertEqual(self.state.requests, 2)
+
+    def test_slow_answers_time_out_within_the_budget(self):
+        self.state.fail_every, self.state.latency = 0, 1.5
+        started = time.monotonic()
+        result = self.provider.call(self.parcel)
+        self.assertLess(time.monotonic() - started, 1.2)
+        self.assertIn('error', result)
+        self.assertEqual(self.state.requests, 1)
+
+    def test_batch_retries_stop_at_the_budget(self):
+        started = time.monotonic()
+        results = list(verify_parcels([self.parcel], self.parcel.farmer))
+        self.assertLess(time.monotonic() - started, 0.8)
+        self.assertEqual(results[0][1].status, 'failed')
+        self.assertEqual(self.state.requests, 2)
+
+
+class EvidenceUploadTests(TestCase):
+    CONTENT = b'0123456789'
+
+    def setUp(self):
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        settings = override_settings(
+            STORAGES={
+                'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+                'evidence': {
+                    'BACKEND': 'farmer.evidence_storage.FileSystemEvidenceStorage',
+                    'OPTIONS': {'location': root.name},
+                },
+            },
+            EVIDENCE_UPLOAD_CHUNK_SIZE=4,
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.root = root.name
+        farmer = create_farmer('uploader')
+        verification = PracticeVerification.objects.create(
+            project=create_project(farmer), verification_date='2025-01-01', verification_type='remote',
+            findings='f', is_compliant=True
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(farmer)
+        response = self.client.post('/api/v1/farmer/evidence-uploads/', {
+            'verification': verification.pk, 'filename': 'field.pdf', 'file_type': 'document',
+            'size': len(self.CONTENT),
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        self.upload_id = response.data['id']
+
+    def put(self, offset, data):
+        return self.client.generic(
+            'PUT', f'/api/v1/farmer/evidence-uploads/{self.upload_id}/chunk/', data,
+            content_type='application/octet-stream', HTTP_UPLOAD_OFFSET=str(offset)
+        )
+
+    def test_chunks_resume_and_complete(self):
+        self.assertEqual(self.put(0, self.CONTENT[:4]).data['received'], 4)
+        response = self.put(0, self.CONTENT[:4])
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['received'], 4)
+        self.assertEqual(self.put(4, self.CONTENT[4:8]).data['parts'], 2)
+        # The next chunk lands on another process: the running hash is rebuilt from the stored parts
+        evidence_uploads.hash_states.discard(EvidenceUpload.objects.get().pk)
+        self.assertEqual(self.put(8, self.CONTENT[8:]).data['received'], len(self.CONTENT))
+
+        upload = EvidenceUpload.objects.get()
+        self.assertEqual(upload.part_offsets, [0, 4, 8])
+        content_hash = hashlib.sha256(self.CONTENT).hexdigest()
+        response = self.client.post(
+            f'/api/v1/farmer/evidence-uploads/{self.upload_id}/complete/', {'sha256': 'f' * 64}, format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                f'/api/v1/farmer/evidence-uploads/{self.upload_id}/complete/', {'sha256': content_hash}, format='json'
+            )
+        self.assertEqual(response.status_code, 201, response.data)
+        evidence = VerificationEvidence.objects.get()
+        self.assertEqual(evidence.content_hash, content_hash)
+        with evidence_storage().open(evidence.file.name) as stored:
+            self.assertEqual(stored.read(), self.CONTENT)
+        self.assertFalse(os.path.exists(os.path.join(self.root, 'evidence_uploads', str(upload.pk))))
+
+    def test_chunk_is_rejected_when_another_request_stored_its_offset_first(self):
+        storage = evidence_storage()
+        write_part = storage.write_part
+
+        def concurrent_write(upload_id, offset, stream):
+            # The part is written without holding the row, so a competing request can finish meanwhile
+            EvidenceUpload.objects.filter(pk=upload_id).update(received=4, parts=1, part_offsets=[0])
+            write_part(upload_id, offset, stream)
+
+        with mock.patch.object(storage, 'write_part', concurrent_write):
+            response = self.put(0, self.CONTENT[:4])
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['received'], 4)
+        self.assertEqual(EvidenceUpload.objects.get().part_offsets, [0])
+
+
+@skipUnless(boto3, "boto3 is not installed")
+class S3StubTests(SimpleTestCase):
+    def setUp(self):
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        server, url = serve(s3_stub.make_handler(s3_stub.ObjectStore(root.name), io.StringIO()))
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        self.storage = S3EvidenceStorage(
+            'evidence', endpoint_url=url, region_name='us-east-1', access_key='stub', secret_key='stub'
+        )
+        self.storage.client.create_bucket(Bucket='evidence')
+
+    def test_parts_compose_by_offset(self):
+        first, last = b'a' * S3EvidenceStorage.min_part_size, b'tail'
+        offsets = [0, len(first)]
+        # Parts are keyed by offset, so writing one again replaces it instead of adding a part
+        self.storage.write_part('upload', 0, io.BytesIO(b'stale'))
+        self.storage.write_part('upload', 0, io.BytesIO(first))
+        self.storage.write_part('upload', len(first), io.BytesIO(last))
+        self.assertEqual(b''.join(self.storage.read_part('upload', len(first))), last)
+
+        name = self.storage.compose('upload', offsets, 'verification_evidence/joined')
+        with self.storage.open(name) as joined:
+            self.assertEqual(joined.read(), first + last)
+        self.assertEqual(self.storage.size(name), len(first) + len(last))
+
+        self.storage.delete_parts('upload', offsets)
+        self.assertFalse(self.storage.exists(part_name('upload', 0)))
+        self.assertTrue(self.storage.exists(name))
+
+
+def photo(width=600, height=300):
+    """JPEG bytes with EXIF GPS (1.5 S, 36.8 E) and capture time 2025-01-02 08:30 +03:00."""
+    exif = Image.Exif()
+    exif.get_ifd(ExifTags.IFD.GPSInfo).update({
+        ExifTags.GPS.GPSLatitudeRef: 'S', ExifTags.GPS.GPSLatitude: (1.0, 30.0, 0.0),
+        ExifTags.GPS.GPSLongitudeRef: 'E', ExifTags.GPS.GPSLongitude: (36.0, 48.0, 0.0),
+    })
+    exif.get_ifd(ExifTags.IFD.Exif).update({0x9003: '2025:01:02 08:30:00', 0x9011: '+03:00'})
+    buffer = io.BytesIO()
+    Image.new('RGB', (width, height), 'green').save(buffer, 'JPEG', exif=exif)
+    return buffer.getvalue()
+
+
+class EvidenceImageTests(TestCase):
+    SIZES = (160, 480, 1280)
+
+    def setUp(self):
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        patcher = mock.patch.object(
+            VerificationEvidence._meta.get_field('file'), 'storage', FileSystemEvidenceStorage(location=root.name)
+        )
+        self.storage = patcher.start()
+        self.addCleanup(patcher.stop)
+        settings = override_settings(EVIDENCE_THUMBNAIL_SIZES=self.SIZES)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.verification = PracticeVerification.objects.create(
+            project=create_project(create_farmer('photographer')), verification_date='2025-01-01',
+            verification_type='remote', findings='f', is_compliant=True
+        )
+
+    def create_photo(self, name, data, **extra):
+        self.storage.save(name, ContentFile(data))
+        return VerificationEvidence.objects.create(
+            verification=self.verification, file=name, file_type='photo', image_status='pending',
+            content_hash=hashlib.sha256(data).hexdigest(), **extra
+        )
+
+    def test_render_reads_exif_and_never_upscales(self):
+        metadata, thumbnails = images.render(photo(), self.SIZES)
+        self.assertEqual(metadata, {
+            'latitude': -1.5, 'longitude': 36.8, 'captured_at': '2025-01-02T08:30:00', 'utc_offset': '+03:00'
+        })
+        dimensions = {
+            size: {extension: Image.open(io.BytesIO(data)).size for extension, data in encoded.items()}
+            for size, encoded in thumbnails.items()
+        }
+        self.assertEqual(dimensions, {
+            1280: {'webp': (600, 300), 'jpeg': (600, 300)},
+            480: {'webp': (480, 240), 'jpeg': (480, 240)},
+            160: {'webp': (160, 80), 'jpeg': (160, 80)},
+        })
+
+    def test_work_stores_thumbnails_and_metadata(self):
+        located = self.create_photo('located.jpg', photo())
+        entered = self.create_photo('entered.jpg', photo(400, 400), latitude=Decimal('-1.2'), longitude=Decimal('36.9'))
+        broken = self.create_photo('broken.jpg', b'not a photo')
+        with ThreadPoolExecutor(2) as executor:
+            self.assertEqual(evidence_images.work(executor, 10), 3)
+
+        located.refresh_from_db()
+        self.assertEqual(located.image_status, 'ready')
+        self.assertEqual((located.latitude, located.longitude), (Decimal('-1.500000'), Decimal('36.800000')))
+        self.assertEqual(located.captured_at, datetime.datetime(2025, 1, 2, 5, 30, tzinfo=datetime.timezone.utc))
+        self.assertEqual(set(located.thumbnails), {'160', '480', '1280'})
+        self.assertEqual(located.thumbnails['480']['webp'], evidence_images.thumbnail_name(located, 480, 'webp'))
+        self.assertTrue(self.storage.exists(located.thumbnails['160']['jpeg']))
+
+        entered.refresh_from_db()
+        self.assertEqual((entered.latitude, entered.longitude), (Decimal('-1.200000'), Decimal('36.900000')))
+        broken.refresh_from_db()
+        self.assertEqual(broken.image_status, 'failed')
+
+    def test_photo_that_kills_the_worker_fails_alone(self):
+        fine = self.create_photo('fine.jpg', photo())
+        crashing = self.create_photo('crashing.jpg', b'crash')
+
+        def render(data, sizes):
+            if data == b'crash':
+                raise BrokenProcessPool("worker died")
+            return images.render(data, sizes)
+
+        with mock.patch.object(evidence_images, 'render', render), \
+                mock.patch.object(evidence_images, 'make_executor', lambda workers=None: ThreadPoolExecutor(1)), \
+                ThreadPoolExecutor(2) as executor:
+            with self.assertRaises(BrokenProcessPool):
+                evidence_images.work(executor, 10)
+
+        fine.refresh_from_db()
+        crashing.refresh_from_db()
+        self.assertEqual(fine.image_status, 'ready')
+        self.assertEqual(crashing.image_status, 'failed')
+        self.assertFalse(VerificationEvidence.objects.filter(image_status='pending').exists())
+
+
+class EnvelopeEncryptionTests(TestCase):
+    OLD, NEW = Fernet.generate_key().decode(), Fernet.generate_key().decode()
+
+    def use_keys(self, keys, version):
+        settings = override_settings(ENCRYPTION_MASTER_KEYS=keys, ENCRYPTION_KEY_VERSION=version)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        reset_crypto()
+        return get_crypto()
+
+    def setUp(self):
+        self.addCleanup(reset_crypto)
+        crypto = self.use_keys({1: self.OLD}, 1)
+        # Pre-envelope record: values encrypted with the master key itself
+        self.legacy = WalletKey.objects.create(
+            public_key=crypto.encrypt('legacy public'), private_key=crypto.encrypt('legacy private')
+        )
+        self.account = crypto.seal(
+            HederaAccount(farmer=create_farmer('sealed'), status='active'), 'sealed private', 'sealed public'
+        )
+        self.account.save()
+
+    def test_rotation_rewraps_data_keys_only(self):
+        sealed_values = (self.account.private_key, self.account.public_key)
+        crypto = self.use_keys({1: self.OLD, 2: self.NEW}, 2)
+        out = io.StringIO()
+        call_command('rotate_encryption_keys', batch_size=1, stdout=out)
+        self.assertIn("HederaAccount: 1 record(s) moved to key version 2, 0 left.", out.getvalue())
+        self.assertIn("WalletKey: 1 record(s) moved to key version 2, 0 left.", out.getvalue())
+
+        account = HederaAccount.objects.get(pk=self.account.pk)
+        self.assertEqual(account.key_version, 2)
+        self.assertEqual((account.private_key, account.public_key), sealed_values)
+        self.assertNotEqual(account.data_key, self.account.data_key)
+        legacy = WalletKey.objects.get(pk=self.legacy.pk)
+        self.assertEqual(legacy.key_version, 2)
+        self.assertTrue(legacy.data_key)
+
+        # Nothing is left under the old master key, so it can be dropped
+        crypto = self.use_keys({2: self.NEW}, 2)
+        self.assertEqual(crypto.private_key(account), 'sealed private')
+        self.assertEqual(crypto.public_key(account), 'sealed public')
+        self.assertEqual(crypto.private_key(legacy), 'legacy private')
+        self.assertEqual(crypto.public_key(legacy), 'legacy public')
+
+    def test_rotation_is_a_no_op_once_done(self):
+        self.use_keys({1: self.OLD, 2: self.NEW}, 2)
+        call_command('rotate_encryption_keys', stdout=io.StringIO())
+        stored = HederaAccount.objects.values('data_key', 'private_key').get(pk=self.account.pk)
+        out = io.StringIO()
+        call_command('rotate_encryption_keys', stdout=out)
+        self.assertIn("HederaAccount: 0 record(s) moved to key version 2, 0 left.", out.getvalue())
+        self.assertEqual(HederaAccount.objects.values('data_key', 'private_key').get(pk=self.account.pk), stored)
+
+    def test_records_under_a_missing_master_key_are_refused(self):
+        crypto = self.use_keys({2: self.NEW}, 2)
+        with self.assertRaises(ImproperlyConfigured):
+            crypto.public_key(self.account)
+        with self.assertRaises(ImproperlyConfigured):
+            crypto.rewrap(self.account)
+
+    def test_signing_keys_are_cached_until_reset(self):
+        crypto = get_crypto()
+        self.assertEqual(crypto.private_key(self.account), 'sealed private')
+        self.assertEqual(crypto.private_key(self.account), 'sealed private')
+        self.assertEqual(crypto.signing_keys.as_dict(), {'size': 1, 'hits': 1, 'misses': 1})
+        reset_crypto()
+        self.assertEqual(get_crypto().signing_keys.as_dict(), {'size': 0, 'hits': 0, 'misses': 0})
+
+
+class AuthCacheTests(TestCase):
+    def setUp(self):
+        shared_cache().clear()
+        auth_cache.clear()
+        self.addCleanup(auth_cache.clear)
+        self.farmer = create_farmer('cached')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.farmer)}")
+
+    @staticmethod
+    def load(pk):
+        return User.objects.get(pk=pk, is_active=True)
+
+    def test_hits_need_no_queries(self):
+        self.assertEqual(self.client.get('/api/v1/farmer/profile/').status_code, 200)
+        with self.assertNumQueries(0):
+            user = auth_cache.get(self.farmer.pk, self.load)
+            self.assertEqual(user.farmerprofile.username, 'cached')
+        self.assertEqual(auth_cache.as_dict()['hits'], 1)
+
+    def test_invalidation_in_another_process_is_seen(self):
+        auth_cache.get(self.farmer.pk, self.load)
+        # Another worker deactivates the user without signals reaching this one
+        User.objects.filter(pk=self.farmer.pk).update(is_active=False)
+        AuthCache().invalidate(self.farmer.pk)
+        with self.assertRaises(User.DoesNotExist):
+            auth_cache.get(self.farmer.pk, self.load)
+
+    def test_inactive_snapshots_are_not_served(self):
+        auth_cache.get(self.farmer.pk, self.load)
+        User.objects.filter(pk=self.farmer.pk).update(is_active=False)
+        restore = auth_cache._restore
+
+        def deactivated(snapshot):
+            user = restore(snapshot)
+            user.is_active = False
+            return user
+
+        with mock.patch.object(auth_cache, '_restore', deactivated), self.assertRaises(User.DoesNotExist):
+            auth_cache.get(self.farmer.pk, self.load)
+        self.assertEqual(auth_cache.as_dict()['entries'], 0)
+
+    def test_admin_deactivation_ends_cached_logins(self):
+        self.assertEqual(self.client.get('/api/v1/farmer/profile/').status_code, 200)
+        admin = APIClient()
+        admin.force_login(User.objects.create_superuser('root', 'root@example.com', 'x'))
+        response = admin.post('/admin/farmer/farmerprofile/', {
+            'action': 'deactivate', '_selected_action': [self.farmer.pk],
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.client.get('/api/v1/farmer/profile/').status_code, 401)
+
+
+class HederaAccountRelationTests(TestCase):
+    def test_one_wallet_per_farmer(self):
+        farmer = create_farmer('single')
+        HederaAccount.objects.create(farmer=farmer)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            HederaAccount.objects.create(farmer=farmer)
+
+    def test_wallet_loads_at_most_once(self):
+        farmer = FarmerProfile.objects.get(pk=create_farmer('lonely').pk)
+        with self.assertNumQueries(1):
+            self.assertIsNone(farmer.hederaaccount)
+            self.assertIsNone(farmer.hederaaccount)
+
+        account = HederaAccount.objects.create(farmer=farmer, status='active')
+        farmer = FarmerProfile.objects.select_related('hedera_account').get(pk=farmer.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(farmer.hederaaccount, account)
+            self.assertIs(farmer.hederaaccount.farmer, farmer)
+
+
+class WalletDedupeMigrationTests(TransactionTestCase):
+    before = [('farmer', '0016_envelope_encryption')]
+    after = [('farmer', '0017_hedera_account_one_to_one')]
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def setUp(self):
+        self.addCleanup(lambda: self.migrate(MigrationExecutor(connection).loader.graph.leaf_nodes()))
+        self.apps = self.migrate(self.before)
+
+    def test_duplicate_wallets_are_archived_as_claimed_keys(self):
+        FarmerProfile = self.apps.get_model('farmer', 'FarmerProfile')
+        HederaAccount = self.apps.get_model('farmer', 'HederaAccount')
+
+        def farmer(username):
+            return FarmerProfile.objects.create(
+                username=username, phone_number=username, physical_address='x', country='KE', region='Nairobi'
+            )
+
+        duplicated, single = farmer('duplicated'), farmer('single')
+        older = HederaAccount.objects.create(
+            farmer=duplicated, status='pending', private_key='older private', public_key='older public',
+            data_key='older data', key_version=1
+        )
+        active = HederaAccount.objects.create(
+            farmer=duplicated, status='active', account_id='0.0.7', private_key='p', public_key='q'
+        )
+        HederaAccount.objects.create(farmer=duplicated, status='failed')
+        alone = HederaAccount.objects.create(farmer=single, status='failed')
+
+        self.apps = self.migrate(self.after)
+        HederaAccount = self.apps.get_model('farmer', 'HederaAccount')
+        WalletKey = self.apps.get_model('farmer', 'WalletKey')
+        self.assertEqual(
+            sorted(HederaAccount.objects.values_list('farmer_id', 'id')),
+            sorted([(duplicated.pk, active.pk), (single.pk, alone.pk)])
+        )
+        # Only the wallet that had keys is archived, and it is never handed out again
+        archived = WalletKey.objects.get()
+        self.assertEqual(archived.status, 'claimed')
+        self.assertEqual(
+            (archived.private_key, archived.public_key, archived.data_key, archived.key_version),
+            ('older private', 'older public', 'older data', 1)
+        )
+        self.assertEqual(archived.claimed_at, older.created_at)
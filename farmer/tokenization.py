@@ -1,30 +1,18 @@
+import itertools
 import json
-import os
 
 from django.conf import settings
-from hiero_sdk_python import TokenCreateTransaction, TokenMintTransaction, Client, Network, AccountId, PrivateKey
+from django.utils.module_loading import import_string
+from hiero_sdk_python import TokenCreateTransaction, TokenMintTransaction
 from hiero_sdk_python.hapi.services.basic_types_pb2 import TokenType, TokenSupplyType
 
-from farmer.models import HederaAccount
+from farmer.hedera import hedera_clients
 
 
 class LandTokenizationService:
 
-    def tokenize_land(self, land_parcel):
-        hedera_account = HederaAccount.objects.filter(farmer_id=land_parcel.farmer_id).first()
-
-        client = Client(network=Network(os.getenv('HEDERA_NETWORK', 'testnet')))
-        operator_id = os.getenv('HEDERA_OPERATOR_ID')
-        operator_key = os.getenv('HEDERA_OPERATOR_PK')
-        client.set_operator(AccountId.from_string(operator_id), PrivateKey.from_string(operator_key))
-
-        admin_key = PrivateKey.from_string(os.getenv('HEDERA_OPERATOR_PK'))  # Optional not necessarily HEDERA_OPERATOR_PK but has to be hex
-        supply_key = PrivateKey.from_string(os.getenv('HEDERA_OPERATOR_PK'))  # Optional
-        payer_key = PrivateKey.from_string(os.getenv('HEDERA_OPERATOR_PK'))  # Optional
-
-        """Create NFT for verified land parcel"""
-        # 1. Prepare metadata
-        metadata = {
+    def build_metadata(self, land_parcel):
+        return {
             "title": f"Land Parcel #{land_parcel.id}",
             "deed_number": land_parcel.title_deed_number,
             "area_ha": float(land_parcel.total_area),
@@ -41,45 +29,130 @@ class LandTokenizationService:
             # }
         }
 
-        # 2. Create NFT token
+    def create_token(self, name, non_fungible=False):
+        pooled = hedera_clients.get()
+
+        admin_key = pooled.operator_key  # Optional not necessarily HEDERA_OPERATOR_PK but has to be hex
+        supply_key = pooled.operator_key  # Optional
+
         token_create_tx = (
             TokenCreateTransaction()
-            .set_token_name(f"LAND-{land_parcel.id}")
+            .set_token_name(name)
             .set_token_symbol("LAND")
             .set_decimals(0)
             .set_initial_supply(0)
             .set_supply_key(supply_key)
             .set_admin_key(admin_key)
-            # .set_token_type(TokenType.NON_FUNGIBLE_UNIQUE)
             # .set_supply_type(TokenSupplyType.FINITE)
             # .set_max_supply(100)
-            .set_treasury_account_id(AccountId.from_string(operator_id))
-            .freeze_with(client)
+            .set_treasury_account_id(pooled.operator_id)
         )
+        if non_fungible:
+            token_create_tx.set_token_type(TokenType.NON_FUNGIBLE_UNIQUE)
+        token_create_tx.freeze_with(pooled.client)
+        token_create_tx.sign(pooled.operator_key)
 
-        opk = PrivateKey.from_string(os.getenv('HEDERA_OPERATOR_PK'))
+        token_create_receipt = hedera_clients.run(lambda p: token_create_tx.execute(p.client), retries=0)
+        return token_create_receipt.tokenId
 
-        token_create_tx.sign(opk)
-
-        token_create_receipt = token_create_tx.execute(client)
-        token_id = token_create_receipt.tokenId
-        # token_id = token_tx.getReceipt(client).tokenId
-
-        # 3. Mint NFT with metadata
-        json_dump = json.dumps(metadata).encode()
-        print(json_dump)
+    def mint(self, token_id, metadata):
+        """
+        Mint one serial per entry of `metadata` (a dict, or a list of dicts)
+        in a single TokenMintTransaction.
+        """
+        if not isinstance(metadata, list):
+            metadata = [metadata]
+        pooled = hedera_clients.get()
         token_mint_tx = (
             TokenMintTransaction()
             .set_token_id(token_id)
-            # .set_amount(1000)
-            .set_metadata(json_dump)
-            .freeze_with(client)
-            .sign(supply_key)
+            .set_metadata([json.dumps(item).encode() for item in metadata])
+            .freeze_with(pooled.client)
+            .sign(pooled.operator_key)
         )
-        token_mint_receipt = token_mint_tx.execute(client)
-        print(token_mint_receipt.to_proto())
+        token_mint_receipt = hedera_clients.run(lambda p: token_mint_tx.execute(p.client), retries=0)
         return {
-            "token_id": str(token_id),
             "transaction_id": str(token_mint_receipt),
+            "serial_numbers": list(getattr(token_mint_receipt, 'serial_numbers', None) or [1]),
+        }
+
+    def tokenize_land(self, land_parcel, on_progress=None):
+        """Create NFT for verified land parcel"""
+        on_progress = on_progress or (lambda stage: None)
+
+        # 1. Prepare metadata
+        metadata = self.build_metadata(land_parcel)
+
+        # 2. Create NFT token
+        on_progress('creating_token')
+        token_id = self.create_token(f"LAND-{land_parcel.id}")
+
+        # 3. Mint NFT with metadata
+        on_progress('minting')
+        minted = self.mint(token_id, metadata)
+        return {
+            "token_id": str(token_id),
+            "transaction_id": minted['transaction_id'],
+            "serial_number": minted['serial_numbers'][0],
             "metadata": metadata
-        }
\ No newline at end of file
+        }
+
+    def tokenize_batch(self, land_parcels, token_id):
+        """
+        Mint `land_parcels` into an existing NON_FUNGIBLE_UNIQUE token, packing
+        up to HEDERA_MAX_MINT_METADATA parcels into each mint transaction.
+        Yields one result per minted chunk so callers can persist progress.
+        """
+        chunk_size = getattr(settings, 'HEDERA_MAX_MINT_METADATA', 10)
+        land_parcels = list(land_parcels)
+        for start in range(0, len(land_parcels), chunk_size):
+            chunk = land_parcels[start:start + chunk_size]
+            metadata = [self.build_metadata(parcel) for parcel in chunk]
+            minted = self.mint(token_id, metadata)
+            if len(minted['serial_numbers']) != len(chunk):
+                raise Exception(
+                    f"Mint returned {len(minted['serial_numbers'])} serials for {len(chunk)} parcels"
+                )
+            yield [
+                {
+                    "land_parcel": parcel,
+                    "token_id": str(token_id),
+                    "transaction_id": minted['transaction_id'],
+                    "serial_number": serial,
+                    "metadata": parcel_metadata
+                }
+                for parcel, serial, parcel_metadata in zip(chunk, minted['serial_numbers'], metadata)
+            ]
+
+
+class FakeLandTokenizationService(LandTokenizationService):
+    """
+    Stand-in for the Hiero network that hands out deterministic token ids and
+    serials without any network traffic. Select it with
+    LAND_TOKENIZATION_SERVICE = 'farmer.tokenization.FakeLandTokenizationService'.
+    """
+    _token_ids = itertools.count(1000)
+
+    def __init__(self):
+        self.serials = {}
+        self.minted = []
+
+    def create_token(self, name, non_fungible=False):
+        return f"0.0.{next(self._token_ids)}"
+
+    def mint(self, token_id, metadata):
+        if not isinstance(metadata, list):
+            metadata = [metadata]
+        first = self.serials.get(token_id, 0) + 1
+        serials = list(range(first, first + len(metadata)))
+        self.serials[token_id] = serials[-1]
+        self.minted.extend(zip([token_id] * len(serials), serials, metadata))
+        return {
+            "transaction_id": f"fake-mint-{token_id}-{first}",
+            "serial_numbers": serials,
+        }
+
+
+def get_tokenization_service():
+    service_path = getattr(settings, 'LAND_TOKENIZATION_SERVICE', 'farmer.tokenization.LandTokenizationService')
+    return import_string(service_path)()
@@ -2,7 +2,8 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 
 from . import views
-from .views import FarmerOnboardingView, GetHederaAccountView, LoginView, UserProfileView, LandParcelView
+from .views import FarmerOnboardingView, GetHederaAccountView, LoginView, UserProfileView, LandParcelView, \
+    HederaHealthView, WalletKeyPoolView, SatelliteCacheView, VerificationProvidersView, AuthCacheView
 
 
 app_name = "Farmer"
@@ -15,12 +16,18 @@ router.register(r'projects', views.CarbonCreditProjectViewSet, basename='CarbonC
 router.register(r'issuances', views.CarbonCreditIssuanceViewSet, basename='CarbonCreditIssuanceViewSet')
 router.register(r'verifications', views.PracticeVerificationViewSet, basename='PracticeVerificationViewSet')
 router.register(r'evidence', views.VerificationEvidenceViewSet, basename='VerificationEvidenceViewSet')
+router.register(r'evidence-uploads', views.EvidenceUploadViewSet, basename='EvidenceUploadViewSet')
 router.register(r'sensor-data', views.SensorDataViewSet, basename='SensorDataViewSet')
 
 urlpatterns = [
     path('register/', FarmerOnboardingView.as_view(), name='farmer-register'),
     path('login/', LoginView.as_view(), name='login'),
     path('profile/', UserProfileView.as_view(), name='user-profile'),
+    path('auth/cache/', AuthCacheView.as_view(), name='auth-cache'),
     path('hedera-account/', GetHederaAccountView.as_view(), name='hedera-account'),
+    path('hedera/health/', HederaHealthView.as_view(), name='hedera-health'),
+    path('hedera/key-pool/', WalletKeyPoolView.as_view(), name='wallet-key-pool'),
+    path('land/verification/providers/', VerificationProvidersView.as_view(), name='verification-providers'),
+    path('land/verification/cache/', SatelliteCacheView.as_view(), name='satellite-cache'),
     path('', include(router.urls)),
 ]
\ No newline at end of file
@@ -1,21 +1,180 @@
 # crypto_utils.py
-from cryptography.fernet import Fernet
+"""
+Envelope encryption for wallet keys (HederaAccount, WalletKey).
+
+Each record has its own data key (a Fernet key) that encrypts its
+public_key/private_key. The data key is stored in `data_key`, wrapped by a
+master key, and `key_version` says which one. Rotating the master key only
+re-wraps the data keys (`manage.py rotate_encryption_keys`); the encrypted
+values stay as they are. Records with key_version 0 predate data keys:
+their values are encrypted with the master key directly.
+
+Master keys come from settings.ENCRYPTION_MASTER_KEYS and are only read on
+first use, so importing this module never fails.
+"""
+import hashlib
 import os
+import threading
+import time
+from collections import OrderedDict
+
+from cryptography.fernet import Fernet, MultiFernet
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+LEGACY_VERSION = 0
+
+
+def master_keys():
+    """{version: key}; FERNET_SECRET_KEY from the environment is version 1 by default."""
+    keys = getattr(settings, 'ENCRYPTION_MASTER_KEYS', None) or {1: os.getenv("FERNET_SECRET_KEY")}
+    return {int(version): key for version, key in keys.items() if key}
+
+
+def active_version():
+    return getattr(settings, 'ENCRYPTION_KEY_VERSION', 1)
+
+
+class SigningKeyCache:
+    """Decrypted private keys by ciphertext, for signing bursts. Bounded (LRU) and short-lived (TTL)."""
+
+    def __init__(self, limit=None, ttl=None):
+        self.limit = limit
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._keys = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _settings(self):
+        return (
+            self.limit if self.limit is not None else getattr(settings, 'SIGNING_KEY_CACHE_SIZE', 1024),
+            self.ttl if self.ttl is not None else getattr(settings, 'SIGNING_KEY_CACHE_TTL', 300),
+        )
+
+    @staticmethod
+    def _key(token):
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token):
+        key = self._key(token)
+        with self._lock:
+            entry = self._keys.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                self._keys.pop(key, None)
+                self.misses += 1
+                return None
+            self._keys.move_to_end(key)
+            self.hits += 1
+            return entry[1]
 
-# Ideally store this key securely in environment variable or a vault
-FERNET_SECRET_KEY = os.getenv("FERNET_SECRET_KEY")
+    def put(self, token, value):
+        limit, ttl = self._settings()
+        if limit <= 0 or ttl <= 0:
+            return
+        key = self._key(token)
+        with self._lock:
+            self._keys[key] = (time.monotonic() + ttl, value)
+            self._keys.move_to_end(key)
+            while len(self._keys) > limit:
+                self._keys.popitem(last=False)
 
-if not FERNET_SECRET_KEY:
-    raise Exception("Please set FERNET_SECRET_KEY in your environment.")
+    def clear(self):
+        with self._lock:
+            self._keys.clear()
+
+    def as_dict(self):
+        with self._lock:
+            return {'size': len(self._keys), 'hits': self.hits, 'misses': self.misses}
 
-fernet = Fernet(FERNET_SECRET_KEY.encode())
 
 class CryptoUtility:
+    def __init__(self, keys, version):
+        if version not in keys:
+            raise ImproperlyConfigured(
+                f"No master key for ENCRYPTION_KEY_VERSION {version}; set FERNET_SECRET_KEY or ENCRYPTION_MASTER_KEYS."
+            )
+        self.version = version
+        self.masters = {number: Fernet(key.encode() if isinstance(key, str) else key) for number, key in keys.items()}
+        # Active key first: encrypts, and is tried first when decrypting
+        self.fernet = MultiFernet(
+            [self.masters[version]] + [fernet for number, fernet in self.masters.items() if number != version]
+        )
+        self.signing_keys = SigningKeyCache()
+
     def encrypt(self, data: str) -> str:
-        return fernet.encrypt(data.encode()).decode()
+        return self.fernet.encrypt(data.encode()).decode()
 
     def decrypt(self, token: str) -> str:
-        return fernet.decrypt(token.encode()).decode()
+        return self.fernet.decrypt(token.encode()).decode()
+
+    def _master(self, version):
+        try:
+            return self.masters[version]
+        except KeyError:
+            raise ImproperlyConfigured(f"Master key version {version} is not configured") from None
+
+    def _data_fernet(self, record):
+        if record.key_version == LEGACY_VERSION:
+            return self.fernet
+        return Fernet(self._master(record.key_version).decrypt(record.data_key.encode()))
+
+    def seal(self, record, private_key: str, public_key: str):
+        """Encrypt the key pair into `record` under a new data key (the record is not saved)."""
+        data_key = Fernet.generate_key()
+        fernet = Fernet(data_key)
+        record.data_key = self.masters[self.version].encrypt(data_key).decode()
+        record.key_version = self.version
+        record.private_key = fernet.encrypt(private_key.encode()).decode()
+        record.public_key = fernet.encrypt(public_key.encode()).decode()
+        return record
+
+    def public_key(self, record) -> str:
+        return self._data_fernet(record).decrypt(record.public_key.encode()).decode()
+
+    def private_key(self, record) -> str:
+        value = self.signing_keys.get(record.private_key)
+        if value is None:
+            value = self._data_fernet(record).decrypt(record.private_key.encode()).decode()
+            self.signing_keys.put(record.private_key, value)
+        return value
+
+    def rewrap(self, record):
+        """
+        Move `record` to the active master key. A data key is re-wrapped;
+        a legacy record gets a data key and its values re-encrypted.
+        Returns whether the record changed (it is not saved).
+        """
+        if record.key_version == self.version:
+            return False
+        if record.key_version == LEGACY_VERSION:
+            self.seal(record, self.private_key(record), self.public_key(record))
+            return True
+        data_key = self._master(record.key_version).decrypt(record.data_key.encode())
+        record.data_key = self.masters[self.version].encrypt(data_key).decode()
+        record.key_version = self.version
+        return True
+
+
+_crypto = None
+_crypto_lock = threading.Lock()
+
 
 def get_crypto():
-    return CryptoUtility()
+    """The process-wide CryptoUtility, built on first use."""
+    global _crypto
+    if _crypto is None:
+        with _crypto_lock:
+            if _crypto is None:
+                keys = master_keys()
+                if not keys:
+                    raise ImproperlyConfigured("Please set FERNET_SECRET_KEY in your environment.")
+                _crypto = CryptoUtility(keys, active_version())
+    return _crypto
+
+
+def reset_crypto():
+    """Forget the CryptoUtility (and its cached keys), e.g. after the master keys changed."""
+    global _crypto
+    with _crypto_lock:
+        _crypto = None
@@ -0,0 +1,292 @@
+"""
+Land verification providers.
+
+Each verification method is a Provider registered under its name. A new
+method (drone imagery, LiDAR, ...) is a subclass decorated with
+`@register`. Every provider has:
+
+- a timeout budget (passed to remote calls; slower answers count as failures),
+- a concurrency limit (callers beyond it get ProviderUnavailable),
+- a circuit breaker (opens after `failure_threshold` consecutive failures and
+  lets a trial call through after `reset_timeout` seconds),
+- a latency histogram.
+
+Defaults live on the class and VERIFICATION_PROVIDERS overrides them per
+name. A provider may list cheap `prechecks` (other providers, e.g. the local
+GPS area check) that must pass before its own, typically remote, call is
+made.
+"""
+import bisect
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+
+from farmer.land_verification import LandVerificationService
+from farmer.serializers import SatelliteVerificationOptionsSerializer
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)  # seconds
+
+
+class ProviderUnavailable(Exception):
+    pass
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold, reset_timeout):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self.failures = 0
+        self.opened_at = None
+        self.trial = False
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return 'half_open'
+        return 'open'
+
+    def allow(self):
+        """Whether a call may go ahead. While half open only one trial call is let through."""
+        with self._lock:
+            state = self.state
+            if state == 'closed':
+                return True
+            if state == 'half_open' and not self.trial:
+                self.trial = True
+                return True
+            return False
+
+    def cancel(self):
+        """The call allowed last did not happen after all."""
+        with self._lock:
+            self.trial = False
+
+    def record(self, failed):
+        with self._lock:
+            self.trial = False
+            if not failed:
+                self.failures = 0
+                self.opened_at = None
+                return
+            self.failures += 1
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                # A failed trial call re-opens the breaker for another reset_timeout
+                self.opened_at = time.monotonic()
+
+    def as_dict(self):
+        return {'state': self.state, 'consecutive_failures': self.failures}
+
+
+class LatencyHistogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, seconds):
+        with self._lock:
+            self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+            self.count += 1
+            self.total += seconds
+
+    def as_dict(self):
+        cumulative = 0
+        buckets = {}
+        for bound, count in zip((*self.buckets, '+Inf'), self.counts):
+            cumulative += count
+            buckets[str(bound)] = cumulative
+        return {'buckets': buckets, 'count': self.count, 'sum': round(self.total, 4)}
+
+
+class Provider:
+    name = None
+    label = None
+    local = True  # runs in-process without remote calls
+    prechecks = ()
+    timeout = 15
+    concurrency = 10
+    failure_threshold = 5
+    reset_timeout = 60
+
+    def __init__(self):
+        for option, value in getattr(settings, 'VERIFICATION_PROVIDERS', {}).get(self.name, {}).items():
+            setattr(self, option, value)
+        self.breaker = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+        self.latency = LatencyHistogram()
+        self._slots = threading.BoundedSemaphore(self.concurrency)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+
+    def options(self, request):
+        """Keyword arguments for `verify` taken from the API request. May raise ValidationError."""
+        return {}
+
+    def verify(self, parcel, timeout, **options):
+        raise NotImplementedError
+
+    def precheck(self, parcel):
+        """The result of the first failing precheck for `parcel`, or None when all pass."""
+        for name in self.prechecks:
+            result = providers[name].call(parcel)
+            if not result.get('valid'):
+                return {**result, 'valid': False, 'precheck': name}
+        return None
+
+    def is_failure(self, result):
+        """Whether `result` means the provider itself failed (as opposed to the parcel failing verification)."""
+        return not self.local and 'error' in result
+
+    def call(self, parcel, **options):
+        if not self.breaker.allow():
+            raise ProviderUnavailable(f"{self.label} verification is temporarily unavailable")
+        if not self._slots.acquire(timeout=1):
+            self.breaker.cancel()
+            raise ProviderUnavailable(f"Too many {self.label} verifications in progress")
+
+        with self._lock:
+            self.in_flight += 1
+        started = time.perf_counter()
+        try:
+            result = self.verify(parcel, timeout=self.timeout, **options)
+            failed = self.is_failure(result)
+        except Exception as e:
+            logger.exception("%s verification failed.", self.label)
+            result, failed = {"error": str(e)}, True
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+            self._slots.release()
+        self.observe(time.perf_counter() - started, failed)
+        return result
+
+    def observe(self, elapsed, failed):
+        """Record one call's latency and outcome on the histogram and the breaker."""
+        self.latency.observe(elapsed)
+        if elapsed > self.timeout:
+            logger.warning("%s verification took %.1fs, over its %ss budget", self.label, elapsed, self.timeout)
+            failed = True
+        self.breaker.record(failed)
+
+    @contextmanager
+    def reserve(self, wanted):
+        """
+        Hold up to `wanted` concurrency slots for a batch of calls, which
+        report each outcome with `observe`. Yields the number of slots held;
+        only one while the breaker is half open, so the batch starts with a
+        single trial call. Raises ProviderUnavailable like `call`.
+        """
+        half_open = self.breaker.state == 'half_open'
+        if not self.breaker.allow():
+            raise ProviderUnavailable(f"{self.label} verification is temporarily unavailable")
+        if not self._slots.acquire(timeout=1):
+            self.breaker.cancel()
+            raise ProviderUnavailable(f"Too many {self.label} verifications in progress")
+        held = 1
+        while held < (1 if half_open else wanted) and self._slots.acquire(blocking=False):
+            held += 1
+
+        with self._lock:
+            self.in_flight += held
+        try:
+            yield held
+        finally:
+            with self._lock:
+                self.in_flight -= held
+            for _ in range(held):
+                self._slots.release()
+            if half_open:
+                # The batch may not have made its trial call (e.g. every result was cached)
+                self.breaker.cancel()
+
+    def status(self):
+        return {
+            'label': self.label,
+            'local': self.local,
+            'timeout': self.timeout,
+            'concurrency': self.concurrency,
+            'in_flight': self.in_flight,
+            'breaker': self.breaker.as_dict(),
+            'latency': self.latency.as_dict(),
+        }
+
+
+providers = {}
+
+
+def register(cls):
+    providers[cls.name] = cls()
+    return cls
+
+
+def get_provider(name):
+    return providers.get(name)
+
+
+def verify(parcel, method, request):
+    """
+    Run the `method` provider for `parcel`, after its prechecks. A failed
+    precheck is returned as the result without calling the provider.
+    Raises ProviderUnavailable and (for bad options) ValidationError.
+    """
+    provider = providers[method]
+    options = provider.options(request)
+    failed = provider.precheck(parcel)
+    if failed is not None:
+        return failed
+    return provider.call(parcel, **options)
+
+
+def status():
+    return {name: provider.status() for name, provider in providers.items()}
+
+
+@register
+class GpsProvider(Provider):
+    name = 'gps'
+    label = 'GPS'
+    timeout = 2
+
+    def options(self, request):
+        return {'gps_points': request.data.get('gps_points')}
+
+    def verify(self, parcel, timeout, gps_points=None):
+        return LandVerificationService.verify_with_gps(parcel, gps_points)
+
+
+@register
+class SurveyProvider(Provider):
+    name = 'survey'
+    label = 'Survey'
+    timeout = 5
+
+    def options(self, request):
+        return {'survey_report': request.FILES.get('survey_report')}
+
+    def verify(self, parcel, timeout, survey_report=None):
+        return LandVerificationService.verify_with_survey(parcel, survey_report)
+
+
+@register
+class SatelliteProvider(Provider):
+    name = 'satellite'
+    label = 'Satellite'
+    local = False
+    prechecks = ('gps',)
+
+    def options(self, request):
+        serializer = SatelliteVerificationOptionsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return serializer.validated_data
+
+    def verify(self, parcel, timeout, **options):
+        return LandVerificationService.verify_with_satellite(parcel, timeout=timeout, **options)
@@ -1,28 +1,52 @@
 import json
-from decimal import Decimal
 
-from hiero_sdk_python import Client, AccountId, PrivateKey, CryptoGetAccountBalanceQuery, Network
-from rest_framework import generics, permissions, status, viewsets
+from django.db import OperationalError, transaction
+from rest_framework import generics, mixins, permissions, status, viewsets
 from rest_framework.decorators import action
-from rest_framework.exceptions import PermissionDenied
+from rest_framework.exceptions import PermissionDenied, ValidationError
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from .models import FarmerProfile, HederaAccount, CarbonCreditProject, CarbonCreditIssuance, PracticeVerification, \
     VerificationEvidence, SensorData
 from .serializers import FarmerProfileSerializer, LoginSerializer, CarbonCreditProjectSerializer, \
     PracticeVerificationSerializer, CarbonCreditIssuanceSerializer, VerificationEvidenceSerializer, SensorDataSerializer
 from django.contrib.auth import get_user_model
+from django.http import StreamingHttpResponse
+from django.urls import reverse
 from rest_framework_simplejwt.tokens import RefreshToken
 import os
 from rest_framework import generics, status
 from rest_framework.response import Response
-from .models import LandParcel, LandToken, VerificationRequest
+from .models import LandParcel, LandToken, VerificationRequest, TokenizationJob, LandTokenCollection, EvidenceUpload
 from .serializers import (
     LandParcelSerializer,
     VerificationRequestSerializer,
-    TokenizationSerializer
+    TokenizationSerializer,
+    TokenizationJobSerializer,
+    BulkTokenizationSerializer,
+    SensorSeriesQuerySerializer,
+    ExportQuerySerializer,
+    ParcelAreaQuerySerializer,
+    ParcelRadiusQuerySerializer,
+    ParcelOverlapSerializer,
+    BulkGpsVerificationSerializer,
+    BulkSatelliteVerificationSerializer,
+    EvidenceUploadSerializer
 )
-from .land_verification import LandVerificationService
-from .tokenization import LandTokenizationService
+from .balances import cached_balance, balance_age
+from . import evidence_uploads, key_pool, rollups, satellite_cache, verification_providers
+from .auth_cache import auth_cache
+from .hedera import HederaClientUnavailable, hedera_clients
+from .batch_verification import verify_parcels
+from .land_verification import LandVerificationService, record_verification
+from .ingestion import SensorBatchIngestor, iter_rows
+from .jobs import enqueue_tokenization, enqueue_batch_tokenization
+from .partitions import PartitionDetached, write_partitioned
+from .query_planning import QueryPlanMixin, plan_queryset
+from .representation import RepresentationMixin
+from .pagination import IssuancePagination, SensorDataPagination
+from .exports import DATASETS, FORMATS, ExportUnavailable, stream_export
+from .geometry import within_bbox, within_radius
+from .overlaps import check_parcel, overlaps_of
 
 User = get_user_model()
 
@@ -55,6 +79,7 @@ class FarmerOnboardingView(generics.CreateAPIView):
             'user_id': farmer.user_ptr_id,
             'hedera_account_id': hederaaccount.account_id,
             'did': hederaaccount.did,
+            'wallet_status': hederaaccount.status,
             'tokens': {
                 'refresh': str(refresh),
                 'access': str(refresh.access_token),
@@ -71,21 +96,15 @@ class GetHederaAccountView(generics.RetrieveAPIView):
             farmer = request.user.farmerprofile
             hedera_account = farmer.hederaaccount
 
-            # Initialize client to get balance
-            client = Client(
-                network=Network(os.getenv('HEDERA_NETWORK', 'testnet')),
-            )
-
-            operator_id = os.getenv('HEDERA_OPERATOR_ID'),
-            operator_key = os.getenv('HEDERA_OPERATOR_PK')
-            client.set_operator(AccountId.from_string(operator_id), private_key=PrivateKey.from_string(operator_key))
-
-            balance = CryptoGetAccountBalanceQuery().set_account_id(AccountId.from_string(hedera_account.account_id))
+            balance = cached_balance(hedera_account, fresh=request.query_params.get('fresh') == '1')
 
             return Response({
                 'account_id': hedera_account.account_id,
+                'wallet_status': hedera_account.status,
                 'did': hedera_account.did,
                 'balance': balance,
+                'balance_checked_at': hedera_account.last_balance_check,
+                'balance_age_seconds': balance_age(hedera_account),
                 'did_document': hedera_account.did_document
             })
         except FarmerProfile.DoesNotExist:
@@ -95,6 +114,50 @@ class GetHederaAccountView(generics.RetrieveAPIView):
             )
 
 
+class HederaHealthView(generics.GenericAPIView):
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        error = None
+        try:
+            healthy = hedera_clients.check(force=request.query_params.get('force') == '1')
+        except HederaClientUnavailable as e:
+            healthy, error = False, str(e)
+        return Response({
+            'healthy': healthy,
+            'error': error,
+            'clients': hedera_clients.status()
+        }, status=status.HTTP_200_OK if healthy else status.HTTP_503_SERVICE_UNAVAILABLE)
+
+
+class WalletKeyPoolView(generics.GenericAPIView):
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        return Response(key_pool.depth())
+
+
+class VerificationProvidersView(generics.GenericAPIView):
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        return Response(verification_providers.status())
+
+
+class AuthCacheView(generics.GenericAPIView):
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        return Response(auth_cache.as_dict())
+
+
+class SatelliteCacheView(generics.GenericAPIView):
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        return Response(satellite_cache.stats())
+
+
 class LoginView(generics.GenericAPIView):
     serializer_class = LoginSerializer
     permission_classes = [permissions.AllowAny]
@@ -108,24 +171,13 @@ class LoginView(generics.GenericAPIView):
         try:
             farmer_profile = user.farmerprofile
             hedera_account = farmer_profile.hederaaccount
-
-            # Initialize client to get current balance
-            client = Client(network=Network(os.getenv('HEDERA_NETWORK', 'testnet')))
-            operator_id = os.getenv('HEDERA_OPERATOR_ID')
-            operator_key = os.getenv('HEDERA_OPERATOR_PK')
-
-            client.set_operator(AccountId.from_string(operator_id), PrivateKey.from_string(operator_key))
-
-            balance_query = CryptoGetAccountBalanceQuery().set_account_id(AccountId.from_string(hedera_account.account_id))
-            balance = balance_query.execute(client)
-
-            # Update balance in database
-            balance_decimal = Decimal(str(balance.hbars).replace(" ℏ", ""))
-            hedera_account.account_balance = balance_decimal
-            hedera_account.save()
         except FarmerProfile.DoesNotExist:
             hedera_account = None
-            balance = 0
+
+        # Serve the cached balance; the network is only queried with ?fresh=1
+        if hedera_account:
+            balance_decimal = cached_balance(hedera_account, fresh=request.query_params.get('fresh') == '1')
+        else:
             balance_decimal = 0
 
         refresh = RefreshToken.for_user(user)
@@ -142,7 +194,10 @@ class LoginView(generics.GenericAPIView):
             'refresh': str(refresh),
             'hedera_account_id': hedera_account.account_id if hedera_account else None,
             'did': hedera_account.did if hedera_account else None,
-            'balance': balance_decimal
+            'wallet_status': hedera_account.status if hedera_account else None,
+            'balance': balance_decimal,
+            'balance_checked_at': hedera_account.last_balance_check if hedera_account else None,
+            'balance_age_seconds': balance_age(hedera_account) if hedera_account else None
         }, status=status.HTTP_200_OK)
 
 
@@ -160,6 +215,41 @@ class LandParcelView(viewsets.ModelViewSet):
     def get_queryset(self):
         return LandParcel.objects.filter(farmer_id=self.request.user.id)
 
+    def perform_create(self, serializer):
+        parcel = serializer.save()
+        check_parcel(parcel)
+
+    def perform_update(self, serializer):
+        parcel = serializer.save()
+        check_parcel(parcel)
+
+    @action(detail=True, methods=['get', 'post'])
+    def overlaps(self, request, *args, **kwargs):
+        """Stored overlaps with other parcels; POST re-checks the parcel first."""
+        parcel = self.get_object()
+        if request.method == 'POST':
+            check_parcel(parcel)
+        return Response(ParcelOverlapSerializer(overlaps_of(parcel), many=True).data)
+
+    def _parcel_page(self, queryset):
+        page = self.paginate_queryset(queryset.order_by('id'))
+        return self.get_paginated_response(self.get_serializer(page, many=True).data)
+
+    @action(detail=False, methods=['get'], url_path='in-area')
+    def in_area(self, request, *args, **kwargs):
+        """Parcels intersecting ?bbox=min_lon,min_lat,max_lon,max_lat or map tile ?tile=z/x/y."""
+        serializer = ParcelAreaQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        return self._parcel_page(within_bbox(self.get_queryset(), serializer.validated_data['polygon']))
+
+    @action(detail=False, methods=['get'])
+    def nearby(self, request, *args, **kwargs):
+        """Parcels within ?radius= meters of ?lat=&lon=."""
+        serializer = ParcelRadiusQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
+        return self._parcel_page(within_radius(self.get_queryset(), params['lon'], params['lat'], params['radius']))
+
     def create(self, request, *args, **kwargs):
         data = request.data.copy()
         farmer = FarmerProfile.objects.filter(id=request.user.id).first()
@@ -181,6 +271,65 @@ class VerificationRequestAPI(viewsets.ModelViewSet):
     def get_serializer_class(self):
         return VerificationRequestSerializer
 
+    @action(detail=False, methods=['post'], url_path='bulk-gps')
+    def bulk_gps(self, request, *args, **kwargs):
+        """
+        GPS-verify many parcels at once: geodesic areas come from one batch
+        computation, and each result is recorded as create() records one.
+        """
+        serializer = BulkGpsVerificationSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        parcel_ids = set(serializer.validated_data['land_parcels'])
+        parcels = LandParcel.objects.filter(pk__in=parcel_ids).order_by('id')
+        if not request.user.is_staff:
+            parcels = parcels.filter(farmer_id=request.user.id)
+
+        missing = sorted(parcel_ids - set(parcels.values_list('id', flat=True)))
+        if missing:
+            return Response(
+                {'error': 'Land parcels not found', 'land_parcels': missing},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        results = LandVerificationService.verify_batch_with_gps(parcels)
+        response = []
+        for parcel in parcels:
+            verification_request, result = record_verification(parcel, request.user, 'gps', results[parcel.pk])
+            response.append({'land_parcel': parcel.pk, 'status': verification_request.status, 'result': result})
+        return Response({'results': response})
+
+    @action(detail=False, methods=['post'], url_path='bulk-satellite')
+    def bulk_satellite(self, request, *args, **kwargs):
+        """
+        Satellite-verify up to SATELLITE_BULK_MAX_PARCELS parcels with
+        concurrent Sentinel Hub requests; `manage.py verify_parcels` runs
+        larger batches.
+        """
+        serializer = BulkSatelliteVerificationSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        options = serializer.validated_data
+        parcel_ids = set(options.pop('land_parcels'))
+        parcels = LandParcel.objects.filter(pk__in=parcel_ids).order_by('id')
+        if not request.user.is_staff:
+            parcels = parcels.filter(farmer_id=request.user.id)
+        parcels = list(parcels)
+
+        missing = sorted(parcel_ids - {parcel.pk for parcel in parcels})
+        if missing:
+            return Response(
+                {'error': 'Land parcels not found', 'land_parcels': missing},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            results = [
+                {'land_parcel': parcel.pk, 'status': verification_request.status, 'result': result}
+                for parcel, verification_request, result in verify_parcels(parcels, request.user, **options)
+            ]
+        except verification_providers.ProviderUnavailable as e:
+            return Response({'error': str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        return Response({'results': sorted(results, key=lambda item: item['land_parcel'])})
+
     def create(self, request, *args, **kwargs):
         print(request.data)
         parcel = LandParcel.objects.get(
@@ -189,40 +338,24 @@ class VerificationRequestAPI(viewsets.ModelViewSet):
         )
 
         # Initiate verification based on method
-        method = request.data['verification_method']
-        verification_result = None
-
-        if method == 'satellite':
-            verification_result = LandVerificationService.verify_with_satellite(parcel)
-        elif method == 'gps':
-            verification_result = LandVerificationService.verify_with_gps(
-                parcel,
-                request.data.get('gps_points')
-            )
-        elif method == 'survey':
-            verification_result = LandVerificationService.verify_with_survey(
-                parcel,
-                request.FILES.get('survey_report')
+        method = request.data.get('verification_method')
+        if verification_providers.get_provider(method) is None:
+            return Response(
+                {'error': f"Unknown verification method \"{method}\". Use one of: "
+                          f"{', '.join(sorted(verification_providers.providers))}"},
+                status=status.HTTP_400_BAD_REQUEST
             )
+        try:
+            verification_result = verification_providers.verify(parcel, method, request)
+        except verification_providers.ProviderUnavailable as e:
+            return Response({'error': str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
 
-        # Update parcel status
-        if verification_result.get('valid'):
-            parcel.verification_status = 'verified'
-            parcel.verification_method = method
-            parcel.verified_by = request.user
-            parcel.save()
-
-        # Create verification request record
-        request = VerificationRequest.objects.create(
-            land_parcel=parcel,
-            requested_by=request.user,
-            verification_method=method,
-            status='completed' if verification_result.get('valid') else 'failed',
-            notes=json.dumps(verification_result)
+        verification_request, verification_result = record_verification(
+            parcel, request.user, method, verification_result
         )
 
         return Response({
-            "status": request.status,
+            "status": verification_request.status,
             "result": verification_result
         }, status=status.HTTP_201_CREATED)
 
@@ -237,32 +370,97 @@ class TokenizeLandAPI(viewsets.ModelViewSet):
         return TokenizationSerializer
 
     def create(self, request, *args, **kwargs):
-        parcel = LandParcel.objects.get(
-            pk=request.data['land_parcel'],
-            farmer=request.user.farmerprofile,
-            verification_status='verified'
-        )
+        with transaction.atomic():
+            # The row lock makes concurrent requests for the parcel queue one job between them
+            parcel = LandParcel.objects.select_for_update().get(
+                pk=request.data['land_parcel'],
+                farmer=request.user.farmerprofile,
+                verification_status='verified'
+            )
 
-        token_service = LandTokenizationService()
-        result = token_service.tokenize_land(parcel)
+            if LandToken.objects.filter(land_parcel=parcel).exists() or \
+                    parcel.tokenization_jobs.exclude(status='failed').exists() or \
+                    parcel.batch_tokenization_jobs.filter(status__in=['queued', 'creating_token', 'minting']).exists():
+                return Response(
+                    {'error': 'Land parcel is already tokenized or queued for tokenization'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
 
-        # Create land token record
-        token = LandToken.objects.create(
-            land_parcel=parcel,
-            token_id=result['token_id'],
-            serial_number=1,
-            token_metadata=json.dumps(result['metadata']),
-            mint_transaction_id=result['transaction_id']
-        )
+            # Token creation and minting run in the tokenization worker
+            job = enqueue_tokenization(parcel, requested_by=request.user)
 
         return Response({
-            "token_id": token.token_id,
-            "transaction_id": token.mint_transaction_id,
-            "metadata": result['metadata']
-        }, status=status.HTTP_201_CREATED)
+            "job_id": job.id,
+            "status": job.status,
+            "status_url": request.build_absolute_uri(
+                reverse('Farmer:TokenizeLandAPI-job-status', kwargs={'job_id': job.id})
+            )
+        }, status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=False, methods=['post'])
+    def bulk(self, request, *args, **kwargs):
+        serializer = BulkTokenizationSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        parcel_ids = set(serializer.validated_data['land_parcels'])
+
+        collection = None
+        name = serializer.validated_data.get('collection')
+        if name and request.user.is_staff:
+            collection, _ = LandTokenCollection.objects.get_or_create(name=name)
+        elif name:
+            collection = LandTokenCollection.objects.filter(name=name).first()
+            if collection is None:
+                return Response({'error': 'Collection not found'}, status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            # Lock the parcels first, so a concurrent request for any of them waits
+            # for this one's job and then finds the parcels queued
+            list(LandParcel.objects.select_for_update().filter(
+                pk__in=parcel_ids, farmer=request.user.farmerprofile
+            ).order_by('id'))
+            parcels = list(LandParcel.objects.filter(
+                pk__in=parcel_ids,
+                farmer=request.user.farmerprofile,
+                verification_status='verified',
+                landtoken__isnull=True
+            ).exclude(
+                batch_tokenization_jobs__status__in=['queued', 'creating_token', 'minting']
+            ).exclude(
+                tokenization_jobs__status__in=['queued', 'creating_token', 'minting', 'done']
+            ))
+            rejected = sorted(parcel_ids - {parcel.id for parcel in parcels})
+            if rejected:
+                return Response({
+                    'error': 'Land parcels must be your own, verified and not yet tokenized',
+                    'land_parcels': rejected
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            try:
+                job = enqueue_batch_tokenization(parcels, collection=collection, requested_by=request.user)
+            except ValueError as e:
+                return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            "job_id": job.id,
+            "status": job.status,
+            "collection": job.collection.name,
+            "status_url": request.build_absolute_uri(
+                reverse('Farmer:TokenizeLandAPI-job-status', kwargs={'job_id': job.id})
+            )
+        }, status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=False, methods=['get'], url_path=r'jobs/(?P<job_id>\d+)')
+    def job_status(self, request, job_id=None):
+        job = TokenizationJob.objects.select_related('land_token', 'collection').filter(
+            pk=job_id,
+            requested_by_id=request.user.id
+        ).first()
+        if job is None:
+            return Response({'error': 'Tokenization job not found'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(TokenizationJobSerializer(job).data)
 
 
-class CarbonCreditProjectViewSet(viewsets.ModelViewSet):
+class CarbonCreditProjectViewSet(RepresentationMixin, QueryPlanMixin, viewsets.ModelViewSet):
     queryset = CarbonCreditProject.objects.all()
     serializer_class = CarbonCreditProjectSerializer
     # filter_backends = [DjangoFilterBackend]
@@ -290,14 +488,35 @@ class CarbonCreditProjectViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['get'])
     def verifications(self, request, pk=None):
         project = self.get_object()
-        verifications = project.verifications.all()
+        verifications = plan_queryset(project.verifications.all(), PracticeVerificationSerializer)
         serializer = PracticeVerificationSerializer(verifications, many=True)
         return Response(serializer.data)
 
 
-class CarbonCreditIssuanceViewSet(viewsets.ReadOnlyModelViewSet):
+def export_response(view, dataset_name):
+    """Stream the view's queryset as CSV, NDJSON, Parquet or Arrow with filters applied in SQL."""
+    serializer = ExportQuerySerializer(data=view.request.query_params)
+    serializer.is_valid(raise_exception=True)
+    params = dict(serializer.validated_data)
+    output = params.pop('output')
+    dataset = DATASETS[dataset_name]
+    params = {name: value for name, value in params.items() if name in dataset.filters}
+
+    try:
+        chunks = stream_export(dataset, view.get_queryset(), output, **params)
+    except ExportUnavailable as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    response = StreamingHttpResponse(chunks, content_type=FORMATS[output])
+    extension = 'arrows' if output == 'arrow' else output
+    response['Content-Disposition'] = f'attachment; filename="{dataset_name}.{extension}"'
+    return response
+
+
+class CarbonCreditIssuanceViewSet(RepresentationMixin, QueryPlanMixin, viewsets.ReadOnlyModelViewSet):
     queryset = CarbonCreditIssuance.objects.all()
     serializer_class = CarbonCreditIssuanceSerializer
+    pagination_class = IssuancePagination
     # filter_backends = [DjangoFilterBackend]
     # filterset_class = CarbonCreditIssuanceFilter
     permission_classes = [permissions.IsAuthenticated]
@@ -307,8 +526,12 @@ class CarbonCreditIssuanceViewSet(viewsets.ReadOnlyModelViewSet):
             return self.queryset
         return self.queryset.filter(project__farmer_id=self.request.user.id)
 
+    @action(detail=False, methods=['get'])
+    def export(self, request, *args, **kwargs):
+        return export_response(self, 'issuances')
 
-class PracticeVerificationViewSet(viewsets.ModelViewSet):
+
+class PracticeVerificationViewSet(RepresentationMixin, QueryPlanMixin, viewsets.ModelViewSet):
     queryset = PracticeVerification.objects.all()
     serializer_class = PracticeVerificationSerializer
     # filter_backends = [DjangoFilterBackend]
@@ -319,7 +542,7 @@ class PracticeVerificationViewSet(viewsets.ModelViewSet):
         serializer.save(verified_by=self.request.user)
 
 
-class VerificationEvidenceViewSet(viewsets.ModelViewSet):
+class VerificationEvidenceViewSet(RepresentationMixin, QueryPlanMixin, viewsets.ModelViewSet):
     queryset = VerificationEvidence.objects.all()
     serializer_class = VerificationEvidenceSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -327,14 +550,85 @@ class VerificationEvidenceViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         verification_id = self.request.data.get('verification')
         verification = PracticeVerification.objects.get(pk=verification_id)
-        if not (self.request.user.is_staff or verification.project.farmer.user == self.request.user):
+        if not (self.request.user.is_staff or verification.project.farmer_id == self.request.user.id):
             raise PermissionDenied("You don't have permission to add evidence to this verification")
-        serializer.save()
+        name, content_hash = evidence_uploads.store_file(serializer.validated_data['file'])
+        serializer.save(file=name, content_hash=content_hash)
+
+
+class EvidenceUploadViewSet(mixins.CreateModelMixin, mixins.RetrieveModelMixin, mixins.DestroyModelMixin,
+                            viewsets.GenericViewSet):
+    """
+    Chunked, resumable evidence upload: create with the file's metadata and
+    size, PUT the bytes in order to chunk/ (raw body, Upload-Offset header),
+    GET to find where to resume, POST complete/ to create the evidence.
+    """
+    serializer_class = EvidenceUploadSerializer
+    permission_classes = [permissions.IsAuthenticated]
 
+    def get_queryset(self):
+        queryset = EvidenceUpload.objects.all()
+        if self.request.user.is_staff:
+            return queryset
+        return queryset.filter(created_by=self.request.user)
+
+    def perform_create(self, serializer):
+        verification = serializer.validated_data['verification']
+        if not (self.request.user.is_staff or verification.project.farmer_id == self.request.user.id):
+            raise PermissionDenied("You don't have permission to add evidence to this verification")
+        serializer.save(created_by=self.request.user)
+
+    def perform_destroy(self, instance):
+        evidence_uploads.abort(instance)
 
-class SensorDataViewSet(viewsets.ModelViewSet):
+    def _locked(self):
+        """The upload row locked for this transaction, or None while another request holds it."""
+        upload = self.get_object()
+        try:
+            return EvidenceUpload.objects.select_for_update(nowait=True).get(pk=upload.pk)
+        except OperationalError:
+            return None
+
+    @action(detail=True, methods=['put'])
+    def chunk(self, request, *args, **kwargs):
+        try:
+            offset = int(request.headers['Upload-Offset'])
+            length = int(request.headers['Content-Length'])
+        except (KeyError, ValueError):
+            return Response(
+                {'error': 'Upload-Offset and Content-Length headers are required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            upload = evidence_uploads.write_chunk(self.get_object(), offset, length, request.stream)
+        except evidence_uploads.OffsetMismatch as e:
+            return Response({'error': str(e), 'received': e.received}, status=status.HTTP_409_CONFLICT)
+        except evidence_uploads.UploadError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(self.get_serializer(upload).data)
+
+    @action(detail=True, methods=['post'])
+    def complete(self, request, *args, **kwargs):
+        try:
+            with transaction.atomic():
+                upload = self._locked()
+                if upload is None:
+                    return Response(
+                        {'error': 'A chunk of this upload is in progress'}, status=status.HTTP_409_CONFLICT
+                    )
+                evidence = evidence_uploads.complete(upload, request.data.get('sha256'))
+        except evidence_uploads.UploadError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(
+            VerificationEvidenceSerializer(evidence, context=self.get_serializer_context()).data,
+            status=status.HTTP_201_CREATED
+        )
+
+
+class SensorDataViewSet(RepresentationMixin, QueryPlanMixin, viewsets.ModelViewSet):
     queryset = SensorData.objects.all()
     serializer_class = SensorDataSerializer
+    pagination_class = SensorDataPagination
     # filter_backends = [DjangoFilterBackend]
     # filterset_class = SensorDataFilter
     permission_classes = [permissions.IsAuthenticated]
@@ -343,3 +637,54 @@ class SensorDataViewSet(viewsets.ModelViewSet):
         if self.request.user.is_staff:
             return self.queryset
         return self.queryset.filter(project__farmer__user=self.request.user)
+
+    def perform_create(self, serializer):
+        try:
+            write_partitioned([serializer.validated_data['reading_date']], serializer.save)
+        except PartitionDetached:
+            raise ValidationError(
+                {'reading_date': ["Readings for this month are archived and can no longer be written."]}
+            )
+
+    @action(detail=False, methods=['get'])
+    def export(self, request, *args, **kwargs):
+        return export_response(self, 'sensor-data')
+
+    @action(detail=False, methods=['get'])
+    def series(self, request, *args, **kwargs):
+        """min/max/avg/count per hour, day or week for one project and sensor type, served from rollups."""
+        serializer = SensorSeriesQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
+
+        project = CarbonCreditProject.objects.filter(pk=params['project']).first()
+        if project is None or not (request.user.is_staff or project.farmer_id == request.user.id):
+            return Response({'error': 'Project not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        return Response({
+            'project': project.id,
+            'sensor_type': params['sensor_type'],
+            'bucket': params['bucket'],
+            'points': rollups.series(project.id, params['sensor_type'], params['bucket'],
+                                     params.get('start'), params.get('end'))
+        })
+
+    @action(detail=False, methods=['post'])
+    def bulk(self, request, *args, **kwargs):
+        """
+        Ingest a batch of readings sent as newline-delimited JSON
+        (application/x-ndjson) or CSV (text/csv) with a header row.
+        The body is streamed, never parsed into request.data.
+        """
+        content_type = request.content_type or ''
+        if not content_type.startswith(('text/csv', 'application/x-ndjson', 'application/jsonl')):
+            return Response(
+                {'error': 'Send readings as application/x-ndjson or text/csv'},
+                status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+            )
+        if request.stream is None:
+            return Response({'error': 'Empty request body'}, status=status.HTTP_400_BAD_REQUEST)
+
+        ingestor = SensorBatchIngestor(request.user, default_project=request.query_params.get('project'))
+        report = ingestor.ingest(iter_rows(request.stream, content_type))
+        return Response(report, status=status.HTTP_201_CREATED if report['accepted'] else status.HTTP_400_BAD_REQUEST)